@@ -0,0 +1,230 @@
+import re
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+
+# Rank of each priority label, used as a pre-score
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+# Keywords suggesting an urgent ticket, with the priority rank they imply
+URGENCY_KEYWORDS = {
+    "outage": 3, "down": 3, "breach": 3, "security": 3, "vulnerability": 3,
+    "data loss": 3, "production": 3, "urgent": 3, "urgente": 3, "urgence": 3,
+    "emergency": 3, "critical": 3, "紧急": 3,
+    "crash": 2, "crashing": 2, "error": 2, "failed": 2, "failing": 2,
+    "broken": 2, "cannot": 2, "can't": 2, "unable": 2, "not working": 2,
+}
+
+
+def urgency_score(text: str) -> float:
+    """
+    Cheap urgency estimate from keywords (no preprocessing or model call)
+
+    Returns:
+        Highest priority rank implied by a keyword, or 1 (medium) if none matches
+    """
+    text = str(text).lower()
+    words = set(re.findall(r"[\w']+", text))
+    return max(
+        (
+            rank for keyword, rank in URGENCY_KEYWORDS.items()
+            # Whole words only ("down" but not "download"); phrases and CJK by substring
+            if (keyword in words if keyword.isascii() and " " not in keyword else keyword in text)
+        ),
+        default=PRIORITY_RANK["medium"]
+    )
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, route: str, reason: str, retry_after: float):
+        super().__init__(f"Server overloaded ({reason}), retry in {retry_after:.0f}s")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _RouteState:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        # Heap of (-score, sequence, future): highest score first, FIFO within a score
+        self.waiters: List[tuple] = []
+        self.queued = 0
+        # Smoothed time a request holds its slot
+        self.service_time: Optional[float] = None
+        self.admitted = 0
+        self.shed: Dict[str, int] = {}
+
+
+class AdmissionController:
+    """
+    Admission control in front of the inference path.
+
+    Each route has a concurrency limit. Requests over the limit wait in a
+    per-route priority queue ordered by a pre-score, so urgent tickets get
+    the next free slot. A request is shed (Overloaded) when the queue is full,
+    when its estimated wait exceeds the latency budget, or when it actually
+    waits longer than the budget.
+    """
+
+    def __init__(self, limits: Dict[str, int], default_limit: int = 32,
+                 max_queue: int = 512, latency_budget_ms: float = 2000,
+                 smoothing: float = 0.2):
+        """
+        Initialize the controller
+
+        Args:
+            limits: Concurrency limit per route name
+            default_limit: Limit for routes not listed in limits
+            max_queue: Maximum number of waiting requests over all routes
+            latency_budget_ms: Longest a request may wait for a slot
+            smoothing: Weight of the newest sample in the service time average
+        """
+        self.default_limit = max(1, default_limit)
+        self.max_queue = max(0, max_queue)
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.smoothing = smoothing
+        self._routes: Dict[str, _RouteState] = {
+            route: _RouteState(max(1, limit)) for route, limit in limits.items()
+        }
+        self._sequence = itertools.count()
+
+    def _route(self, route: str) -> _RouteState:
+        state = self._routes.get(route)
+        if state is None:
+            state = self._routes[route] = _RouteState(self.default_limit)
+        return state
+
+    def queue_depth(self, route: Optional[str] = None) -> int:
+        """Number of waiting requests for a route, or over all routes"""
+        if route is not None:
+            return self._route(route).queued
+        return sum(state.queued for state in self._routes.values())
+
+    def _estimated_wait(self, state: _RouteState, ahead: int) -> float:
+        if state.service_time is None:
+            return 0.0
+        return math.ceil((ahead + 1) / state.limit) * state.service_time
+
+    def _shed(self, route: str, state: _RouteState, reason: str, retry_after: float) -> Overloaded:
+        state.shed[reason] = state.shed.get(reason, 0) + 1
+        return Overloaded(route, reason, max(1.0, math.ceil(retry_after)))
+
+    def _retry_after(self, state: _RouteState) -> float:
+        return self._estimated_wait(state, state.queued) or self.latency_budget
+
+    async def acquire(self, route: str, score: float = 0.0) -> None:
+        """
+        Wait for a slot on a route
+
+        Args:
+            route: Route name
+            score: Pre-score of the request; higher scores are admitted first
+
+        Raises:
+            Overloaded: If the request is shed
+        """
+        state = self._route(route)
+        if state.running < state.limit and state.queued == 0:
+            state.running += 1
+            state.admitted += 1
+            return
+
+        # Requests that would be admitted before this one
+        ahead = sum(1 for entry in state.waiters if -entry[0] >= score and not entry[2].done())
+        if self._estimated_wait(state, ahead) > self.latency_budget:
+            raise self._shed(route, state, "latency_budget", self._retry_after(state))
+
+        if self.queue_depth() >= self.max_queue and not self._evict_lower(route, state, score):
+            raise self._shed(route, state, "queue_full", self._retry_after(state))
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiters, (-score, next(self._sequence), future))
+        state.queued += 1
+        try:
+            await asyncio.wait({future}, timeout=self.latency_budget)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+                state.queued -= 1
+            elif not future.cancelled() and future.exception() is None:
+                self.release(route)
+            raise
+
+        if not future.done():
+            # Waited longer than the budget
+            future.cancel()
+            state.queued -= 1
+            raise self._shed(route, state, "timeout", self._retry_after(state))
+        # Raises Overloaded if a more urgent request took this one's place
+        future.result()
+
+    def _evict_lower(self, route: str, state: _RouteState, score: float) -> bool:
+        """Shed the least urgent waiter of a route to make room for a more urgent one"""
+        candidates = [entry for entry in state.waiters if not entry[2].done()]
+        if not candidates:
+            return False
+        # Lowest score, newest first
+        lowest = max(candidates, key=lambda entry: (entry[0], entry[1]))
+        if -lowest[0] >= score:
+            return False
+        state.queued -= 1
+        lowest[2].set_exception(self._shed(route, state, "preempted", self._retry_after(state)))
+        return True
+
+    def release(self, route: str, service_time: Optional[float] = None) -> None:
+        """
+        Free a slot, handing it to the most urgent waiter
+
+        Args:
+            route: Route name
+            service_time: Seconds the slot was held, for the wait estimates
+        """
+        state = self._route(route)
+        if service_time is not None:
+            if state.service_time is None:
+                state.service_time = service_time
+            else:
+                state.service_time += self.smoothing * (service_time - state.service_time)
+
+        while state.waiters:
+            _, _, future = heapq.heappop(state.waiters)
+            if future.done():
+                # Timed out, cancelled or preempted
+                continue
+            state.queued -= 1
+            state.admitted += 1
+            future.set_result(None)
+            return
+        state.running -= 1
+
+    @asynccontextmanager
+    async def admit(self, route: str, score: float = 0.0):
+        """Hold a slot on a route for the duration of a block"""
+        await self.acquire(route, score)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(route, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, dict]:
+        """Limits, queue depth and shed counts per route"""
+        return {
+            route: {
+                "limit": state.limit,
+                "running": state.running,
+                "queued": state.queued,
+                "admitted": state.admitted,
+                "shed": dict(state.shed),
+                "service_time_ms": state.service_time * 1000.0 if state.service_time is not None else None,
+            }
+            for route, state in self._routes.items()
+        }
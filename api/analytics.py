@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+# Dimensions counted for every prediction
+DIMENSIONS = ("category", "priority", "language", "product")
+
+# Bucket width and number of buckets kept per resolution
+RESOLUTIONS = {
+    "minute": (60, 24 * 60),
+    "hour": (3600, 30 * 24),
+    "day": (86400, 366),
+}
+
+
+class RollingAggregates:
+    """
+    Prediction counts in rolling time buckets.
+
+    Every recorded prediction increments one counter per resolution (minute,
+    hour and day buckets), keyed by its (category, priority, language,
+    product) combination, so reads never touch the prediction log. Each
+    resolution keeps a fixed number of buckets and drops the oldest. Queries
+    roll the buckets up to the requested dimensions in O(buckets x
+    combinations per bucket).
+    """
+
+    def __init__(self, resolutions: Optional[Dict[str, tuple]] = None):
+        """
+        Initialize the aggregates
+
+        Args:
+            resolutions: Resolution name -> (bucket seconds, buckets kept)
+        """
+        self.resolutions = dict(resolutions or RESOLUTIONS)
+        # Resolution -> bucket start -> Counter of dimension tuples
+        self._buckets: Dict[str, "OrderedDict[int, Counter]"] = {
+            name: OrderedDict() for name in self.resolutions
+        }
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.recorded = 0
+
+    @staticmethod
+    def _key(record: dict) -> tuple:
+        return tuple(str(record.get(dimension) or "") for dimension in DIMENSIONS)
+
+    def record(self, records: List[dict], timestamp: Optional[float] = None) -> None:
+        """
+        Count predictions
+
+        Args:
+            records: Prediction records with category, priority, language and product
+            timestamp: Time of the predictions (default: now)
+        """
+        if not records:
+            return
+        now = int(timestamp if timestamp is not None else time.time())
+        keys = Counter(self._key(record) for record in records)
+        with self._lock:
+            for name, (width, keep) in self.resolutions.items():
+                buckets = self._buckets[name]
+                start = now - now % width
+                bucket = buckets.get(start)
+                if bucket is None:
+                    bucket = buckets[start] = Counter()
+                    # Buckets are created in time order, so the oldest is first
+                    while len(buckets) > keep:
+                        buckets.popitem(last=False)
+                bucket.update(keys)
+            self.recorded += len(records)
+            self._dirty = True
+
+    def query(self, resolution: str = "hour", buckets: int = 24,
+              group_by: Sequence[str] = ("category", "priority"),
+              filters: Optional[Dict[str, str]] = None,
+              now: Optional[float] = None) -> dict:
+        """
+        Counts over the most recent buckets
+
+        Args:
+            resolution: minute, hour or day
+            buckets: Number of most recent buckets (empty buckets included)
+            group_by: Dimensions to keep; the others are summed over
+            filters: Dimension -> value that counted predictions must have
+            now: Current time (default: now)
+
+        Returns:
+            Dictionary with the bucket width, one entry per bucket (start time,
+            total and counts per group, oldest first) and the totals per group
+        """
+        if resolution not in self.resolutions:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(self.resolutions)}")
+        unknown = [dimension for dimension in list(group_by) + list(filters or {}) if dimension not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {', '.join(unknown)}, expected {', '.join(DIMENSIONS)}")
+
+        width, keep = self.resolutions[resolution]
+        buckets = max(1, min(buckets, keep))
+        now = int(now if now is not None else time.time())
+        latest = now - now % width
+        starts = [latest - width * i for i in range(buckets - 1, -1, -1)]
+
+        positions = [DIMENSIONS.index(dimension) for dimension in group_by]
+        conditions = [(DIMENSIONS.index(dimension), str(value)) for dimension, value in (filters or {}).items()]
+
+        with self._lock:
+            stored = self._buckets[resolution]
+            snapshot = [(start, dict(stored[start]) if start in stored else {}) for start in starts]
+
+        series = []
+        totals = Counter()
+        for start, counts in snapshot:
+            rolled = Counter()
+            for key, count in counts.items():
+                if all(key[position] == value for position, value in conditions):
+                    rolled[tuple(key[position] for position in positions)] += count
+            totals.update(rolled)
+            series.append({
+                "start": start,
+                "total": sum(rolled.values()),
+                "counts": self._rows(group_by, rolled),
+            })
+
+        return {
+            "resolution": resolution,
+            "bucket_seconds": width,
+            "group_by": list(group_by),
+            "buckets": series,
+            "totals": self._rows(group_by, totals),
+        }
+
+    @staticmethod
+    def _rows(group_by: Sequence[str], counts: Counter) -> List[dict]:
+        return [
+            dict(zip(group_by, key), count=count)
+            for key, count in counts.most_common()
+        ]
+
+    def save(self, path: str) -> bool:
+        """
+        Write a snapshot if anything was recorded since the last one
+
+        Returns:
+            True if a snapshot was written
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            state = {
+                name: [[start, [[*key, count] for key, count in counts.items()]]
+                       for start, counts in buckets.items()]
+                for name, buckets in self._buckets.items()
+            }
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a partial snapshot
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dimensions": list(DIMENSIONS), "buckets": state}, f)
+        os.replace(tmp_path, path)
+        return True
+
+    def load(self, path: str) -> int:
+        """
+        Restore counts from a snapshot
+
+        Returns:
+            Number of buckets restored
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("dimensions") != list(DIMENSIONS):
+            print(f"Ignoring analytics snapshot with different dimensions: {path}")
+            return 0
+
+        restored = 0
+        with self._lock:
+            for name, buckets in snapshot["buckets"].items():
+                if name not in self._buckets:
+                    continue
+                _, keep = self.resolutions[name]
+                for start, rows in buckets[-keep:]:
+                    self._buckets[name][int(start)] = Counter(
+                        {tuple(row[:-1]): row[-1] for row in rows}
+                    )
+                    restored += 1
+        return restored
+
+    def stats(self) -> Dict[str, int]:
+        """Recorded predictions and buckets kept per resolution"""
+        with self._lock:
+            return dict(
+                {f"{name}_buckets": len(buckets) for name, buckets in self._buckets.items()},
+                recorded=self.recorded
+            )
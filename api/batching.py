@@ -0,0 +1,208 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests into micro-batches so the
+    classifier runs one vectorized call per batch instead of one per request
+    """
+
+    def __init__(self, predict_batch: Callable[[List[str], List[str], List[Optional[str]]], List[dict]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 stats_window: int = 1000, executor=None,
+                 max_concurrent_batches: int = 1):
+        """
+        Initialize the batcher
+
+        Args:
+            predict_batch: Function taking (texts, languages, preprocessed texts or None
+                where not known yet) and returning one result per text
+            max_batch_size: Maximum number of requests combined into one batch
+            max_wait_ms: Maximum time the first request of a batch waits for company
+            stats_window: Number of recent batches/requests kept for percentile stats
+            executor: Object with an async run(fn, *args) method used for the blocking
+                batch call (default: the event loop's default thread pool)
+            max_concurrent_batches: Number of batches allowed to run at the same time
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._pending = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = set()
+
+        # Tuning statistics
+        self.total_batches = 0
+        self.total_requests = 0
+        self.max_batch_seen = 0
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._queue_waits = deque(maxlen=stats_window)
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def queue_depth(self) -> int:
+        """Number of requests waiting to be picked up by the batch worker"""
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """Start the background batch worker on the running event loop"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the batch worker, failing any requests still queued"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        # Let batches already handed to the executor finish
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        while self._pending:
+            _, _, _, future, _ = self._pending.popleft()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+
+    async def submit(self, text: str, language: str = "en",
+                     processed_text: Optional[str] = None) -> dict:
+        """
+        Queue a single text for prediction and wait for its batch to finish
+
+        Args:
+            text: Raw ticket text
+            language: Language of the text (ISO code)
+            processed_text: The text already preprocessed, if the caller has it
+
+        Returns:
+            Prediction result for the text
+        """
+        if not self.running:
+            # Batcher not started (e.g. called outside the app lifecycle)
+            return self.predict_batch([text], [language], [processed_text])[0]
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, language, processed_text, future, time.perf_counter()))
+        self._wakeup.set()
+        return await future
+
+    async def _wait(self, timeout: Optional[float] = None) -> None:
+        """Sleep until a request is submitted or the timeout expires"""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _collect(self) -> list:
+        """Wait for the first request, then gather more until the batch is full or the window closes"""
+        while not self._pending:
+            await self._wait()
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            await self._wait(remaining)
+
+        size = min(len(self._pending), self.max_batch_size)
+        return [self._pending.popleft() for _ in range(size)]
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for a free batch slot before collecting the next batch
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._process(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, batch: list) -> None:
+        started = time.perf_counter()
+
+        texts = [item[0] for item in batch]
+        languages = [item[1] for item in batch]
+        processed_texts = [item[2] for item in batch]
+        self._record(len(batch), [started - item[4] for item in batch])
+
+        try:
+            if self.executor is not None:
+                results = await self.executor.run(self.predict_batch, texts, languages, processed_texts)
+            else:
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(
+                    None, self.predict_batch, texts, languages, processed_texts
+                )
+        except Exception as e:
+            for _, _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        for (_, _, _, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, batch_size: int, waits: List[float]) -> None:
+        self.total_batches += 1
+        self.total_requests += batch_size
+        self.max_batch_seen = max(self.max_batch_seen, batch_size)
+        self._batch_sizes.append(batch_size)
+        self._queue_waits.extend(waits)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Batch-size and queue-wait statistics for tuning the batching window
+
+        Returns:
+            Dictionary with counters and recent percentiles (waits in milliseconds)
+        """
+        sizes = sorted(self._batch_sizes)
+        waits = sorted(w * 1000.0 for w in self._queue_waits)
+
+        def percentile(values, q):
+            if not values:
+                return 0.0
+            return float(values[min(len(values) - 1, int(q * len(values)))])
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "batches_in_flight": len(self._in_flight),
+            "total_batches": self.total_batches,
+            "total_requests": self.total_requests,
+            "queue_depth": self.queue_depth(),
+            "avg_batch_size": (self.total_requests / self.total_batches) if self.total_batches else 0.0,
+            "largest_batch": self.max_batch_seen,
+            "batch_size_p50": percentile(sizes, 0.50),
+            "batch_size_p95": percentile(sizes, 0.95),
+            "queue_wait_ms_p50": percentile(waits, 0.50),
+            "queue_wait_ms_p95": percentile(waits, 0.95),
+            "queue_wait_ms_p99": percentile(waits, 0.99),
+        }
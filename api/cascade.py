@@ -0,0 +1,132 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Set
+
+
+class CascadeClassifier:
+    """
+    Second stage of a model cascade.
+
+    The fast linear model scores every ticket first; refine() sends only the
+    tickets whose best label leads the runner-up by less than the threshold
+    (in calibrated probability, or SVM decision score) to a slower, more
+    accurate model, in batches. Whatever the slow model has not answered by the
+    deadline keeps the linear prediction.
+    """
+
+    def __init__(self, escalation_model, threshold: float = 0.2,
+                 batch_size: int = 16, deadline_ms: float = 500, workers: int = 1):
+        """
+        Initialize the cascade
+
+        Args:
+            escalation_model: Model with predict(texts) -> {'category': [...], 'priority': [...]}
+            threshold: Tickets whose category or priority margin (lead of the best
+                label over the runner-up) is below this are escalated
+            batch_size: Tickets per call to the escalation model
+            deadline_ms: Longest a batch of predictions waits for the escalation model
+            workers: Threads running the escalation model
+        """
+        self.escalation_model = escalation_model
+        self.threshold = threshold
+        self.batch_size = max(1, batch_size)
+        self.deadline = deadline_ms / 1000.0
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cascade")
+        # Batches submitted but not finished (they keep running after a deadline)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.total = 0
+        self.escalated = 0
+        self.refined = 0
+        self.fallbacks = 0
+        self.escalation_batches = 0
+        self.escalation_seconds = 0.0
+
+    def needs_escalation(self, prediction: dict) -> bool:
+        """Check whether the linear model is unsure about a prediction"""
+        margin = prediction.get("margin") or {}
+        return min(margin.get("category", float("inf")), margin.get("priority", float("inf"))) < self.threshold
+
+    def _predict(self, texts: List[str]) -> Dict[str, list]:
+        start = time.perf_counter()
+        try:
+            return self.escalation_model.predict(texts)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.escalation_batches += 1
+                self.escalation_seconds += time.perf_counter() - start
+
+    def refine(self, texts: List[str], predictions: List[dict]) -> Set[int]:
+        """
+        Replace uncertain linear predictions with the escalation model's answers
+
+        Args:
+            texts: Raw ticket texts (the escalation model does its own tokenization)
+            predictions: Linear predictions, updated in place
+
+        Returns:
+            Indices that were escalated but kept the linear prediction (deadline
+            missed, escalation model busy or failing)
+        """
+        uncertain = [i for i, prediction in enumerate(predictions) if self.needs_escalation(prediction)]
+        with self._lock:
+            self.total += len(predictions)
+            self.escalated += len(uncertain)
+        if not uncertain:
+            return set()
+
+        futures = {}
+        for start in range(0, len(uncertain), self.batch_size):
+            with self._lock:
+                # Don't pile up work behind batches that already missed their deadline
+                if self._in_flight >= 2 * self.workers:
+                    break
+                self._in_flight += 1
+            batch = uncertain[start:start + self.batch_size]
+            futures[self._pool.submit(self._predict, [texts[i] for i in batch])] = batch
+        done, _ = wait(futures, timeout=self.deadline) if futures else (set(), set())
+
+        fallbacks = set(uncertain)
+        for future in done:
+            batch = futures[future]
+            try:
+                result = future.result()
+                categories, priorities = result["category"], result["priority"]
+            except Exception as e:
+                print(f"Escalation model failed, keeping linear predictions: {e}")
+                continue
+            for i, category, priority in zip(batch, categories, priorities):
+                predictions[i]["category"] = category
+                predictions[i]["priority"] = priority
+                fallbacks.discard(i)
+
+        with self._lock:
+            self.refined += len(uncertain) - len(fallbacks)
+            self.fallbacks += len(fallbacks)
+        return fallbacks
+
+    def shutdown(self) -> None:
+        """Stop the escalation threads"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, float]:
+        """Escalation counters"""
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "deadline_ms": self.deadline * 1000.0,
+                "total": self.total,
+                "escalated": self.escalated,
+                "escalation_rate": (self.escalated / self.total) if self.total else 0.0,
+                "refined": self.refined,
+                "fallbacks": self.fallbacks,
+                "avg_batch_ms": (
+                    self.escalation_seconds / self.escalation_batches * 1000.0
+                    if self.escalation_batches else None
+                ),
+            }
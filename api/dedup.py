@@ -0,0 +1,302 @@
+import os
+import re
+import time
+import zlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Largest 31-bit prime; the hash permutations are computed modulo this
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, size: int = 3) -> List[int]:
+    """
+    Hashed word n-grams of a (preprocessed) text
+
+    Texts shorter than the shingle size produce a single shingle of all their
+    words, so short tickets can still be matched.
+    """
+    words = re.findall(r"\w+", str(text).lower())
+    if not words:
+        return []
+    grams = (
+        [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+        if len(words) >= size else [" ".join(words)]
+    )
+    # crc32 is stable across processes, unlike hash(), so snapshots stay valid
+    return [zlib.crc32(gram.encode("utf-8")) & _PRIME for gram in set(grams)]
+
+
+class DuplicateIndex:
+    """
+    Near-duplicate ticket index using MinHash signatures and LSH banding.
+
+    Each ticket is reduced to a MinHash signature of its word shingles. The
+    signature is cut into bands; tickets sharing any band land in the same
+    bucket and become candidates, which are then checked against the
+    similarity threshold using the full signatures. A duplicate joins the
+    cluster of the ticket it matched, whose prediction it can reuse. The
+    oldest tickets are dropped once the index is full.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.8,
+                 shingle_size: int = 3, max_entries: int = 100000, seed: int = 42):
+        """
+        Initialize the index
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            bands: Number of LSH bands (num_perm must be divisible by it)
+            threshold: Minimum estimated Jaccard similarity of a duplicate
+            shingle_size: Words per shingle
+            max_entries: Largest number of tickets kept
+            seed: Seed of the hash permutations
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.seed = seed
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+
+        # ticket_id -> entry dict (signature, cluster, prediction, fingerprint, created)
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # One dict per band: band bytes -> ticket ids
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        # Cluster root -> number of tickets in the cluster
+        self._clusters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        # Statistics
+        self.lookups = 0
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None if it has no words"""
+        hashed = shingles(text, self.shingle_size)
+        if not hashed:
+            return None
+        values = np.array(hashed, dtype=np.uint64)
+        # (a * x + b) mod p for every permutation and shingle, minimum per permutation
+        permuted = (np.outer(self._a, values) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def _find(self, signature: np.ndarray, keys: List[bytes]) -> Optional[tuple]:
+        """Most similar indexed ticket above the threshold, as (ticket id, similarity)"""
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best = None
+        for candidate in candidates:
+            similarity = float(np.mean(self._entries[candidate]["signature"] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def query(self, text: str) -> Optional[dict]:
+        """
+        Look up the cluster a text belongs to
+
+        Args:
+            text: Preprocessed ticket text
+
+        Returns:
+            Dictionary with 'duplicate_of' (the cluster's first ticket), 'ticket_id'
+            (the closest ticket), 'similarity', 'prediction' and 'fingerprint',
+            or None if the text has no near-duplicate
+        """
+        signature = self.signature(text)
+        with self._lock:
+            self.lookups += 1
+            if signature is None:
+                return None
+            match = self._find(signature, self._band_keys(signature))
+            if match is None:
+                return None
+            self.duplicates += 1
+            ticket_id, similarity = match
+            entry = self._entries[ticket_id]
+            return {
+                "duplicate_of": entry["cluster"],
+                "ticket_id": ticket_id,
+                "similarity": similarity,
+                "prediction": entry["prediction"],
+                "fingerprint": entry["fingerprint"],
+            }
+
+    def add(self, ticket_id: str, text: str, prediction: dict,
+            fingerprint: Optional[str] = None, duplicate_of: Optional[str] = None) -> bool:
+        """
+        Index a ticket
+
+        Args:
+            ticket_id: Ticket identifier
+            text: Preprocessed ticket text
+            prediction: Category and priority of the ticket
+            fingerprint: Fingerprint of the models that made the prediction
+            duplicate_of: Cluster the ticket belongs to (None starts a new cluster)
+
+        Returns:
+            True if the ticket was indexed
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return False
+        with self._lock:
+            cluster = duplicate_of if duplicate_of in self._clusters else ticket_id
+            self._insert(ticket_id, signature, {
+                "category": prediction.get("category"),
+                "priority": prediction.get("priority"),
+            }, fingerprint, cluster, time.time())
+            self._dirty = True
+        return True
+
+    def _insert(self, ticket_id: str, signature: np.ndarray, prediction: dict,
+                fingerprint: Optional[str], cluster: str, created: float) -> None:
+        if ticket_id in self._entries:
+            self._remove(ticket_id)
+        self._entries[ticket_id] = {
+            "signature": signature,
+            "cluster": cluster,
+            "prediction": prediction,
+            "fingerprint": fingerprint,
+            "created": created,
+        }
+        self._clusters[cluster] = self._clusters.get(cluster, 0) + 1
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(ticket_id)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, ticket_id: str) -> None:
+        entry = self._entries.pop(ticket_id)
+        for band, key in enumerate(self._band_keys(entry["signature"])):
+            bucket = self._buckets[band].get(key)
+            if bucket is None:
+                continue
+            bucket.remove(ticket_id)
+            if not bucket:
+                del self._buckets[band][key]
+
+        # A cluster lives on (under its first ticket's id) while any member is indexed
+        cluster = entry["cluster"]
+        self._clusters[cluster] -= 1
+        if not self._clusters[cluster]:
+            del self._clusters[cluster]
+
+    def cluster_size(self, cluster: str) -> int:
+        """Number of indexed tickets in a cluster"""
+        with self._lock:
+            return self._clusters.get(cluster, 0)
+
+    def largest_clusters(self, limit: int = 5) -> List[dict]:
+        """Clusters with the most tickets, e.g. an incident storm"""
+        with self._lock:
+            clusters = sorted(self._clusters.items(), key=lambda item: -item[1])
+        return [
+            {"duplicate_of": cluster, "tickets": size}
+            for cluster, size in clusters[:limit]
+            if size > 1
+        ]
+
+    def save(self, path: str) -> bool:
+        """
+        Write a snapshot of the index if it changed since the last one
+
+        Args:
+            path: Snapshot file (.npz)
+
+        Returns:
+            True if a snapshot was written
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            ticket_ids = list(self._entries)
+            entries = [self._entries[ticket_id] for ticket_id in ticket_ids]
+            self._dirty = False
+
+        signatures = (
+            np.stack([entry["signature"] for entry in entries])
+            if entries else np.zeros((0, self.num_perm), dtype=np.uint32)
+        )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a partial snapshot
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            params=np.array([self.num_perm, self.bands, self.shingle_size, self.seed]),
+            ticket_ids=np.array(ticket_ids, dtype=str),
+            signatures=signatures,
+            clusters=np.array([entry["cluster"] for entry in entries], dtype=str),
+            categories=np.array([entry["prediction"]["category"] or "" for entry in entries], dtype=str),
+            priorities=np.array([entry["prediction"]["priority"] or "" for entry in entries], dtype=str),
+            fingerprints=np.array([entry["fingerprint"] or "" for entry in entries], dtype=str),
+            created=np.array([entry["created"] for entry in entries], dtype=float),
+        )
+        os.replace(tmp_path, path)
+        return True
+
+    def load(self, path: str) -> int:
+        """
+        Restore the index from a snapshot
+
+        Args:
+            path: Snapshot file written by save()
+
+        Returns:
+            Number of tickets restored (0 if there is no compatible snapshot)
+        """
+        if not os.path.exists(path):
+            return 0
+        with np.load(path) as snapshot:
+            params = [int(value) for value in snapshot["params"]]
+            if params != [self.num_perm, self.bands, self.shingle_size, self.seed]:
+                print(f"Ignoring duplicate index snapshot built with different settings: {path}")
+                return 0
+            rows = zip(
+                snapshot["ticket_ids"], snapshot["signatures"], snapshot["clusters"],
+                snapshot["categories"], snapshot["priorities"], snapshot["fingerprints"],
+                snapshot["created"]
+            )
+            with self._lock:
+                for ticket_id, signature, cluster, category, priority, fingerprint, created in rows:
+                    self._insert(
+                        str(ticket_id), signature.astype(np.uint32),
+                        {"category": str(category) or None, "priority": str(priority) or None},
+                        str(fingerprint) or None, str(cluster), float(created)
+                    )
+                return len(self._entries)
+
+    def stats(self) -> Dict[str, object]:
+        """Index size and lookup counters"""
+        with self._lock:
+            return {
+                "tickets": len(self._entries),
+                "clusters": len(self._clusters),
+                "lookups": self.lookups,
+                "duplicates": self.duplicates,
+                "duplicate_rate": (self.duplicates / self.lookups) if self.lookups else 0.0,
+                "threshold": self.threshold,
+            }
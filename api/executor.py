@@ -0,0 +1,126 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from utils.preprocessor import init_preprocess_worker, preprocess_in_worker, replay_worker_timings
+
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound inference off the asyncio event loop.
+
+    Blocking work goes to a thread pool sized to the machine; NLTK
+    preprocessing, which holds the GIL, can optionally be farmed out to a
+    process pool. The number of jobs in flight is bounded so overload turns
+    into waiting handlers instead of an ever-growing backlog.
+    """
+
+    def __init__(self, threads: Optional[int] = None, processes: int = 0,
+                 max_pending: int = 256, preprocess_chunk_size: int = 64,
+                 on_preprocess: Optional[Callable[[str, int, float], None]] = None):
+        """
+        Initialize the executor
+
+        Args:
+            threads: Inference threads (default: number of CPU cores)
+            processes: Preprocessing worker processes (0 keeps preprocessing in the inference thread)
+            max_pending: Maximum number of jobs queued or running at once
+            preprocess_chunk_size: Texts per process-pool task when preprocessing a batch
+            on_preprocess: Called as on_preprocess(language, texts, seconds) for
+                each pipeline pass a worker process made, e.g. to record latency
+        """
+        self.threads = threads or os.cpu_count() or 1
+        self.processes = max(0, processes)
+        self.max_pending = max(1, max_pending)
+        self.preprocess_chunk_size = max(1, preprocess_chunk_size)
+        self.on_preprocess = on_preprocess
+
+        self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="inference")
+        self._process_pool = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Statistics
+        self.pending = 0
+        self.completed = 0
+        self.peak_pending = 0
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        return self._thread_pool
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.processes and self._process_pool is None:
+            # Spawn rather than fork: the API process already runs threads
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_preprocess_worker
+            )
+        return self._process_pool
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run a blocking function in the inference thread pool
+
+        Waits for a free slot when max_pending jobs are already in flight.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._thread_pool, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def preprocess(self, texts: List[str], languages: List[str],
+                   local_preprocess: Callable[[List[str], List[str]], List[str]]) -> List[str]:
+        """
+        Preprocess a batch, in the process pool when one is configured
+
+        Args:
+            texts: Texts to preprocess
+            languages: Language of each text
+            local_preprocess: Function used when no process pool is configured
+
+        Returns:
+            Preprocessed texts in the original order
+        """
+        pool = self._get_process_pool()
+        if pool is None or not texts:
+            return local_preprocess(texts, languages)
+
+        size = self.preprocess_chunk_size
+        futures = [
+            pool.submit(preprocess_in_worker, texts[start:start + size], languages[start:start + size])
+            for start in range(0, len(texts), size)
+        ]
+        processed = []
+        # Workers can't reach this process's metrics, so their timings are reported here
+        for chunk in replay_worker_timings((future.result() for future in futures), self.on_preprocess):
+            processed.extend(chunk)
+        return processed
+
+    def shutdown(self) -> None:
+        """Stop the worker pools"""
+        self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def stats(self) -> Dict[str, int]:
+        """Executor configuration and queue depth"""
+        return {
+            "threads": self.threads,
+            "processes": self.processes,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+        }
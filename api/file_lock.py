@@ -0,0 +1,66 @@
+import os
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no advisory file locks; every lock is granted
+    fcntl = None
+
+
+def lock_open_file(handle: IO) -> bool:
+    """
+    Take an exclusive lock on an open file without waiting
+
+    Returns:
+        True if the lock was taken (it is held until the file is closed),
+        False if another process holds it
+    """
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def try_lock(path: str) -> Optional[IO]:
+    """
+    Take an exclusive lock on a file without waiting
+
+    The lock belongs to the open file, so it is released when the file is
+    closed or the holding process exits; a crashed holder never leaves a
+    stale lock behind. The holder's PID is written into the file.
+
+    Args:
+        path: Lock file (created if missing)
+
+    Returns:
+        The open lock file (keep it open to hold the lock), or None if another
+        process holds the lock
+    """
+    handle = open(path, "a+", encoding="utf-8")
+    if not lock_open_file(handle):
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+def lock_holder(path: str) -> Optional[str]:
+    """PID recorded in a lock file, if any"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def unlock(handle: Optional[IO]) -> None:
+    """Release a lock taken with try_lock"""
+    if handle is not None:
+        handle.close()
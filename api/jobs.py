@@ -0,0 +1,347 @@
+import os
+import csv
+import json
+import time
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from api.file_lock import try_lock, unlock
+from utils.data_loader import detect_text_column
+from utils.language_detector import AUTO_LANGUAGE
+
+# Supported upload formats, by file extension
+JOB_FORMATS = {'.csv': 'csv', '.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobError(ValueError):
+    """Raised when an uploaded file can't be turned into a job"""
+
+
+class JobManager:
+    """
+    Runs bulk classification jobs over uploaded CSV/JSON/JSONL files.
+
+    Each job lives in its own directory with the input file, a results CSV
+    and a state.json checkpoint. Files are processed in chunks by a small
+    worker pool; after every chunk the results file is synced and the
+    checkpoint updated, so a restarted server resumes where it stopped.
+
+    A process runs a job only while it holds the lock on the job's directory,
+    so API worker processes resuming the same jobs never process one twice.
+    """
+
+    def __init__(self, jobs_dir: str,
+                 predict_batch: Callable[[List[str], List[str]], List[dict]],
+                 workers: int = 1, chunk_size: int = 1000):
+        """
+        Initialize the job manager
+
+        Args:
+            jobs_dir: Directory holding one subdirectory per job
+            predict_batch: Function taking (texts, languages) and returning one prediction per text
+            workers: Number of jobs processed at the same time
+            chunk_size: Rows classified (and checkpointed) at a time
+        """
+        self.jobs_dir = jobs_dir
+        self.predict_batch = predict_batch
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._states: Dict[str, dict] = {}
+        self._stopping = threading.Event()
+
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    # Paths
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _state_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(job_id), "state.json")
+
+    def _lock_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(job_id), "job.lock")
+
+    def results_path(self, job_id: str) -> str:
+        """Path of the results CSV for a job"""
+        return os.path.join(self._job_dir(job_id), "results.csv")
+
+    # State handling
+
+    def _save_state(self, state: dict) -> None:
+        """Atomically replace the job checkpoint"""
+        path = self._state_path(state["job_id"])
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._states[state["job_id"]] = dict(state)
+
+    def get_state(self, job_id: str) -> Optional[dict]:
+        """Current state of a job, or None if it doesn't exist"""
+        with self._lock:
+            state = self._states.get(job_id)
+        if state is not None:
+            return dict(state)
+
+        path = self._state_path(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    # Submission
+
+    def create_job(self, filename: str, source) -> dict:
+        """
+        Store an uploaded file and queue it for processing
+
+        Args:
+            filename: Original file name (its extension selects the format)
+            source: Binary file object with the upload contents
+
+        Returns:
+            Initial job state
+
+        Raises:
+            JobError: If the format is unsupported or no text column is found
+        """
+        extension = os.path.splitext(filename or "")[1].lower()
+        file_format = JOB_FORMATS.get(extension)
+        if file_format is None:
+            raise JobError(f"Unsupported file format: {filename}. Use CSV, JSON or JSONL")
+
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, f"input{extension}")
+        with open(input_path, "wb") as f:
+            for block in iter(lambda: source.read(1 << 20), b""):
+                f.write(block)
+
+        try:
+            columns = self._read_columns(input_path, file_format)
+        except Exception as e:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise JobError(f"Could not read {filename}: {e}")
+
+        # Same column detection as the CLI
+        text_column = detect_text_column(columns)
+        if text_column is None:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise JobError(f"No text field found in the file. Available columns: {', '.join(columns)}")
+
+        state = {
+            "job_id": job_id,
+            "filename": filename,
+            "format": file_format,
+            "input_path": input_path,
+            "text_column": text_column,
+            "has_language": "language" in columns,
+            "status": QUEUED,
+            "rows_done": 0,
+            "total_rows": None,
+            "results_bytes": 0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        self._save_state(state)
+        self._pool.submit(self._run_job, job_id, try_lock(self._lock_path(job_id)))
+        return state
+
+    def resume(self) -> List[str]:
+        """
+        Requeue jobs that were queued or running when the server stopped,
+        skipping those another process has already claimed
+
+        Returns:
+            IDs of the resumed jobs
+        """
+        resumed = []
+        for job_id in sorted(os.listdir(self.jobs_dir)):
+            state = self.get_state(job_id) if os.path.exists(self._state_path(job_id)) else None
+            if state and state["status"] in (QUEUED, RUNNING):
+                claim = try_lock(self._lock_path(job_id))
+                if claim is None:
+                    continue
+                self._pool.submit(self._run_job, job_id, claim)
+                resumed.append(job_id)
+        return resumed
+
+    def shutdown(self) -> None:
+        """Stop after the current chunk of each running job (they resume on restart)"""
+        self._stopping.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    # Processing
+
+    @staticmethod
+    def _read_columns(path: str, file_format: str) -> List[str]:
+        if file_format == "csv":
+            return list(pd.read_csv(path, nrows=0).columns)
+        if file_format == "jsonl":
+            return list(pd.read_json(path, lines=True, nrows=1).columns)
+        return list(pd.read_json(path).columns)
+
+    def _iter_chunks(self, state: dict, skip: int) -> Iterator[pd.DataFrame]:
+        """Yield the input in chunks, starting after the first `skip` rows"""
+        path, file_format = state["input_path"], state["format"]
+        if file_format == "csv":
+            # Skip already processed rows without parsing them (row 0 is the header)
+            yield from pd.read_csv(path, chunksize=self.chunk_size,
+                                   skiprows=range(1, skip + 1))
+        elif file_format == "jsonl":
+            seen = 0
+            for chunk in pd.read_json(path, lines=True, chunksize=self.chunk_size):
+                if seen + len(chunk) <= skip:
+                    seen += len(chunk)
+                    continue
+                yield chunk.iloc[max(0, skip - seen):]
+                seen += len(chunk)
+        else:
+            # A JSON array has to be parsed as a whole
+            df = pd.read_json(path)
+            for start in range(skip, len(df), self.chunk_size):
+                yield df.iloc[start:start + self.chunk_size]
+
+    def _count_rows(self, state: dict) -> int:
+        path, file_format = state["input_path"], state["format"]
+        if file_format == "csv":
+            return sum(len(chunk) for chunk in pd.read_csv(
+                path, usecols=[state["text_column"]], chunksize=100000))
+        if file_format == "jsonl":
+            with open(path, "rb") as f:
+                return sum(1 for line in f if line.strip())
+        return len(pd.read_json(path))
+
+    def _run_job(self, job_id: str, claim) -> None:
+        """Process a job, holding its lock (claim) until done"""
+        if claim is None:
+            # Another process is running the job
+            return
+        try:
+            self._process(job_id)
+        finally:
+            unlock(claim)
+
+    def _process(self, job_id: str) -> None:
+        # Re-read the checkpoint: the job may have finished before it was claimed
+        state = self.get_state(job_id)
+        if state is None or state["status"] in (COMPLETED, FAILED):
+            return
+
+        try:
+            state["status"] = RUNNING
+            state["started_at"] = time.time()
+            state["rows_at_start"] = state["rows_done"]
+            if state["total_rows"] is None:
+                state["total_rows"] = self._count_rows(state)
+            self._save_state(state)
+
+            results_path = self.results_path(job_id)
+            # Drop anything written after the last checkpoint
+            if os.path.exists(results_path):
+                with open(results_path, "r+b") as f:
+                    f.truncate(state["results_bytes"])
+
+            with open(results_path, "a", newline="", encoding="utf-8") as out:
+                writer = None
+                for chunk in self._iter_chunks(state, state["rows_done"]):
+                    if self._stopping.is_set():
+                        return
+
+                    chunk = self._classify_chunk(chunk, state)
+                    if writer is None:
+                        writer = csv.writer(out)
+                        if state["results_bytes"] == 0:
+                            writer.writerow(chunk.columns)
+                    writer.writerows(chunk.itertuples(index=False, name=None))
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                    # Checkpoint only after the results are on disk
+                    state["rows_done"] += len(chunk)
+                    state["results_bytes"] = out.tell()
+                    self._save_state(state)
+
+            state["status"] = COMPLETED
+            state["finished_at"] = time.time()
+            self._save_state(state)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            state["status"] = FAILED
+            state["error"] = str(e)
+            state["finished_at"] = time.time()
+            self._save_state(state)
+
+    def _classify_chunk(self, chunk: pd.DataFrame, state: dict) -> pd.DataFrame:
+        texts = chunk[state["text_column"]].fillna("").astype(str).tolist()
+        if state["has_language"]:
+            languages = chunk["language"].fillna(AUTO_LANGUAGE).astype(str).tolist()
+        else:
+            # Detected by predict_batch
+            languages = [AUTO_LANGUAGE] * len(texts)
+
+        predictions = self.predict_batch(texts, languages)
+
+        chunk = chunk.copy()
+        chunk["predicted_category"] = [p["category"] for p in predictions]
+        chunk["predicted_priority"] = [p["priority"] for p in predictions]
+        return chunk
+
+    # Reporting
+
+    def progress(self, job_id: str) -> Optional[dict]:
+        """
+        Progress report for a job
+
+        Returns:
+            Rows done, throughput and ETA, or None if the job doesn't exist
+        """
+        state = self.get_state(job_id)
+        if state is None:
+            return None
+
+        rows_done = state["rows_done"]
+        total_rows = state["total_rows"]
+        rows_per_sec = None
+        eta_s = None
+
+        if state["started_at"]:
+            end = state["finished_at"] or time.time()
+            elapsed = end - state["started_at"]
+            processed = rows_done - state.get("rows_at_start", 0)
+            if elapsed > 0 and processed > 0:
+                rows_per_sec = processed / elapsed
+                if total_rows is not None and state["status"] == RUNNING:
+                    eta_s = max(0, total_rows - rows_done) / rows_per_sec
+
+        return {
+            "job_id": job_id,
+            "filename": state["filename"],
+            "status": state["status"],
+            "rows_done": rows_done,
+            "total_rows": total_rows,
+            "rows_per_sec": rows_per_sec,
+            "eta_s": eta_s,
+            "error": state["error"],
+        }
@@ -1,9 +1,15 @@
 import os
 import sys
+import json
 import uuid
+import time
+import asyncio
+import threading
+from collections import OrderedDict
 from pathlib import Path
-import pandas as pd
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import random
 from datetime import datetime
@@ -12,8 +18,24 @@ from datetime import datetime
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from utils.model import TicketClassifier
-from utils.transformer_model import TransformerTicketClassifier
-from utils.preprocessor import TextPreprocessor, MultilingualPreprocessor
+from utils.online_model import OnlineTicketModel
+from utils.data_loader import DataLoader, detect_text_column
+from utils.preprocessor import TextPreprocessor, MultilingualPreprocessor, preprocess_by_language
+from utils.language_detector import LanguageDetector, AUTO_LANGUAGE
+from api.batching import MicroBatcher
+from api.executor import InferenceExecutor
+from api.prediction_log import SegmentedLogWriter
+from api.cache import PredictionCache
+from api.streaming import NDJSONStreamingResponse, iter_ndjson
+from api.jobs import JobManager, JobError, COMPLETED
+from api.suggestions import PrefixIndex
+from api.cascade import CascadeClassifier
+from api.dedup import DuplicateIndex
+from api.similarity import SimilarityIndex
+from api.ticket_queue import TicketQueue, QueueError, QueueUnavailable, TicketNotQueued
+from api.analytics import RollingAggregates
+from api.admission import AdmissionController, Overloaded, PRIORITY_RANK, urgency_score
+from api.metrics import MetricsRegistry, MetricsMiddleware, process_memory
 from api.models import (
     TicketRequest, 
     TicketResponse, 
@@ -21,12 +43,17 @@ from api.models import (
     PredictionResponse,
     TicketBatchRequest,
     TicketBatchResponse,
-    ErrorResponse,
     ChatRequest,
     ChatResponse,
-    SuggestionRequest,
     SuggestionResponse,
-    FeedbackRequest
+    SimilarTicketsResponse,
+    QueueTicket,
+    QueueClaimRequest,
+    QueueLeaseRequest,
+    AnalyticsResponse,
+    FeedbackRequest,
+    JobStatusResponse,
+    ModelInfoResponse
 )
 
 # Initialize FastAPI app
@@ -49,20 +76,194 @@ app.add_middleware(
 BASE_DIR = Path(__file__).resolve().parent.parent
 MODEL_DIR = os.path.join(BASE_DIR, "models")
 DATA_DIR = os.path.join(BASE_DIR, "data")
-OUTPUT_FILE = os.path.join(DATA_DIR, "predictions.csv")
-CHAT_LOG_FILE = os.path.join(DATA_DIR, "chat_history.csv")
+PREDICTION_LOG_DIR = os.path.join(DATA_DIR, "predictions")
+CHAT_LOG_DIR = os.path.join(DATA_DIR, "chat_history")
+LEGACY_PREDICTIONS_FILE = os.path.join(DATA_DIR, "predictions.csv")
+LEGACY_CHAT_LOG_FILE = os.path.join(DATA_DIR, "chat_history.csv")
+JOBS_DIR = os.path.join(DATA_DIR, "jobs")
+FEEDBACK_LOG_DIR = os.path.join(DATA_DIR, "feedback")
+DEDUP_INDEX_PATH = os.path.join(DATA_DIR, "dedup", "index.npz")
+QUEUE_DIR = os.path.join(DATA_DIR, "queue")
+ANALYTICS_PATH = os.path.join(DATA_DIR, "analytics", "aggregates.json")
 
-# Initialize preprocessors
+# Tickets classified per micro-batch on the NDJSON streaming endpoint
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "256"))
+
+# Bulk classification jobs: concurrent jobs and rows per checkpoint
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+JOB_CHUNK_SIZE = int(os.environ.get("JOB_CHUNK_SIZE", "1000"))
+
+# Inference executor settings (0 threads means one per CPU core, 0 processes keeps
+# preprocessing in the inference threads)
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", "0"))
+PREPROCESS_PROCESSES = int(os.environ.get("PREPROCESS_PROCESSES", "0"))
+INFERENCE_MAX_PENDING = int(os.environ.get("INFERENCE_MAX_PENDING", "256"))
+
+# Prediction cache settings (size 0 disables the cache)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_S = float(os.environ.get("PREDICTION_CACHE_TTL_S", "3600"))
+
+# Append-only log settings (fsync policy: always, interval or never)
+LOG_FSYNC_POLICY = os.environ.get("LOG_FSYNC_POLICY", "interval")
+LOG_FLUSH_INTERVAL_MS = float(os.environ.get("LOG_FLUSH_INTERVAL_MS", "200"))
+LOG_SEGMENT_MAX_MB = float(os.environ.get("LOG_SEGMENT_MAX_MB", "64"))
+LOG_SEGMENT_MAX_AGE_S = float(os.environ.get("LOG_SEGMENT_MAX_AGE_S", "86400"))
+
+# Memory-map model arrays so several API workers share one copy of the model pages
+# (run.py api --workers N turns this on)
+MODEL_MMAP = os.environ.get("MODEL_MMAP", "0").lower() in ("1", "true", "yes")
+
+# Online learning from chat feedback: mini-batch update interval, examples a head
+# needs before it may override the base model, and the confidence it needs to do so
+ONLINE_LEARNING = os.environ.get("ONLINE_LEARNING", "1").lower() in ("1", "true", "yes")
+ONLINE_UPDATE_INTERVAL_S = float(os.environ.get("ONLINE_UPDATE_INTERVAL_S", "60"))
+ONLINE_MIN_EXAMPLES = int(os.environ.get("ONLINE_MIN_EXAMPLES", "20"))
+ONLINE_CONFIDENCE = float(os.environ.get("ONLINE_CONFIDENCE", "0.7"))
+
+# Recent chat messages kept in memory to join feedback without scanning the chat log
+FEEDBACK_JOIN_CACHE_SIZE = int(os.environ.get("FEEDBACK_JOIN_CACHE_SIZE", "10000"))
+
+# Near-duplicate ticket detection: minimum similarity of a duplicate, tickets kept
+# in the index and seconds between snapshots (threshold 0 disables detection)
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.8"))
+DEDUP_MAX_TICKETS = int(os.environ.get("DEDUP_MAX_TICKETS", "100000"))
+DEDUP_SNAPSHOT_INTERVAL_S = float(os.environ.get("DEDUP_SNAPSHOT_INTERVAL_S", "60"))
+
+# Similar-ticket retrieval: seconds between indexing newly logged tickets, rows
+# buffered before they are merged into the postings, and the largest k allowed
+SIMILAR_UPDATE_INTERVAL_S = float(os.environ.get("SIMILAR_UPDATE_INTERVAL_S", "5"))
+SIMILAR_MERGE_THRESHOLD = int(os.environ.get("SIMILAR_MERGE_THRESHOLD", "1000"))
+SIMILAR_MAX_RESULTS = int(os.environ.get("SIMILAR_MAX_RESULTS", "50"))
+
+# Live ticket queue: whether it runs (one process owns it, so run.py turns it off
+# for multi-worker servers), default lease of a claimed ticket and seconds between
+# snapshots (the write-ahead log covers changes in between)
+LIVE_QUEUE = os.environ.get("LIVE_QUEUE", "1").lower() in ("1", "true", "yes")
+QUEUE_LEASE_S = float(os.environ.get("QUEUE_LEASE_S", "300"))
+QUEUE_SNAPSHOT_INTERVAL_S = float(os.environ.get("QUEUE_SNAPSHOT_INTERVAL_S", "300"))
+
+# Seconds between snapshots of the rolling analytics aggregates
+ANALYTICS_SNAPSHOT_INTERVAL_S = float(os.environ.get("ANALYTICS_SNAPSHOT_INTERVAL_S", "60"))
+
+# Inference mode: 'linear' (TF-IDF models only) or 'cascade' (tickets the linear
+# models are unsure about are escalated to the transformer models in batches),
+# with the cascade's margin threshold (lead of the best label over the runner-up),
+# batch size, deadline and threads
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "linear").lower()
+CASCADE_THRESHOLD = float(os.environ.get("CASCADE_THRESHOLD", "0.2"))
+CASCADE_BATCH_SIZE = int(os.environ.get("CASCADE_BATCH_SIZE", "16"))
+CASCADE_DEADLINE_MS = float(os.environ.get("CASCADE_DEADLINE_MS", "500"))
+CASCADE_WORKERS = int(os.environ.get("CASCADE_WORKERS", "1"))
+
+# Admission control: concurrency limit per route, requests allowed to wait over all
+# routes, and the longest a request may wait for a slot before it is shed with a 503
+ADMISSION_LIMITS = os.environ.get("ADMISSION_LIMITS", "predict=64,tickets=64,batch=4,chat=32")
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "512"))
+ADMISSION_LATENCY_BUDGET_MS = float(os.environ.get("ADMISSION_LATENCY_BUDGET_MS", "2000"))
+
+# Autocomplete: prefixes whose suggestion lists are cached
+SUGGESTION_CACHE_SIZE = int(os.environ.get("SUGGESTION_CACHE_SIZE", "10000"))
+
+# Poll models/ for new artifacts every N seconds and hot-reload them (0 disables)
+MODEL_WATCH_INTERVAL_S = float(os.environ.get("MODEL_WATCH_INTERVAL_S", "0"))
+
+# Sample tickets run through the full pipeline before the API reports ready
+WARMUP_TEXTS = [
+    ("The application crashes every time I try to save a file", "en"),
+    ("Can you add an option to export reports as PDF?", "en"),
+    ("How do I reset my password?", "en"),
+    ("Impossible de me connecter à mon compte depuis la mise à jour", "fr"),
+]
+
+# Micro-batching window for single-ticket predictions
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+
+# Prometheus-style metrics served from /metrics
+metrics = MetricsRegistry()
+REQUEST_COUNT = metrics.counter(
+    "ticket_api_requests_total", "HTTP requests served", ("method", "route", "status")
+)
+REQUEST_LATENCY = metrics.histogram(
+    "ticket_api_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+STAGE_LATENCY = metrics.histogram(
+    "ticket_api_stage_duration_seconds",
+    "Time spent per pipeline stage (detect_language, preprocess, dedup, vectorize, category, priority, escalate, response, persist)",
+    ("stage",)
+)
+ONLINE_OVERRIDES = metrics.counter(
+    "ticket_api_online_overrides_total",
+    "Predictions changed by the online feedback model", ("head",)
+)
+LANGUAGE_PREPROCESS_LATENCY = metrics.histogram(
+    "ticket_api_language_preprocess_seconds",
+    "Time spent preprocessing a text or batch of texts, per language pipeline", ("language",)
+)
+LANGUAGE_PREPROCESS_TEXTS = metrics.counter(
+    "ticket_api_language_preprocessed_texts_total",
+    "Texts preprocessed per language pipeline", ("language",)
+)
+DETECTED_LANGUAGES = metrics.counter(
+    "ticket_api_detected_languages_total",
+    "Texts sent without a language, by detected language", ("language",)
+)
+MODEL_LOAD_SECONDS = metrics.gauge(
+    "ticket_api_model_load_seconds", "Time taken to load (or create) the classifier models"
+)
+
+# Count and time every request per route
+app.add_middleware(MetricsMiddleware, requests=REQUEST_COUNT, latency=REQUEST_LATENCY)
+
+def observe_preprocess(language: str, texts: int, seconds: float) -> None:
+    """Record the latency of a language pipeline"""
+    LANGUAGE_PREPROCESS_LATENCY.observe(seconds, language=language)
+    LANGUAGE_PREPROCESS_TEXTS.inc(texts, language=language)
+
+# Initialize preprocessors; pipelines for languages other than English are
+# built on first use
 text_preprocessor = TextPreprocessor()
-multilingual_preprocessor = MultilingualPreprocessor()
+multilingual_preprocessor = MultilingualPreprocessor(
+    english_preprocessor=text_preprocessor,
+    on_preprocess=observe_preprocess
+)
+
+# Identifies the language of texts sent without one (or with "auto")
+try:
+    language_detector = LanguageDetector.from_datasets(DATA_DIR)
+except Exception as e:
+    print(f"Could not train the language detector, using script detection only: {e}")
+    language_detector = LanguageDetector()
+
+def resolve_languages(texts: list, languages: list) -> list:
+    """Languages of a batch of texts, detecting the missing or 'auto' ones in one pass"""
+    if all(language and language != AUTO_LANGUAGE for language in languages):
+        return languages
+    with STAGE_LATENCY.time(stage="detect_language"):
+        resolved = language_detector.resolve(texts, languages)
+    for given, language in zip(languages, resolved):
+        if given != language:
+            DETECTED_LANGUAGES.inc(language=language)
+    return resolved
+
+def resolve_language(text: str, language: str) -> str:
+    """Language of a text, detected if missing or 'auto'"""
+    return resolve_languages([text], [language])[0]
+
+def resolve_ticket_languages(tickets: list) -> None:
+    """Fill in the detected language of tickets sent without one"""
+    languages = resolve_languages([ticket.text for ticket in tickets], [ticket.language for ticket in tickets])
+    for ticket, language in zip(tickets, languages):
+        ticket.language = language
 
 # Initialize classifier with traditional ML models by default
 classifier = TicketClassifier(MODEL_DIR)
 transformer_available = False
 
 # Try loading traditional models
+load_start = time.perf_counter()
 try:
-    if classifier.load_models():
+    if classifier.load_models(mmap_mode="r" if MODEL_MMAP else None):
         print("Traditional ML models loaded successfully")
     else:
         print("No trained models found. Creating dummy models for testing.")
@@ -71,92 +272,859 @@ except Exception as e:
     print(f"Could not load models: {e}")
     print("Creating dummy models for testing...")
     classifier.create_dummy_models()
+MODEL_LOAD_SECONDS.set(time.perf_counter() - load_start)
+
+# Active model details, updated on every reload
+model_state = {
+    "loaded_at": datetime.now().isoformat(),
+    "load_seconds": time.perf_counter() - load_start,
+    "reloads": 0,
+    "last_error": None
+}
+
+# Append-only prediction and chat logs
+PREDICTION_COLUMNS = [
+    'ticket_id', 'text', 'subject', 'category', 'priority', 
+    'customer_id', 'customer_name', 'product', 'language', 'account_tier'
+]
+CHAT_COLUMNS = [
+    'session_id', 'message_id', 'timestamp', 'user_message',
+    'bot_response', 'category', 'priority', 'language'
+]
+FEEDBACK_COLUMNS = [
+    'message_id', 'session_id', 'timestamp', 'rating', 'comments',
+    'user_message', 'language', 'predicted_category', 'predicted_priority',
+    'corrected_category', 'corrected_priority'
+]
+
+def observe_persist(records: int, seconds: float):
+    """Record the time a log commit took"""
+    STAGE_LATENCY.observe(seconds, stage="persist")
+
+def create_log_writer(log_dir: str, columns: list, prefix: str) -> SegmentedLogWriter:
+    """Create an append-only log writer with the configured policy"""
+    return SegmentedLogWriter(
+        log_dir,
+        columns,
+        prefix=prefix,
+        max_segment_bytes=int(LOG_SEGMENT_MAX_MB * 1024 * 1024),
+        max_segment_age_s=LOG_SEGMENT_MAX_AGE_S,
+        flush_interval_ms=LOG_FLUSH_INTERVAL_MS,
+        fsync=LOG_FSYNC_POLICY,
+        on_commit=observe_persist
+    )
+
+prediction_log = create_log_writer(PREDICTION_LOG_DIR, PREDICTION_COLUMNS, "predictions")
+chat_log = create_log_writer(CHAT_LOG_DIR, CHAT_COLUMNS, "chat_history")
+feedback_log = create_log_writer(FEEDBACK_LOG_DIR, FEEDBACK_COLUMNS, "feedback")
+
+# History kept in the single-file CSV logs of earlier versions becomes the first segment
+for log, legacy_file in ((prediction_log, LEGACY_PREDICTIONS_FILE), (chat_log, LEGACY_CHAT_LOG_FILE)):
+    try:
+        imported = log.import_legacy(legacy_file)
+        if imported:
+            print(f"Imported {imported} records from {legacy_file}")
+    except Exception as e:
+        print(f"Error importing {legacy_file}: {e}")
 
 # Helper function to preprocess text
-def preprocess_text(text: str, language: str = "en") -> str:
-    """Preprocess text for prediction"""
-    if language != "en":
-        # Use multilingual preprocessor for non-English text
-        return multilingual_preprocessor.preprocess(text, language)
-    else:
-        # Use English preprocessor for English text
-        return text_preprocessor.preprocess(text)
+def preprocess_text(text: str, language: str = AUTO_LANGUAGE) -> str:
+    """Preprocess text for prediction with the pipeline of its language"""
+    return multilingual_preprocessor.preprocess(text, resolve_language(text, language))
+
+# Runs CPU-bound inference off the event loop
+inference_executor = InferenceExecutor(
+    threads=INFERENCE_THREADS or None,
+    processes=PREPROCESS_PROCESSES,
+    max_pending=INFERENCE_MAX_PENDING,
+    on_preprocess=observe_preprocess
+)
+
+def preprocess_texts_locally(texts: list, languages: list) -> list:
+    """Preprocess a batch of texts in the current thread"""
+    return preprocess_by_language(texts, languages, multilingual_preprocessor)
+
+# Helper function to preprocess many texts at once
+def preprocess_texts(texts: list, languages: list) -> list:
+    """Preprocess a batch of texts, one pass per language"""
+    languages = resolve_languages(texts, languages)
+    return inference_executor.preprocess(texts, languages, preprocess_texts_locally)
+
+# Cache of predictions keyed by text, language and model fingerprint
+prediction_cache = PredictionCache(
+    max_size=PREDICTION_CACHE_SIZE,
+    ttl_s=PREDICTION_CACHE_TTL_S
+)
+
+def normalize_cache_text(text) -> str:
+    """Cheap normalization (case and whitespace) that never changes the preprocessed result"""
+    return " ".join(str(text).lower().split())
+
+# Online correction model trained incrementally from chat feedback
+def online_labels(model: TicketClassifier) -> tuple:
+    """Category and priority labels of a classifier"""
+    return (
+        [str(label) for label in model.category_encoder.classes_],
+        [str(label) for label in model.priority_encoder.classes_]
+    )
+
+def create_online_model(model: TicketClassifier):
+    """Create an empty online model for a classifier's labels (None if disabled)"""
+    if not ONLINE_LEARNING:
+        return None
+    categories, priorities = online_labels(model)
+    return OnlineTicketModel(
+        categories,
+        priorities,
+        min_examples=ONLINE_MIN_EXAMPLES,
+        confidence_threshold=ONLINE_CONFIDENCE
+    )
+
+online_model = create_online_model(classifier)
+
+def apply_online_model(online: OnlineTicketModel, processed_texts: list, predictions: list):
+    """Override base predictions where the online model is trained and confident"""
+    corrections = online.predict(processed_texts)
+    for head in ("category", "priority"):
+        for prediction, label in zip(predictions, corrections[head]):
+            if label is not None and label != prediction[head]:
+                prediction[head] = label
+                ONLINE_OVERRIDES.inc(head=head)
+
+# Helper function to run the models on preprocessed texts
+def classify_texts(model: TicketClassifier, processed_texts: list) -> list:
+    """Get category and priority predictions for already preprocessed texts"""
+    # Use models for prediction, one vectorized call for the whole batch
+    # (the classifier is language-agnostic, so groups are only needed for preprocessing)
+    timings = {}
+    result = model.predict(processed_texts, timings=timings, return_confidence=True)
+    for stage, seconds in timings.items():
+        STAGE_LATENCY.observe(seconds, stage=stage)
+    categories = result.get('category') or ['unknown'] * len(processed_texts)
+    priorities = result.get('priority') or ['medium'] * len(processed_texts)
+    
+    # Confidence of each label (probability, or softmax of the SVM margins)
+    # and its lead over the runner-up label, which the cascade escalates on
+    category_confidence = result.get('category_confidence') or [0.0] * len(processed_texts)
+    priority_confidence = result.get('priority_confidence') or [0.0] * len(processed_texts)
+    category_margin = result.get('category_margin') or [0.0] * len(processed_texts)
+    priority_margin = result.get('priority_margin') or [0.0] * len(processed_texts)
+    
+    return [
+        {
+            "category": category,
+            "priority": priority,
+            "confidence": {
+                "category": category_score,
+                "priority": priority_score
+            },
+            "margin": {
+                "category": category_lead,
+                "priority": priority_lead
+            }
+        }
+        for category, priority, category_score, priority_score, category_lead, priority_lead in zip(
+            categories, priorities, category_confidence, priority_confidence,
+            category_margin, priority_margin
+        )
+    ]
+
+# Second stage of the cascade, set once the transformer models are loaded
+cascade = None
+
+def create_cascade():
+    """
+    Load the transformer models for cascade mode
+    
+    Returns:
+        CascadeClassifier, or None if cascade mode is off or the models are unavailable
+    """
+    if INFERENCE_MODE != "cascade":
+        return None
+    
+    # Imported here: torch and transformers are slow to import
+    from utils.transformer_model import TransformerTicketClassifier
+    transformer = TransformerTicketClassifier(MODEL_DIR)
+    if not transformer.load_models():
+        print("Transformer models unavailable, cascade disabled (linear models only)")
+        return None
+    # The encoders turn the transformer's label ids back into category/priority names
+    if not transformer.load_encoders():
+        print("Transformer label encoders unavailable, cascade disabled (linear models only)")
+        return None
+    
+    return CascadeClassifier(
+        transformer,
+        threshold=CASCADE_THRESHOLD,
+        batch_size=CASCADE_BATCH_SIZE,
+        deadline_ms=CASCADE_DEADLINE_MS,
+        workers=CASCADE_WORKERS
+    )
+
+def prediction_fingerprint(model: TicketClassifier, online, escalation=None) -> str:
+    """Cache key component identifying the models that produce predictions"""
+    fingerprint = model.fingerprint
+    if escalation is not None:
+        fingerprint += "+cascade"
+    if online is not None:
+        # Online updates change predictions too
+        fingerprint += f"+{online.version}"
+    return fingerprint
+
+# Helper function to get predictions for many texts at once
+def get_predictions_batch(texts: list, languages: list, processed_texts: list = None) -> list:
+    """
+    Get category and priority predictions for a batch of texts (processed_texts
+    holds any already preprocessed forms, None where the text still needs it)
+    """
+    languages = resolve_languages(texts, languages)
+    model = classifier
+    online = online_model
+    escalation = cascade
+    fingerprint = prediction_fingerprint(model, online, escalation)
+    results = [None] * len(texts)
+    
+    # First look up the raw text, which skips preprocessing entirely on a hit
+    raw_keys = [
+        ("raw", normalize_cache_text(text), language, fingerprint)
+        for text, language in zip(texts, languages)
+    ]
+    pending = []
+    for i, key in enumerate(raw_keys):
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+    
+    if pending:
+        # Preprocess the texts the caller hasn't already
+        processed = {}
+        if processed_texts is not None:
+            processed = {i: processed_texts[i] for i in pending if processed_texts[i] is not None}
+        missing = [i for i in pending if i not in processed]
+        if missing:
+            with STAGE_LATENCY.time(stage="preprocess"):
+                processed.update(zip(missing, preprocess_texts(
+                    [texts[i] for i in missing],
+                    [languages[i] for i in missing]
+                )))
+        
+        # Then look up the preprocessed text, which catches different wordings of the same ticket
+        to_classify = {}
+        for i in pending:
+            processed_text = processed[i]
+            # Check if processed text is empty
+            if not processed_text:
+                processed_text = str(texts[i]).lower()  # Fallback to minimally processed text
+            
+            key = ("processed", processed_text, languages[i], fingerprint)
+            cached = prediction_cache.get(key)
+            if cached is not None:
+                results[i] = cached
+                prediction_cache.put(raw_keys[i], cached)
+            else:
+                to_classify.setdefault(key, []).append(i)
+        
+        if to_classify:
+            # Classify each distinct text once
+            keys = list(to_classify)
+            predictions = classify_texts(model, [key[1] for key in keys])
+            
+            # Escalate uncertain tickets (raw text) to the transformer models
+            fallbacks = set()
+            if escalation is not None:
+                with STAGE_LATENCY.time(stage="escalate"):
+                    fallbacks = escalation.refine([texts[to_classify[key][0]] for key in keys], predictions)
+            
+            if online is not None:
+                apply_online_model(online, [key[1] for key in keys], predictions)
+            
+            for n, (key, prediction) in enumerate(zip(keys, predictions)):
+                # Don't cache answers that missed the escalation deadline
+                cacheable = n not in fallbacks
+                if cacheable:
+                    prediction_cache.put(key, prediction)
+                for i in to_classify[key]:
+                    results[i] = prediction
+                    if cacheable:
+                        prediction_cache.put(raw_keys[i], prediction)
+    
+    # Hand out copies so callers can't modify cached entries
+    return [
+        {**result, "confidence": dict(result["confidence"]), "margin": dict(result.get("margin", {}))}
+        for result in results
+    ]
 
 # Helper function to get predictions
-def get_predictions(text: str, language: str = "en") -> dict:
+def get_predictions(text: str, language: str = AUTO_LANGUAGE) -> dict:
     """Get category and priority predictions for text"""
-    # Preprocess text
-    processed_text = preprocess_text(text, language)
+    return get_predictions_batch([text], [language])[0]
+
+# Helper function to classify a batch of ticket requests
+def classify_tickets(tickets: list) -> tuple:
+    """
+    Classify ticket requests in one batch
     
-    # Check if processed text is empty
-    if not processed_text:
-        processed_text = text.lower()  # Fallback to minimally processed text
+    Returns:
+        Tuple of (TicketResponse list, records for the prediction log)
+    """
+    # Generate ticket IDs
+    ticket_ids = [f"T{uuid.uuid4().hex[:6].upper()}" for _ in tickets]
+    resolve_ticket_languages(tickets)
     
-    # Use models for prediction
-    result = classifier.predict([processed_text])
+    # Get predictions for the whole batch
+    predictions = get_predictions_batch(
+        [ticket.text for ticket in tickets],
+        [ticket.language for ticket in tickets]
+    )
     
-    # Extract predictions
-    category = result.get('category', ['unknown'])[0]
-    priority = result.get('priority', ['medium'])[0]
+    # Create responses
+    with STAGE_LATENCY.time(stage="response"):
+        results = [
+            TicketResponse(
+                ticket_id=ticket_id,
+                category=result["category"],
+                priority=result["priority"],
+                text=ticket.text,
+                subject=ticket.subject
+            )
+            for ticket_id, ticket, result in zip(ticket_ids, tickets, predictions)
+        ]
     
-    # Create dummy confidence scores (real confidence would come from the model)
-    confidence = {
-        "category": 0.85,
-        "priority": 0.78
-    }
+    # Prepare data for saving
+    batch_data = [
+        {
+            "ticket_id": ticket_id,
+            "text": ticket.text,
+            "subject": ticket.subject,
+            "category": result["category"],
+            "priority": result["priority"],
+            "customer_id": ticket.customer_id,
+            "customer_name": ticket.customer_name,
+            "product": ticket.product,
+            "language": ticket.language,
+            "account_tier": ticket.account_tier
+        }
+        for ticket_id, ticket, result in zip(ticket_ids, tickets, predictions)
+    ]
     
-    return {
-        "category": category,
-        "priority": priority,
-        "confidence": confidence
+    return results, batch_data
+
+# Orders and limits requests in front of the inference path
+def parse_limits(spec: str) -> dict:
+    """Parse 'route=limit,route=limit' into a dictionary"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            route, limit = item.split("=", 1)
+            limits[route.strip()] = int(limit)
+    return limits
+
+admission = AdmissionController(
+    parse_limits(ADMISSION_LIMITS),
+    max_queue=ADMISSION_MAX_QUEUE,
+    latency_budget_ms=ADMISSION_LATENCY_BUDGET_MS
+)
+
+def pre_score(text: str, language: str = "en") -> float:
+    """
+    Cheap urgency estimate used to order waiting requests: the priority of a
+    cached prediction if there is one, otherwise an urgency keyword pass
+    """
+    key = ("raw", normalize_cache_text(text), language,
+           prediction_fingerprint(classifier, online_model, cascade))
+    cached = prediction_cache.peek(key)
+    if cached is not None:
+        return PRIORITY_RANK.get(cached["priority"], PRIORITY_RANK["medium"])
+    return urgency_score(text)
+
+def pre_score_tickets(tickets: list) -> float:
+    """
+    Detect the languages of a batch of ticket requests and pre-score it: a
+    batch is as urgent as its most urgent ticket
+    """
+    resolve_ticket_languages(tickets)
+    return max((pre_score(ticket.text, ticket.language) for ticket in tickets), default=0)
+
+# Runs bulk classification jobs in the background
+job_manager = JobManager(
+    JOBS_DIR,
+    get_predictions_batch,
+    workers=JOB_WORKERS,
+    chunk_size=JOB_CHUNK_SIZE
+)
+
+# Batches concurrent single-ticket requests into one classifier call
+batcher = MicroBatcher(
+    get_predictions_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    executor=inference_executor,
+    max_concurrent_batches=inference_executor.threads
+)
+
+# Near-duplicate detection
+metrics.counter(
+    "ticket_api_duplicate_lookups_total", "Tickets checked for near-duplicates by result", ("result",),
+    callback=lambda: {
+        "duplicate": duplicate_index.duplicates,
+        "unique": duplicate_index.lookups - duplicate_index.duplicates
     }
+)
+metrics.gauge(
+    "ticket_api_duplicate_index_tickets", "Tickets in the near-duplicate index",
+    callback=lambda: len(duplicate_index)
+)
 
-# Helper function to save predictions to CSV
-def save_prediction_to_csv(ticket_data: dict):
-    """Save prediction to CSV file"""
+# Live ticket queue
+metrics.gauge(
+    "ticket_api_queue_tickets", "Tickets in the live queue by state", ("state",),
+    callback=lambda: {
+        state: ticket_queue.stats()[state] for state in ("open", "claimed")
+    }
+)
+metrics.counter(
+    "ticket_api_queue_expired_leases_total", "Claimed tickets requeued because their lease lapsed",
+    callback=lambda: ticket_queue.expired
+)
+
+# Cascade escalations
+metrics.counter(
+    "ticket_api_cascade_tickets_total", "Tickets seen by the cascade by outcome", ("outcome",),
+    callback=lambda: {
+        "linear": cascade.total - cascade.escalated,
+        "escalated": cascade.refined,
+        "fallback": cascade.fallbacks
+    } if cascade is not None else None
+)
+metrics.gauge(
+    "ticket_api_cascade_escalation_rate", "Share of tickets escalated to the transformer models",
+    callback=lambda: cascade.stats()["escalation_rate"] if cascade is not None else None
+)
+
+# Admission control state per route
+metrics.gauge(
+    "ticket_api_admission_queue_depth", "Requests waiting for an inference slot", ("route",),
+    callback=lambda: {route: stats["queued"] for route, stats in admission.stats().items()}
+)
+metrics.gauge(
+    "ticket_api_admission_running", "Requests holding an inference slot", ("route",),
+    callback=lambda: {route: stats["running"] for route, stats in admission.stats().items()}
+)
+metrics.counter(
+    "ticket_api_requests_shed_total", "Requests rejected with 503 by admission control",
+    ("route", "reason"),
+    callback=lambda: {
+        (route, reason): count
+        for route, stats in admission.stats().items()
+        for reason, count in stats["shed"].items()
+    }
+)
+
+# Queue depths, cache counters and batch sizes read at scrape time
+metrics.gauge(
+    "ticket_api_queue_depth", "Items waiting in each internal queue", ("queue",),
+    callback=lambda: {
+        "batcher": batcher.queue_depth(),
+        "executor": inference_executor.pending,
+        "prediction_log": prediction_log.pending(),
+        "chat_log": chat_log.pending()
+    }
+)
+metrics.counter(
+    "ticket_api_prediction_cache_lookups_total", "Prediction cache lookups by result", ("result",),
+    callback=lambda: {"hit": prediction_cache.hits, "miss": prediction_cache.misses}
+)
+metrics.gauge(
+    "ticket_api_model_info", "Fingerprint of the active classifier (always 1)", ("fingerprint",),
+    callback=lambda: {classifier.fingerprint: 1}
+)
+metrics.gauge(
+    "ticket_api_process_memory_bytes", "Resident memory of this worker by page type", ("type",),
+    callback=process_memory
+)
+metrics.gauge(
+    "ticket_api_prediction_cache_hit_ratio", "Share of prediction cache lookups that hit",
+    callback=lambda: prediction_cache.stats()["hit_rate"]
+)
+metrics.gauge(
+    "ticket_api_prediction_cache_size", "Entries in the prediction cache",
+    callback=lambda: len(prediction_cache)
+)
+metrics.gauge(
+    "ticket_api_online_model_version", "Mini-batch updates applied to the online feedback model",
+    callback=lambda: online_model.version if online_model is not None else None
+)
+metrics.gauge(
+    "ticket_api_online_model_pending", "Feedback examples waiting for the next online update",
+    callback=lambda: online_model.pending() if online_model is not None else None
+)
+
+def batch_size_quantiles() -> dict:
+    """Recent micro-batch size percentiles, keyed by quantile"""
+    stats = batcher.stats()
+    return {"0.5": stats["batch_size_p50"], "0.95": stats["batch_size_p95"]}
+
+metrics.gauge(
+    "ticket_api_batch_size", "Recent micro-batch size percentiles", ("quantile",),
+    callback=batch_size_quantiles
+)
+
+# Suggestions shown before there is any history, and when nothing matches
+DEFAULT_SUGGESTIONS = [
+    "How do I reset my password?",
+    "How can I update my software?",
+    "How to export data to PDF?",
+    "How do I fix network connection issues?",
+    "Why is my application running slowly?",
+    "Why am I getting error code 404?",
+    "Why can't I login to my account?",
+    "Why does my screen freeze during video calls?",
+    "What are the system requirements?",
+    "What version am I running?",
+    "What's the status of my ticket?",
+    "What does this error message mean?",
+    "Is there a mobile version available?",
+    "Is my data being backed up?",
+    "Is two-factor authentication supported?",
+    "Is my license expired?",
+    "Can I recover deleted files?",
+    "Can I use the software offline?",
+    "Can I transfer my license to another device?",
+    "Can I customize the dashboard?"
+]
+GENERAL_SUGGESTIONS = [
+    "Help with login issues",
+    "Software crashes frequently",
+    "Feature request",
+    "Can't connect to server",
+    "How to export data"
+]
+
+# Autocomplete index over ticket subjects/texts and chat messages
+suggestion_index = PrefixIndex(cache_size=SUGGESTION_CACHE_SIZE)
+
+def ticket_phrases(records) -> list:
+    """Phrases to index for ticket records: the subject, or the text if there is none"""
+    return [record.get("subject") or record.get("text") for record in records]
+
+def build_suggestion_index():
+    """Seed the autocomplete index from the datasets, the prediction and chat logs and the defaults"""
+    start = time.perf_counter()
+    suggestion_index.insert_many(DEFAULT_SUGGESTIONS + GENERAL_SUGGESTIONS)
+    
+    # Historical tickets
+    for df in DataLoader(DATA_DIR).load_all_datasets().values():
+        records = df.where(df.notna(), None).to_dict("records")
+        suggestion_index.insert_many(ticket_phrases(records))
+    suggestion_index.insert_many(ticket_phrases(prediction_log.iter_records()))
+    
+    # Chat history
+    suggestion_index.insert_many(
+        record.get("user_message") for record in chat_log.iter_records()
+    )
+    
+    print(f"Suggestion index built with {len(suggestion_index)} phrases "
+          f"in {time.perf_counter() - start:.2f}s")
+
+# Helper function to save predictions to the prediction log
+def save_predictions_to_csv(records: list):
+    """Append a batch of predictions to the prediction log"""
     try:
-        # Create or load existing predictions CSV
-        if os.path.exists(OUTPUT_FILE):
-            predictions_df = pd.read_csv(OUTPUT_FILE)
-        else:
-            predictions_df = pd.DataFrame(columns=[
-                'ticket_id', 'text', 'subject', 'category', 'priority', 
-                'customer_id', 'customer_name', 'product', 'language'
-            ])
-        
-        # Append new prediction
-        new_row = pd.DataFrame([ticket_data])
-        predictions_df = pd.concat([predictions_df, new_row], ignore_index=True)
-        
-        # Save to CSV
-        predictions_df.to_csv(OUTPUT_FILE, index=False)
+        prediction_log.append_many(records)
     except Exception as e:
         print(f"Error saving prediction to CSV: {e}")
+    
+    # Dashboards read these counts instead of scanning the log
+    analytics.record(records)
+    
+    # New tickets become suggestions right away, and similar-ticket results shortly after
+    suggestion_index.insert_many(ticket_phrases(records))
+    queue_similar_tickets(records)
+    
+    # Open tickets wait in the live queue for an agent (if this process owns it)
+    try:
+        if ticket_queue.owner:
+            ticket_queue.push_many([queue_ticket(record) for record in records])
+    except Exception as e:
+        print(f"Error queueing tickets: {e}")
+
+def save_prediction_to_csv(ticket_data: dict):
+    """Append a prediction to the prediction log"""
+    save_predictions_to_csv([ticket_data])
 
-# Helper function to save chat history to CSV
+# Helper function to save chat history to the chat log
 def save_chat_to_csv(chat_data: dict):
-    """Save chat interaction to CSV file"""
+    """Append a chat interaction to the chat log"""
     try:
-        # Create or load existing chat history CSV
-        if os.path.exists(CHAT_LOG_FILE):
-            chat_df = pd.read_csv(CHAT_LOG_FILE)
-        else:
-            chat_df = pd.DataFrame(columns=[
-                'session_id', 'message_id', 'timestamp', 'user_message',
-                'bot_response', 'category', 'priority', 'language'
-            ])
+        chat_log.append(chat_data)
+    except Exception as e:
+        print(f"Error saving chat to CSV: {e}")
+    
+    analytics.record([chat_data])
+    suggestion_index.insert(chat_data["user_message"])
+
+# Prediction counts per minute, hour and day for the admin dashboard
+analytics = RollingAggregates()
+
+def save_analytics():
+    """Snapshot the analytics aggregates if they changed"""
+    try:
+        analytics.save(ANALYTICS_PATH)
+    except Exception as e:
+        print(f"Error saving analytics: {e}")
+
+# Near-duplicate index over submitted tickets, for incident storms
+duplicate_index = DuplicateIndex(threshold=DEDUP_THRESHOLD, max_entries=DEDUP_MAX_TICKETS)
+
+async def find_duplicate(text: str, language: str):
+    """
+    Look up a new ticket in the near-duplicate index
+    
+    Returns:
+        (preprocessed text, match dictionary or None)
+    """
+    processed_text = (await inference_executor.run(preprocess_texts, [text], [language]))[0]
+    if not processed_text:
+        processed_text = str(text).lower()
+    with STAGE_LATENCY.time(stage="dedup"):
+        match = duplicate_index.query(processed_text)
+    return processed_text, match
+
+def save_duplicate_index():
+    """Snapshot the near-duplicate index if it changed"""
+    try:
+        if duplicate_index.save(DEDUP_INDEX_PATH):
+            print(f"Saved duplicate index with {len(duplicate_index)} tickets")
+    except Exception as e:
+        print(f"Error saving duplicate index: {e}")
+
+# Similar-ticket index over the datasets and logged predictions, built at startup
+# (until then it has no model fingerprint and queries are refused)
+similarity_index = SimilarityIndex()
+similarity_build_lock = threading.Lock()
+
+# Logged tickets waiting to be indexed
+similarity_pending = []
+similarity_pending_lock = threading.Lock()
+
+def similarity_record(record: dict, text_column: str, source: str) -> dict:
+    """Fields of a ticket returned by the similar-ticket endpoints"""
+    return {
+        "ticket_id": str(record.get("ticket_id") or ""),
+        "text": str(record.get(text_column) or ""),
+        "subject": record.get("subject") or None,
+        "category": record.get("category") or None,
+        "priority": record.get("priority") or None,
+        "language": record.get("language") or "en",
+        "source": source
+    }
+
+def index_similar_tickets(index: SimilarityIndex, model: TicketClassifier, records: list) -> int:
+    """Preprocess, vectorize and add ticket records to a similarity index"""
+    records = [record for record in records if record["text"]]
+    if not records or index.fingerprint != model.fingerprint:
+        return 0
+    processed_texts = preprocess_texts_locally(
+        [record["text"] for record in records],
+        [record["language"] for record in records]
+    )
+    return index.add(records, model.vectorize(processed_texts))
+
+def build_similarity_index():
+    """Index the datasets in data/ and the prediction log with the current model"""
+    global similarity_index
+    with similarity_build_lock:
+        start = time.perf_counter()
+        model = classifier
+        records = []
         
-        # Append new chat
-        new_row = pd.DataFrame([chat_data])
-        chat_df = pd.concat([chat_df, new_row], ignore_index=True)
+        # Historical tickets
+        loader = DataLoader(DATA_DIR)
+        for filename in sorted(os.listdir(DATA_DIR)):
+            if not filename.endswith(".csv"):
+                continue
+            try:
+                df = loader.load_csv(filename)
+            except Exception as e:
+                print(f"Error loading {filename}: {e}")
+                continue
+            text_column = detect_text_column(df.columns)
+            if text_column is None:
+                continue
+            df = df.where(df.notna(), None)
+            records.extend(
+                similarity_record(record, text_column, filename)
+                for record in df.to_dict("records")
+            )
         
-        # Save to CSV
-        chat_df.to_csv(CHAT_LOG_FILE, index=False)
+        # Tickets submitted through the API
+        records.extend(
+            similarity_record(record, "text", "predictions")
+            for record in prediction_log.iter_records(include_pending=True)
+        )
+        
+        # One bulk add builds the postings in a single pass
+        index = SimilarityIndex(model.fingerprint, merge_threshold=SIMILAR_MERGE_THRESHOLD)
+        index_similar_tickets(index, model, records)
+        similarity_index = index
+        print(f"Similarity index built with {len(index)} tickets "
+              f"in {time.perf_counter() - start:.2f}s")
+
+def queue_similar_tickets(records: list):
+    """Queue logged tickets for the similarity index"""
+    with similarity_pending_lock:
+        similarity_pending.extend(
+            similarity_record(record, "text", "predictions") for record in records
+        )
+
+def update_similarity_index() -> int:
+    """Index the queued tickets in one batch"""
+    global similarity_pending
+    with similarity_pending_lock:
+        records, similarity_pending = similarity_pending, []
+    return index_similar_tickets(similarity_index, classifier, records)
+
+def similar_tickets(vector, k: int, exclude: str = None) -> list:
+    """Top-k similar tickets in the response format"""
+    return [
+        dict(record, score=score)
+        for record, score in similarity_index.search(vector, k=min(k, SIMILAR_MAX_RESULTS), exclude=exclude)
+    ]
+
+def similarity_model() -> TicketClassifier:
+    """Classifier matching the similarity index (503 while the index is being built)"""
+    model = classifier
+    if similarity_index.fingerprint != model.fingerprint:
+        raise HTTPException(status_code=503, detail="Similarity index is being built, try again shortly")
+    return model
+
+# Live queue of open tickets for agents
+ticket_queue = TicketQueue(QUEUE_DIR, lease_seconds=QUEUE_LEASE_S, fsync=LOG_FSYNC_POLICY == "always")
+
+QUEUE_FIELDS = [
+    'ticket_id', 'text', 'subject', 'category', 'priority', 'account_tier',
+    'customer_id', 'product', 'language'
+]
+
+def queue_ticket(record: dict) -> dict:
+    """Fields of a logged ticket kept in the live queue"""
+    return {field: record.get(field) for field in QUEUE_FIELDS}
+
+def snapshot_ticket_queue():
+    """Snapshot the live queue and drop the log segments it covers"""
+    try:
+        start = time.perf_counter()
+        if ticket_queue.snapshot():
+            print(f"Saved queue snapshot with {len(ticket_queue)} tickets "
+                  f"in {time.perf_counter() - start:.2f}s")
     except Exception as e:
-        print(f"Error saving chat to CSV: {e}")
+        print(f"Error saving queue snapshot: {e}")
+
+# Recent chat records by message ID, for joining feedback
+recent_chats = OrderedDict()
+recent_chats_lock = threading.Lock()
+
+def remember_chat(chat_data: dict):
+    """Keep a chat record in memory for joining feedback"""
+    with recent_chats_lock:
+        recent_chats[chat_data["message_id"]] = chat_data
+        while len(recent_chats) > FEEDBACK_JOIN_CACHE_SIZE:
+            recent_chats.popitem(last=False)
+
+def find_chat(message_id: str):
+    """
+    Look up the logged chat record of a message
+    
+    Returns:
+        The chat record, or None if the message is unknown
+    """
+    with recent_chats_lock:
+        chat = recent_chats.get(message_id)
+    if chat is not None:
+        return chat
+    
+    # Older messages: scan the chat log
+    for record in chat_log.iter_records(include_pending=True):
+        if record.get("message_id") == message_id:
+            return record
+    return None
+
+def feedback_labels(feedback: dict) -> tuple:
+    """
+    Training labels implied by a feedback record
+    
+    Explicit corrections are used as given; a rating of 4 or 5 confirms the
+    predicted labels that were not corrected.
+    
+    Returns:
+        Tuple of (category, priority), either of which may be None
+    """
+    try:
+        confirmed = int(float(feedback.get("rating") or 0)) >= 4
+    except ValueError:
+        confirmed = False
+    
+    category = feedback.get("corrected_category") or (
+        feedback.get("predicted_category") if confirmed else None
+    )
+    priority = feedback.get("corrected_priority") or (
+        feedback.get("predicted_priority") if confirmed else None
+    )
+    return category or None, priority or None
+
+def learn_from_feedback(online: OnlineTicketModel, records: list) -> int:
+    """
+    Queue labelled feedback records for the next online update
+    
+    Returns:
+        Number of examples queued
+    """
+    examples = []
+    for record in records:
+        category, priority = feedback_labels(record)
+        if record.get("user_message") and (category or priority):
+            examples.append((record, category, priority))
+    if not examples:
+        return 0
+    
+    processed_texts = preprocess_texts(
+        [record["user_message"] for record, _, _ in examples],
+        [record.get("language") or "en" for record, _, _ in examples]
+    )
+    return sum(
+        online.add(processed_text, category, priority)
+        for processed_text, (_, category, priority) in zip(processed_texts, examples)
+    )
+
+def replay_feedback(online: OnlineTicketModel) -> int:
+    """
+    Train an online model on all feedback logged so far
+    
+    Returns:
+        Number of examples learned
+    """
+    learn_from_feedback(online, list(feedback_log.iter_records(include_pending=True)))
+    return online.update()
+
+# Helper function to save feedback to the feedback log
+def save_feedback(feedback_data: dict):
+    """Append feedback to the feedback log and queue it for online learning"""
+    try:
+        feedback_log.append(feedback_data)
+    except Exception as e:
+        print(f"Error saving feedback: {e}")
+    
+    online = online_model
+    if online is not None:
+        try:
+            learn_from_feedback(online, [feedback_data])
+        except Exception as e:
+            print(f"Error queueing feedback for online learning: {e}")
 
 # Generate chat response based on user message and model predictions
-def generate_chat_response(message: str, language: str = "en") -> dict:
+def generate_chat_response(message: str, language: str = AUTO_LANGUAGE) -> dict:
     """Generate chat response using the model predictions"""
     # Get category and priority predictions
     predictions = get_predictions(message, language)
@@ -229,6 +1197,378 @@ def generate_chat_response(message: str, language: str = "en") -> dict:
         "create_ticket": create_ticket
     }
 
+# Set once the warm-up predictions have run
+warmup_state = {"ready": False, "seconds": None, "error": None}
+
+def warm_up():
+    """
+    Run a few predictions through preprocessing and both models so lazily
+    loaded NLTK corpora, vectorizers and thread pools are initialized before
+    real traffic arrives
+    """
+    start = time.perf_counter()
+    try:
+        texts = [text for text, _ in WARMUP_TEXTS]
+        languages = [language for _, language in WARMUP_TEXTS]
+        # Bypass the prediction cache so every warm-up text reaches the models
+        classify_texts(classifier, preprocess_texts(texts, languages))
+    except Exception as e:
+        warmup_state["error"] = str(e)
+        print(f"Warm-up failed: {e}")
+    warmup_state["seconds"] = time.perf_counter() - start
+    warmup_state["ready"] = True
+    print(f"Warm-up finished in {warmup_state['seconds']:.2f}s")
+
+# Only one reload may load a candidate model at a time
+model_reload_lock = threading.Lock()
+
+def model_info() -> dict:
+    """Details of the active classifier"""
+    return {
+        "fingerprint": classifier.fingerprint,
+        "shared_features": classifier.shared_features,
+        "watching": MODEL_WATCH_INTERVAL_S > 0,
+        **model_state
+    }
+
+def reload_model() -> dict:
+    """
+    Load the artifacts in models/ into a new classifier, validate it with a
+    smoke prediction and swap it in
+    
+    Requests already running keep the classifier they started with; requests
+    arriving after the swap use the new one. On failure the active model is kept.
+    
+    Returns:
+        Details of the new active model
+    """
+    global classifier, online_model
+    with model_reload_lock:
+        start = time.perf_counter()
+        try:
+            candidate = TicketClassifier(MODEL_DIR)
+            if not candidate.load_models(mmap_mode="r" if MODEL_MMAP else None):
+                raise ValueError(f"Could not load models from {MODEL_DIR}")
+            
+            # Smoke prediction through the full pipeline
+            texts = [text for text, _ in WARMUP_TEXTS]
+            languages = [language for _, language in WARMUP_TEXTS]
+            predictions = classify_texts(candidate, preprocess_texts(texts, languages))
+            if len(predictions) != len(texts) or not all(
+                p["category"] and p["priority"] for p in predictions
+            ):
+                raise ValueError("Smoke prediction returned incomplete results")
+        except Exception as e:
+            model_state["last_error"] = str(e)
+            print(f"Model reload failed, keeping model {classifier.fingerprint}: {e}")
+            raise
+        
+        # Retrain the online model from the feedback log if the labels changed
+        online = online_model
+        if online is not None and not online.matches(*online_labels(candidate)):
+            online = create_online_model(candidate)
+            replay_feedback(online)
+        
+        seconds = time.perf_counter() - start
+        previous = classifier.fingerprint
+        # Rebinding the globals is atomic; cached predictions are keyed by
+        # fingerprint, so entries of the old model are simply no longer hit
+        classifier = candidate
+        online_model = online
+        model_state.update({
+            "loaded_at": datetime.now().isoformat(),
+            "load_seconds": seconds,
+            "reloads": model_state["reloads"] + 1,
+            "last_error": None
+        })
+        MODEL_LOAD_SECONDS.set(seconds)
+        print(f"Model reloaded in {seconds:.2f}s: {previous} -> {candidate.fingerprint}")
+        
+        # Vectors of the new model live in a different feature space
+        threading.Thread(target=build_similarity_index, daemon=True).start()
+        return model_info()
+
+def artifact_signature() -> tuple:
+    """Modification time and size of each model artifact on disk"""
+    signature = []
+    for path in classifier.artifact_paths():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+async def watch_models():
+    """Reload the models once new artifacts have been written and stopped changing"""
+    last_signature = artifact_signature()
+    changed_signature = None
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL_S)
+        signature = artifact_signature()
+        if signature == last_signature:
+            changed_signature = None
+            continue
+        if signature != changed_signature:
+            # Training writes several files; wait until they stop changing
+            changed_signature = signature
+            continue
+        
+        last_signature = signature
+        changed_signature = None
+        try:
+            # A separate thread keeps the inference pool free while loading
+            await asyncio.to_thread(reload_model)
+        except Exception:
+            pass  # Already logged, the old model stays active
+
+@app.on_event("startup")
+def report_memory():
+    """Log this worker's memory use, to check how much model memory is shared"""
+    usage = process_memory()
+    if usage:
+        mb = {name: value / (1024 * 1024) for name, value in usage.items()}
+        print(
+            f"Worker {os.getpid()}: RSS {mb.get('rss', 0):.1f} MB "
+            f"(private {mb.get('anon', 0):.1f} MB, file-backed {mb.get('file', 0):.1f} MB, "
+            f"model mmap {'on' if MODEL_MMAP else 'off'})"
+        )
+
+@app.on_event("startup")
+async def start_cascade():
+    """Load the transformer models in the background when running in cascade mode"""
+    global cascade
+    if INFERENCE_MODE == "cascade":
+        try:
+            cascade = await asyncio.to_thread(create_cascade)
+            if cascade is not None:
+                print(f"Cascade mode: escalating tickets whose best label leads by less than {CASCADE_THRESHOLD:.2f}")
+        except Exception as e:
+            print(f"Could not start cascade mode: {e}")
+
+@app.on_event("shutdown")
+def stop_cascade():
+    """Stop the escalation threads"""
+    if cascade is not None:
+        cascade.shutdown()
+
+@app.on_event("startup")
+async def start_suggestion_index():
+    """Build the autocomplete index"""
+    try:
+        await asyncio.to_thread(build_suggestion_index)
+    except Exception as e:
+        print(f"Error building suggestion index: {e}")
+
+async def run_similarity_index():
+    """Build the similarity index, then index logged tickets periodically"""
+    try:
+        await asyncio.to_thread(build_similarity_index)
+    except Exception as e:
+        print(f"Error building similarity index: {e}")
+    
+    while True:
+        await asyncio.sleep(SIMILAR_UPDATE_INTERVAL_S)
+        try:
+            await asyncio.to_thread(update_similarity_index)
+        except Exception as e:
+            print(f"Error updating similarity index: {e}")
+
+@app.on_event("startup")
+async def start_similarity_index():
+    """Build and maintain the similar-ticket index in the background"""
+    app.state.similarity_index = asyncio.create_task(run_similarity_index())
+
+@app.on_event("shutdown")
+async def stop_similarity_index():
+    """Stop maintaining the similar-ticket index"""
+    task = getattr(app.state, "similarity_index", None)
+    if task is not None:
+        task.cancel()
+
+async def run_queue_snapshots():
+    """Periodically snapshot the live queue"""
+    while True:
+        await asyncio.sleep(QUEUE_SNAPSHOT_INTERVAL_S)
+        await asyncio.to_thread(snapshot_ticket_queue)
+
+@app.on_event("startup")
+async def start_ticket_queue():
+    """Take ownership of the live queue and recover it from its snapshot and write-ahead log"""
+    if not LIVE_QUEUE:
+        print("Live queue disabled")
+        return
+    try:
+        start = time.perf_counter()
+        recovered = await asyncio.to_thread(ticket_queue.recover)
+        if recovered:
+            print(f"Queue recovered with {recovered} tickets in {time.perf_counter() - start:.2f}s")
+    except QueueUnavailable as e:
+        print(f"Live queue unavailable in this process: {e}")
+        return
+    except Exception as e:
+        print(f"Error recovering queue: {e}")
+    if QUEUE_SNAPSHOT_INTERVAL_S > 0:
+        app.state.queue_snapshots = asyncio.create_task(run_queue_snapshots())
+
+@app.on_event("shutdown")
+def stop_ticket_queue():
+    """Stop the snapshot loop, write a final snapshot and close the log"""
+    task = getattr(app.state, "queue_snapshots", None)
+    if task is not None:
+        task.cancel()
+    snapshot_ticket_queue()
+    ticket_queue.close()
+
+async def run_analytics_snapshots():
+    """Periodically snapshot the analytics aggregates"""
+    while True:
+        await asyncio.sleep(ANALYTICS_SNAPSHOT_INTERVAL_S)
+        await asyncio.to_thread(save_analytics)
+
+@app.on_event("startup")
+async def start_analytics():
+    """Restore the analytics aggregates from their snapshot"""
+    try:
+        restored = await asyncio.to_thread(analytics.load, ANALYTICS_PATH)
+        if restored:
+            print(f"Analytics restored with {restored} buckets")
+    except Exception as e:
+        print(f"Error loading analytics: {e}")
+    if ANALYTICS_SNAPSHOT_INTERVAL_S > 0:
+        app.state.analytics_snapshots = asyncio.create_task(run_analytics_snapshots())
+
+@app.on_event("shutdown")
+def stop_analytics():
+    """Stop the snapshot loop and write a final snapshot"""
+    task = getattr(app.state, "analytics_snapshots", None)
+    if task is not None:
+        task.cancel()
+    save_analytics()
+
+async def snapshot_duplicate_index():
+    """Periodically snapshot the near-duplicate index"""
+    while True:
+        await asyncio.sleep(DEDUP_SNAPSHOT_INTERVAL_S)
+        await asyncio.to_thread(save_duplicate_index)
+
+@app.on_event("startup")
+async def start_duplicate_index():
+    """Restore the near-duplicate index from its snapshot"""
+    if DEDUP_THRESHOLD <= 0:
+        return
+    try:
+        restored = await asyncio.to_thread(duplicate_index.load, DEDUP_INDEX_PATH)
+        if restored:
+            print(f"Duplicate index restored with {restored} tickets")
+    except Exception as e:
+        print(f"Error loading duplicate index: {e}")
+    if DEDUP_SNAPSHOT_INTERVAL_S > 0:
+        app.state.dedup_snapshots = asyncio.create_task(snapshot_duplicate_index())
+
+@app.on_event("shutdown")
+def stop_duplicate_index():
+    """Stop the snapshot loop and write a final snapshot"""
+    task = getattr(app.state, "dedup_snapshots", None)
+    if task is not None:
+        task.cancel()
+    if DEDUP_THRESHOLD > 0:
+        save_duplicate_index()
+
+@app.on_event("startup")
+async def start_batcher():
+    """Start the micro-batching worker"""
+    await batcher.start()
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Warm up in the background; /api/ready reports when it is done"""
+    app.state.warmup_task = asyncio.create_task(inference_executor.run(warm_up))
+
+@app.on_event("startup")
+def resume_jobs():
+    """Pick up bulk jobs interrupted by the last shutdown"""
+    resumed = job_manager.resume()
+    if resumed:
+        print(f"Resuming {len(resumed)} bulk classification job(s)")
+
+async def run_online_learning():
+    """Replay logged feedback, then apply new feedback in periodic mini-batches"""
+    try:
+        learned = await asyncio.to_thread(replay_feedback, online_model)
+        if learned:
+            print(f"Online model trained on {learned} logged feedback example(s)")
+    except Exception as e:
+        print(f"Error replaying feedback: {e}")
+    
+    while True:
+        await asyncio.sleep(ONLINE_UPDATE_INTERVAL_S)
+        online = online_model
+        if online is None or not online.pending():
+            continue
+        try:
+            applied = await asyncio.to_thread(online.update)
+            print(f"Online model updated with {applied} feedback example(s), version {online.version}")
+        except Exception as e:
+            print(f"Error updating online model: {e}")
+
+@app.on_event("startup")
+async def start_online_learning():
+    """Start the online learning loop if enabled"""
+    if online_model is not None:
+        app.state.online_learning = asyncio.create_task(run_online_learning())
+
+@app.on_event("shutdown")
+async def stop_online_learning():
+    """Stop the online learning loop (queued feedback is replayed from the log on restart)"""
+    task = getattr(app.state, "online_learning", None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("startup")
+async def start_model_watcher():
+    """Watch models/ for new artifacts if enabled"""
+    if MODEL_WATCH_INTERVAL_S > 0:
+        app.state.model_watcher = asyncio.create_task(watch_models())
+
+@app.on_event("shutdown")
+async def stop_model_watcher():
+    """Stop watching models/"""
+    watcher = getattr(app.state, "model_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    """Stop the micro-batching worker"""
+    await batcher.stop()
+
+@app.on_event("shutdown")
+def stop_inference_executor():
+    """Stop the inference worker pools"""
+    inference_executor.shutdown()
+
+@app.on_event("shutdown")
+def stop_jobs():
+    """Checkpoint running bulk jobs and stop their workers"""
+    job_manager.shutdown()
+
+@app.on_event("shutdown")
+def flush_logs():
+    """Write out buffered prediction and chat records"""
+    prediction_log.close()
+    chat_log.close()
+    feedback_log.close()
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed requests get a 503 telling the client when to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
 @app.get("/")
 async def root():
     """API root endpoint"""
@@ -240,12 +1580,16 @@ async def predict(request: PredictionRequest):
     Predict category and priority for text
     """
     try:
-        result = get_predictions(request.text, request.language)
+        request.language = resolve_language(request.text, request.language)
+        async with admission.admit("predict", pre_score(request.text, request.language)):
+            result = await batcher.submit(request.text, request.language)
         return PredictionResponse(
             category=result["category"],
             priority=result["priority"],
             confidence=result["confidence"]
         )
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -263,18 +1607,39 @@ async def submit_ticket(
     try:
         # Generate a ticket ID
         ticket_id = f"T{uuid.uuid4().hex[:6].upper()}"
+        request.language = resolve_language(request.text, request.language)
         
-        # Get predictions
-        result = get_predictions(request.text, request.language)
+        # Get predictions (urgent tickets are admitted first under load)
+        async with admission.admit("tickets", pre_score(request.text, request.language)):
+            duplicate_of = None
+            result = None
+            processed_text = None
+            if DEDUP_THRESHOLD > 0:
+                processed_text, match = await find_duplicate(request.text, request.language)
+                if match is not None:
+                    duplicate_of = match["duplicate_of"]
+                    # Reuse the cluster's prediction unless the models changed since
+                    if match["fingerprint"] == prediction_fingerprint(classifier, online_model, cascade):
+                        result = match["prediction"]
+            if result is None:
+                # The duplicate lookup already preprocessed the text
+                result = await batcher.submit(request.text, request.language, processed_text)
+            if DEDUP_THRESHOLD > 0:
+                duplicate_index.add(
+                    ticket_id, processed_text, result,
+                    prediction_fingerprint(classifier, online_model, cascade), duplicate_of
+                )
         
         # Prepare response
-        response = TicketResponse(
-            ticket_id=ticket_id,
-            category=result["category"],
-            priority=result["priority"],
-            text=request.text,
-            subject=request.subject
-        )
+        with STAGE_LATENCY.time(stage="response"):
+            response = TicketResponse(
+                ticket_id=ticket_id,
+                category=result["category"],
+                priority=result["priority"],
+                text=request.text,
+                subject=request.subject,
+                duplicate_of=duplicate_of
+            )
         
         # Prepare data for saving
         ticket_data = {
@@ -286,13 +1651,16 @@ async def submit_ticket(
             "customer_id": request.customer_id,
             "customer_name": request.customer_name,
             "product": request.product,
-            "language": request.language
+            "language": request.language,
+            "account_tier": request.account_tier
         }
         
         # Save prediction in background
         background_tasks.add_task(save_prediction_to_csv, ticket_data)
         
         return response
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -308,51 +1676,121 @@ async def batch_process_tickets(
     Process multiple tickets in batch
     """
     try:
-        results = []
-        batch_data = []
+        # Language detection scales with the batch, so it runs off the event loop
+        score = await inference_executor.run(pre_score_tickets, request.tickets)
+        async with admission.admit("batch", score):
+            results, batch_data = await inference_executor.run(classify_tickets, request.tickets)
         
-        for ticket_request in request.tickets:
-            # Generate a ticket ID
-            ticket_id = f"T{uuid.uuid4().hex[:6].upper()}"
-            
-            # Get predictions
-            result = get_predictions(ticket_request.text, ticket_request.language)
-            
-            # Create response
-            response = TicketResponse(
-                ticket_id=ticket_id,
-                category=result["category"],
-                priority=result["priority"],
-                text=ticket_request.text,
-                subject=ticket_request.subject
-            )
-            results.append(response)
-            
-            # Prepare data for saving
-            ticket_data = {
-                "ticket_id": ticket_id,
-                "text": ticket_request.text,
-                "subject": ticket_request.subject,
-                "category": result["category"],
-                "priority": result["priority"],
-                "customer_id": ticket_request.customer_id,
-                "customer_name": ticket_request.customer_name,
-                "product": ticket_request.product,
-                "language": ticket_request.language
-            }
-            batch_data.append(ticket_data)
-        
-        # Save all predictions in background
-        for ticket_data in batch_data:
-            background_tasks.add_task(save_prediction_to_csv, ticket_data)
+        # Save all predictions in background with a single task
+        background_tasks.add_task(save_predictions_to_csv, batch_data)
         
         return TicketBatchResponse(results=results)
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Batch processing error: {str(e)}"
         )
 
+@app.post("/api/tickets/stream")
+async def stream_tickets(request: Request):
+    """
+    Classify an NDJSON stream of tickets
+    
+    Each request line is a TicketRequest object. Results are streamed back as
+    NDJSON TicketResponse lines, in input order, as each micro-batch finishes.
+    Lines that can't be processed produce {"line": n, "error": "..."} instead.
+    """
+    async def classify_chunk(chunk: list) -> bytes:
+        tickets = [ticket for _, ticket in chunk]
+        # Each chunk is admitted like a batch request, so a long stream is shed under load too
+        score = await inference_executor.run(pre_score_tickets, tickets)
+        async with admission.admit("batch", score):
+            results, batch_data = await inference_executor.run(classify_tickets, tickets)
+        await inference_executor.run(save_predictions_to_csv, batch_data)
+        return "".join(
+            json.dumps(jsonable_encoder(result)) + "\n" for result in results
+        ).encode()
+    
+    def error_line(line_number: int, error: Exception) -> bytes:
+        return (json.dumps({"line": line_number, "error": str(error)}) + "\n").encode()
+    
+    async def flush(chunk: list) -> bytes:
+        """Results of a chunk of (line number, ticket) pairs, or an error for each of its lines"""
+        try:
+            return await classify_chunk(chunk)
+        except Exception as e:
+            return b"".join(error_line(line_number, e) for line_number, _ in chunk)
+    
+    async def classify_stream():
+        chunk = []
+        async for line_number, record in iter_ndjson(request.stream()):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                chunk.append((line_number, TicketRequest(**record)))
+            except Exception as e:
+                # Results of the lines before this one go out first, keeping input order
+                if chunk:
+                    yield await flush(chunk)
+                    chunk = []
+                yield error_line(line_number, e)
+                continue
+            
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield await flush(chunk)
+                chunk = []
+        
+        if chunk:
+            yield await flush(chunk)
+    
+    return NDJSONStreamingResponse(classify_stream())
+
+@app.post("/api/jobs", response_model=JobStatusResponse, status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    """
+    Submit a CSV, JSON or JSONL file of tickets for background classification
+    """
+    try:
+        state = await inference_executor.run(job_manager.create_job, file.filename, file.file)
+        return JobStatusResponse(**job_manager.progress(state["job_id"]))
+    except JobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Job submission error: {str(e)}"
+        )
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Get progress of a bulk classification job
+    """
+    progress = job_manager.progress(job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatusResponse(**progress)
+
+@app.get("/api/jobs/{job_id}/results")
+async def download_job_results(job_id: str):
+    """
+    Download the predictions of a completed bulk classification job
+    """
+    state = job_manager.get_state(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if state["status"] != COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {state['status']}")
+    
+    base = os.path.splitext(state["filename"])[0]
+    return FileResponse(
+        job_manager.results_path(job_id),
+        media_type="text/csv",
+        filename=f"{base}_predictions.csv"
+    )
+
 @app.get("/api/health")
 async def health_check():
     """
@@ -360,6 +1798,71 @@ async def health_check():
     """
     return {"status": "ok", "message": "API is running"}
 
+@app.get("/api/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until the warm-up predictions have run
+    """
+    if not warmup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready", "warmup_seconds": warmup_state["seconds"]}
+
+@app.get("/api/admin/model", response_model=ModelInfoResponse)
+async def get_model_info():
+    """
+    Details of the active classifier
+    """
+    return ModelInfoResponse(**model_info())
+
+@app.post("/api/admin/reload", response_model=ModelInfoResponse)
+async def reload_models():
+    """
+    Load new model artifacts from models/ and swap them in without downtime
+    """
+    if model_reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    try:
+        info = await asyncio.to_thread(reload_model)
+        return ModelInfoResponse(**info)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Model reload error: {str(e)}"
+        )
+
+@app.get("/api/stats")
+async def get_stats():
+    """
+    Runtime statistics for tuning the inference path
+    """
+    return {
+        "batching": batcher.stats(),
+        "executor": inference_executor.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "model_fingerprint": classifier.fingerprint,
+        "worker": {"pid": os.getpid(), "memory": process_memory()},
+        "prediction_log": prediction_log.stats(),
+        "chat_log": chat_log.stats(),
+        "feedback_log": feedback_log.stats(),
+        "suggestions": suggestion_index.stats(),
+        "language_pipelines": multilingual_preprocessor.stats(),
+        "similarity": similarity_index.stats(),
+        "queue": ticket_queue.stats(),
+        "analytics": analytics.stats(),
+        "duplicates": dict(duplicate_index.stats(), largest_clusters=duplicate_index.largest_clusters()),
+        "admission": admission.stats(),
+        "inference_mode": INFERENCE_MODE if cascade is not None else "linear",
+        "cascade": cascade.stats() if cascade is not None else None,
+        "online_model": online_model.stats() if online_model is not None else None
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
@@ -372,9 +1875,13 @@ async def chat(
         # Generate message and session IDs
         message_id = f"M{uuid.uuid4().hex[:8]}"
         session_id = request.history[0].timestamp if request.history else f"S{uuid.uuid4().hex[:8]}"
+        request.language = resolve_language(request.message, request.language)
         
         # Generate response using our trained model
-        result = generate_chat_response(request.message, request.language)
+        async with admission.admit("chat", pre_score(request.message, request.language)):
+            result = await inference_executor.run(
+                generate_chat_response, request.message, request.language
+            )
         
         # Prepare response
         response = ChatResponse(
@@ -382,7 +1889,8 @@ async def chat(
             category=result["category"],
             priority=result["priority"],
             suggestions=result["suggestions"],
-            create_ticket=result["create_ticket"]
+            create_ticket=result["create_ticket"],
+            message_id=message_id
         )
         
         # Prepare data for logging
@@ -397,80 +1905,157 @@ async def chat(
             "language": request.language
         }
         
-        # Save chat in background
+        # Save chat in background and keep it at hand for feedback
+        remember_chat(chat_data)
         background_tasks.add_task(save_chat_to_csv, chat_data)
         
         return response
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Chat error: {str(e)}"
         )
 
+@app.get("/api/tickets/{ticket_id}/similar", response_model=SimilarTicketsResponse)
+async def get_similar_tickets(ticket_id: str, k: int = 5):
+    """
+    Get the historical tickets most similar to a ticket
+    """
+    similarity_model()
+    vector = similarity_index.vector(ticket_id)
+    if vector is None:
+        raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} not found")
+    try:
+        results = await inference_executor.run(similar_tickets, vector, k, ticket_id)
+        return SimilarTicketsResponse(ticket_id=ticket_id, results=results)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Similar ticket error: {str(e)}"
+        )
+
+@app.get("/api/analytics", response_model=AnalyticsResponse)
+async def get_analytics(
+    resolution: str = "hour",
+    buckets: int = 24,
+    group_by: str = "category,priority",
+    category: str = None,
+    priority: str = None,
+    language: str = None,
+    product: str = None
+):
+    """
+    Get prediction counts over the most recent minute, hour or day buckets
+    """
+    dimensions = [dimension.strip() for dimension in group_by.split(",") if dimension.strip()]
+    filters = {
+        dimension: value
+        for dimension, value in (
+            ("category", category), ("priority", priority),
+            ("language", language), ("product", product)
+        )
+        if value is not None
+    }
+    try:
+        result = analytics.query(resolution, buckets, dimensions, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for bucket in result["buckets"]:
+        bucket["start"] = datetime.fromtimestamp(bucket["start"]).isoformat()
+    return AnalyticsResponse(**result)
+
+@app.get("/api/queue/next", response_model=QueueTicket)
+async def get_next_ticket():
+    """
+    Get the most urgent open ticket without claiming it
+    """
+    try:
+        ticket = ticket_queue.peek()
+    except QueueUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Queue is empty")
+    return QueueTicket(**ticket)
+
+@app.post("/api/queue/claim", response_model=QueueTicket)
+async def claim_ticket(request: QueueClaimRequest):
+    """
+    Lease the most urgent open ticket (or a given one) to an agent
+    """
+    try:
+        ticket = ticket_queue.claim(request.agent_id, request.ticket_id, request.lease_seconds)
+    except QueueUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TicketNotQueued as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Queue is empty")
+    return QueueTicket(**ticket)
+
+@app.post("/api/queue/{ticket_id}/complete", response_model=QueueTicket)
+async def complete_ticket(ticket_id: str, request: QueueLeaseRequest):
+    """
+    Remove a claimed ticket from the queue
+    """
+    try:
+        return QueueTicket(**ticket_queue.complete(ticket_id, request.lease_id))
+    except QueueUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TicketNotQueued as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/queue/{ticket_id}/release", response_model=QueueTicket)
+async def release_ticket(ticket_id: str, request: QueueLeaseRequest):
+    """
+    Give a claimed ticket back to the queue
+    """
+    try:
+        return QueueTicket(**ticket_queue.release(ticket_id, request.lease_id))
+    except QueueUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except TicketNotQueued as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/api/similar", response_model=SimilarTicketsResponse)
+async def search_similar_tickets(text: str, language: str = AUTO_LANGUAGE, k: int = 5):
+    """
+    Get the historical tickets most similar to a text
+    """
+    model = similarity_model()
+    try:
+        processed_texts = await inference_executor.run(preprocess_texts, [text], [language])
+        vector = await inference_executor.run(model.vectorize, processed_texts)
+        results = await inference_executor.run(similar_tickets, vector, k)
+        return SimilarTicketsResponse(results=results)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Similar ticket error: {str(e)}"
+        )
+
 @app.get("/api/chat/suggestions", response_model=SuggestionResponse)
 async def get_suggestions(query: str):
     """
     Get suggested queries based on partial user input
     """
     try:
-        # Simple predefined suggestions based on common prefixes
-        suggestions = []
+        # Most frequent known phrases starting with the query
+        suggestions = suggestion_index.search(query, limit=5)
         
-        query = query.lower()
-        
-        if query.startswith("how"):
-            suggestions = [
-                "How do I reset my password?",
-                "How can I update my software?",
-                "How to export data to PDF?",
-                "How do I fix network connection issues?"
-            ]
-        elif query.startswith("why"):
-            suggestions = [
-                "Why is my application running slowly?",
-                "Why am I getting error code 404?",
-                "Why can't I login to my account?",
-                "Why does my screen freeze during video calls?"
-            ]
-        elif query.startswith("what"):
-            suggestions = [
-                "What are the system requirements?",
-                "What version am I running?",
-                "What's the status of my ticket?",
-                "What does this error message mean?"
-            ]
-        elif query.startswith("is"):
-            suggestions = [
-                "Is there a mobile version available?",
-                "Is my data being backed up?",
-                "Is two-factor authentication supported?",
-                "Is my license expired?"
-            ]
-        elif query.startswith("can"):
-            suggestions = [
-                "Can I recover deleted files?",
-                "Can I use the software offline?",
-                "Can I transfer my license to another device?",
-                "Can I customize the dashboard?"
-            ]
-        else:
-            # General suggestions
-            suggestions = [
-                "Help with login issues",
-                "Software crashes frequently",
-                "Feature request",
-                "Can't connect to server",
-                "How to export data"
-            ]
-            
-        # Filter suggestions based on the query
-        filtered_suggestions = [s for s in suggestions if query in s.lower()]
-        
-        # Return all suggestions if none match the filter
-        if not filtered_suggestions:
-            filtered_suggestions = suggestions
+        # General suggestions if nothing matches
+        if not suggestions:
+            suggestions = GENERAL_SUGGESTIONS
             
-        return SuggestionResponse(suggestions=filtered_suggestions[:5])
+        return SuggestionResponse(suggestions=suggestions[:5])
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -486,18 +2071,27 @@ async def submit_feedback(
     Submit feedback for a chat message
     """
     try:
-        # In a production system, this would store the feedback in a database
-        # For demonstration, we'll just log it
+        # Join the feedback to the logged chat prediction
+        chat = await asyncio.to_thread(find_chat, request.message_id) or {}
+        
         feedback_data = {
             "message_id": request.message_id,
+            "session_id": chat.get("session_id"),
+            "timestamp": datetime.now().isoformat(),
             "rating": request.rating,
             "comments": request.comments,
-            "timestamp": datetime.now().isoformat()
+            "user_message": chat.get("user_message"),
+            "language": chat.get("language"),
+            "predicted_category": chat.get("category"),
+            "predicted_priority": chat.get("priority"),
+            "corrected_category": request.corrected_category,
+            "corrected_priority": request.corrected_priority
         }
         
-        print(f"Received feedback: {feedback_data}")
+        # Save feedback and queue it for the online model in background
+        background_tasks.add_task(save_feedback, feedback_data)
         
-        return {"status": "success", "message": "Feedback received"}
+        return {"status": "success", "message": "Feedback received", "matched": bool(chat)}
     except Exception as e:
         raise HTTPException(
             status_code=500,
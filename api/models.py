@@ -8,7 +8,8 @@ class TicketRequest(BaseModel):
     customer_id: Optional[str] = Field(None, description="Customer identifier")
     customer_name: Optional[str] = Field(None, description="Customer name")
     product: Optional[str] = Field(None, description="Product the ticket is related to")
-    language: str = Field("en", description="Language of the ticket (ISO code)")
+    language: str = Field("auto", description="Language of the ticket (ISO code, or 'auto' to detect it)")
+    account_tier: Optional[str] = Field(None, description="Customer account tier (free, basic, standard, premium or enterprise)")
     
     class Config:
         schema_extra = {
@@ -18,7 +19,8 @@ class TicketRequest(BaseModel):
                 "customer_id": "C12345",
                 "customer_name": "John Smith",
                 "product": "DataManager Pro",
-                "language": "en"
+                "language": "en",
+                "account_tier": "premium"
             }
         }
 
@@ -29,6 +31,7 @@ class TicketResponse(BaseModel):
     priority: str = Field(..., description="Predicted priority")
     text: str = Field(..., description="Original ticket text")
     subject: Optional[str] = Field(None, description="Original ticket subject")
+    duplicate_of: Optional[str] = Field(None, description="First ticket of the near-duplicate cluster this ticket belongs to")
     
     class Config:
         schema_extra = {
@@ -37,14 +40,15 @@ class TicketResponse(BaseModel):
                 "category": "bug",
                 "priority": "high",
                 "text": "The application keeps crashing when I try to export my data to PDF.",
-                "subject": "Application crash during PDF export"
+                "subject": "Application crash during PDF export",
+                "duplicate_of": None
             }
         }
 
 class PredictionRequest(BaseModel):
     """Model for prediction request"""
     text: str = Field(..., description="Text to classify")
-    language: str = Field("en", description="Language of the text (ISO code)")
+    language: str = Field("auto", description="Language of the text (ISO code, or 'auto' to detect it)")
 
 class PredictionResponse(BaseModel):
     """Model for prediction response"""
@@ -79,7 +83,7 @@ class ChatRequest(BaseModel):
     """Model for chat request"""
     message: str = Field(..., description="User message")
     history: Optional[List[ChatMessage]] = Field([], description="Chat history")
-    language: str = Field("en", description="Language of the message (ISO code)")
+    language: str = Field("auto", description="Language of the message (ISO code, or 'auto' to detect it)")
     
     class Config:
         schema_extra = {
@@ -97,6 +101,7 @@ class ChatResponse(BaseModel):
     priority: Optional[str] = Field(None, description="Detected ticket priority")
     suggestions: Optional[List[str]] = Field(None, description="Suggested follow-up questions")
     create_ticket: Optional[bool] = Field(False, description="If a ticket should be created")
+    message_id: Optional[str] = Field(None, description="Message identifier to reference in feedback")
     
     class Config:
         schema_extra = {
@@ -105,7 +110,8 @@ class ChatResponse(BaseModel):
                 "category": "bug",
                 "priority": "medium",
                 "suggestions": ["How do I update my app?", "The update didn't fix it"],
-                "create_ticket": False
+                "create_ticket": False,
+                "message_id": "M1a2b3c4d"
             }
         }
 
@@ -117,8 +123,134 @@ class SuggestionResponse(BaseModel):
     """Model for suggestion response"""
     suggestions: List[str] = Field(..., description="Query suggestions")
 
+class SimilarTicket(BaseModel):
+    """Model for a historical ticket similar to a query"""
+    ticket_id: str = Field(..., description="Ticket identifier")
+    text: str = Field(..., description="Ticket text")
+    subject: Optional[str] = Field(None, description="Ticket subject")
+    category: Optional[str] = Field(None, description="Ticket category")
+    priority: Optional[str] = Field(None, description="Ticket priority")
+    language: Optional[str] = Field(None, description="Language of the ticket (ISO code)")
+    source: Optional[str] = Field(None, description="Dataset file or log the ticket comes from")
+    score: float = Field(..., description="Cosine similarity to the query")
+
+class SimilarTicketsResponse(BaseModel):
+    """Model for similar ticket response"""
+    ticket_id: Optional[str] = Field(None, description="Ticket the results are similar to")
+    results: List[SimilarTicket] = Field(..., description="Similar tickets, most similar first")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "ticket_id": "T12345",
+                "results": [
+                    {
+                        "ticket_id": "2001",
+                        "text": "Server keeps going down every hour, affecting all our clients",
+                        "subject": None,
+                        "category": "bug",
+                        "priority": "critical",
+                        "language": "en",
+                        "source": "dataset-tickets-multi-lang-4-20k.csv",
+                        "score": 0.82
+                    }
+                ]
+            }
+        }
+
 class FeedbackRequest(BaseModel):
     """Model for chat feedback"""
     message_id: str = Field(..., description="Message identifier")
     rating: int = Field(..., description="User rating (1-5)")
-    comments: Optional[str] = Field(None, description="User comments") 
\ No newline at end of file
+    comments: Optional[str] = Field(None, description="User comments") 
+    corrected_category: Optional[str] = Field(None, description="Correct category, if the prediction was wrong")
+    corrected_priority: Optional[str] = Field(None, description="Correct priority, if the prediction was wrong")
+
+# Live queue models
+class QueueTicket(BaseModel):
+    """Model for a ticket in the live queue"""
+    ticket_id: str = Field(..., description="Ticket identifier")
+    text: str = Field(..., description="Ticket text")
+    subject: Optional[str] = Field(None, description="Ticket subject")
+    category: Optional[str] = Field(None, description="Predicted category")
+    priority: Optional[str] = Field(None, description="Predicted priority")
+    account_tier: Optional[str] = Field(None, description="Customer account tier")
+    customer_id: Optional[str] = Field(None, description="Customer identifier")
+    product: Optional[str] = Field(None, description="Product the ticket is related to")
+    language: Optional[str] = Field(None, description="Language of the ticket (ISO code)")
+    created: float = Field(..., description="Time the ticket was queued (Unix seconds)")
+    state: str = Field(..., description="open or claimed")
+    agent_id: Optional[str] = Field(None, description="Agent holding the lease")
+    lease_id: Optional[str] = Field(None, description="Lease to pass to complete or release")
+    lease_expires: Optional[float] = Field(None, description="Time the lease lapses (Unix seconds)")
+
+class QueueClaimRequest(BaseModel):
+    """Model for claiming a queued ticket"""
+    agent_id: str = Field(..., description="Agent taking the ticket")
+    ticket_id: Optional[str] = Field(None, description="Ticket to claim (default: the most urgent open ticket)")
+    lease_seconds: Optional[float] = Field(None, description="Lease length (default: QUEUE_LEASE_S)")
+
+class QueueLeaseRequest(BaseModel):
+    """Model for completing or releasing a claimed ticket"""
+    lease_id: str = Field(..., description="Lease returned by the claim")
+
+# Analytics models
+class AnalyticsBucket(BaseModel):
+    """Model for prediction counts in one time bucket"""
+    start: str = Field(..., description="Start of the bucket (ISO format)")
+    total: int = Field(..., description="Predictions in the bucket")
+    counts: List[Dict[str, Any]] = Field(..., description="Count per group, largest first")
+
+class AnalyticsResponse(BaseModel):
+    """Model for rolling prediction analytics"""
+    resolution: str = Field(..., description="minute, hour or day")
+    bucket_seconds: int = Field(..., description="Width of a bucket in seconds")
+    group_by: List[str] = Field(..., description="Dimensions the counts are grouped by")
+    buckets: List[AnalyticsBucket] = Field(..., description="Buckets, oldest first")
+    totals: List[Dict[str, Any]] = Field(..., description="Count per group over all buckets")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "resolution": "hour",
+                "bucket_seconds": 3600,
+                "group_by": ["category", "priority"],
+                "buckets": [
+                    {
+                        "start": "2024-01-15T10:00:00",
+                        "total": 3,
+                        "counts": [
+                            {"category": "bug", "priority": "high", "count": 2},
+                            {"category": "feature", "priority": "low", "count": 1}
+                        ]
+                    }
+                ],
+                "totals": [
+                    {"category": "bug", "priority": "high", "count": 2},
+                    {"category": "feature", "priority": "low", "count": 1}
+                ]
+            }
+        }
+
+# Bulk job models
+class JobStatusResponse(BaseModel):
+    """Model for bulk classification job progress"""
+    job_id: str = Field(..., description="Job identifier")
+    filename: Optional[str] = Field(None, description="Uploaded file name")
+    status: str = Field(..., description="queued, running, completed or failed")
+    rows_done: int = Field(..., description="Rows classified so far")
+    total_rows: Optional[int] = Field(None, description="Rows in the uploaded file")
+    rows_per_sec: Optional[float] = Field(None, description="Throughput since the job (re)started")
+    eta_s: Optional[float] = Field(None, description="Estimated seconds until completion")
+    error: Optional[str] = Field(None, description="Error message for failed jobs")
+
+# Model management models
+class ModelInfoResponse(BaseModel):
+    """Model for the active classifier"""
+    fingerprint: Optional[str] = Field(None, description="Hash of the loaded model artifacts")
+    loaded_at: Optional[str] = Field(None, description="When the active model was loaded")
+    load_seconds: Optional[float] = Field(None, description="Time taken to load and validate the active model")
+    reloads: int = Field(0, description="Successful reloads since startup")
+    shared_features: bool = Field(False, description="If both models share one TF-IDF vectorizer")
+    watching: bool = Field(False, description="If the model directory is watched for new artifacts")
+    last_error: Optional[str] = Field(None, description="Error of the last failed reload")
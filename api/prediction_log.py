@@ -0,0 +1,340 @@
+import os
+import csv
+import glob
+import time
+import atexit
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+from api.file_lock import lock_open_file, try_lock, unlock
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# Line terminator of the csv module's default dialect, which ends every record
+RECORD_END = b"\r\n"
+
+
+class SegmentedLogWriter:
+    """
+    Append-only CSV log split into numbered segment files.
+
+    Records are buffered in memory and written by a background thread in
+    batches (group commit), so callers never rewrite existing data.
+
+    Several processes (API workers) can log to the same directory: a writer
+    holds an exclusive lock on the segment it appends to and creates new
+    segments exclusively, so each segment has a single writer.
+
+    After a restart the newest segment is resumed if it has room, was written
+    with the same columns and is not held by another process; a record torn
+    by a crash is cut off before appending.
+    """
+
+    def __init__(self, log_dir: str, columns: List[str], prefix: str = "log",
+                 max_segment_bytes: int = 64 * 1024 * 1024,
+                 max_segment_age_s: float = 24 * 3600,
+                 flush_interval_ms: float = 200,
+                 max_buffer: int = 1000,
+                 fsync: str = "interval",
+                 fsync_interval_s: float = 1.0,
+                 on_commit: Optional[Callable[[int, float], None]] = None):
+        """
+        Initialize the writer
+
+        Args:
+            log_dir: Directory holding the segment files
+            columns: CSV columns, in order
+            prefix: Segment file name prefix (segments are <prefix>-000001.csv, ...)
+            max_segment_bytes: Rotate to a new segment once the current one reaches this size
+            max_segment_age_s: Rotate to a new segment once the current one is this old
+            flush_interval_ms: Longest time a record stays buffered before being written
+            max_buffer: Number of buffered records that triggers an immediate commit
+            fsync: 'always' (fsync every commit), 'interval' (at most every fsync_interval_s) or 'never'
+            fsync_interval_s: Minimum time between fsyncs for the 'interval' policy
+            on_commit: Optional callback receiving (records written, seconds taken) after each commit
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+
+        self.log_dir = log_dir
+        self.columns = list(columns)
+        self.prefix = prefix
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age_s = max_segment_age_s
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_buffer = max_buffer
+        self.fsync = fsync
+        self.fsync_interval_s = fsync_interval_s
+        self.on_commit = on_commit
+
+        self._buffer: List[dict] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._closed = False
+
+        self._file = None
+        self._writer = None
+        self._segment_index = 0
+        self._segment_opened = 0.0
+        self._last_fsync = 0.0
+
+        # Statistics
+        self.records_written = 0
+        self.commits = 0
+        self.segments_created = 0
+
+        os.makedirs(log_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name=f"{prefix}-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, record: dict) -> None:
+        """Buffer a single record for writing"""
+        self.append_many([record])
+
+    def append_many(self, records: List[dict]) -> None:
+        """Buffer several records for writing, keeping their order"""
+        if not records:
+            return
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Log writer is closed")
+            self._buffer.extend(records)
+            if len(self._buffer) >= self.max_buffer:
+                self._cond.notify()
+
+    def pending(self) -> int:
+        """Number of records buffered but not yet written"""
+        with self._cond:
+            return len(self._buffer)
+
+    def flush(self) -> None:
+        """Write all buffered records now"""
+        self._drain(force_fsync=self.fsync != "never")
+
+    def close(self) -> None:
+        """Flush remaining records and close the current segment"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.max_buffer:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            try:
+                self._drain()
+            except Exception as e:
+                print(f"Error writing {self.prefix} log: {e}")
+            if closed:
+                return
+
+    def _drain(self, force_fsync: bool = False) -> None:
+        """Write everything buffered so far to the current segment as one group"""
+        with self._io_lock:
+            with self._cond:
+                records, self._buffer = self._buffer, []
+
+            if not records:
+                if force_fsync and self._file is not None:
+                    self._sync()
+                return
+
+            start = time.perf_counter()
+            self._rotate_if_needed()
+            self._writer.writerows(records)
+            self._file.flush()
+
+            now = time.time()
+            if force_fsync or self.fsync == "always" or (
+                self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval_s
+            ):
+                self._sync()
+
+            self.records_written += len(records)
+            self.commits += 1
+            if self.on_commit is not None:
+                self.on_commit(len(records), time.perf_counter() - start)
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.time()
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.log_dir, f"{self.prefix}-{index:06d}.csv")
+
+    def _segment_number(self, path: str) -> int:
+        return int(os.path.basename(path)[len(self.prefix) + 1:-4])
+
+    @staticmethod
+    def _created(path: str) -> float:
+        """Creation time of a segment where the platform records it, else its last modification"""
+        stat = os.stat(path)
+        return getattr(stat, "st_birthtime", stat.st_mtime)
+
+    def _rotate_if_needed(self) -> None:
+        if self._file is None:
+            # Resume the newest segment after a restart if it still has room
+            # and no other process is writing to it
+            segments = self.segments()
+            if segments:
+                self._segment_index = self._segment_number(segments[-1])
+                path = segments[-1]
+                age = time.time() - self._created(path)
+                if os.path.getsize(path) < self.max_segment_bytes and age < self.max_segment_age_s:
+                    if self._open_segment(path):
+                        return
+            self._new_segment()
+            return
+
+        too_big = self._file.tell() >= self.max_segment_bytes
+        too_old = time.time() - self._segment_opened >= self.max_segment_age_s
+        if too_big or too_old:
+            self._new_segment()
+
+    def _new_segment(self) -> None:
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+        # Other processes may have added segments since; the file is created
+        # exclusively, so two writers never end up sharing a number
+        segments = self.segments()
+        index = max(self._segment_index, self._segment_number(segments[-1]) if segments else 0)
+        while True:
+            index += 1
+            try:
+                os.close(os.open(self._segment_path(index), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                continue
+            if self._open_segment(self._segment_path(index)):
+                break
+        self._segment_index = index
+        self.segments_created += 1
+
+    def _open_segment(self, path: str) -> bool:
+        """
+        Open a segment for appending, locked for this writer (with a header if it is empty)
+
+        Returns:
+            False if another process holds the segment or it has other columns
+        """
+        handle = open(path, "a", newline="", encoding="utf-8")
+        if not lock_open_file(handle):
+            handle.close()
+            return False
+
+        # Checked under the lock: another writer may have used the segment since it was created
+        size = os.fstat(handle.fileno()).st_size
+        if size:
+            # Before any truncation, which counts as a modification
+            opened = self._created(path)
+            with open(path, "rb") as f:
+                header = next(csv.reader([f.readline().decode("utf-8")]), [])
+                end = self._last_record_end(f, size)
+            if header != self.columns:
+                # Written before the columns changed; appending would misalign them
+                handle.close()
+                return False
+            if end < size:
+                # Cut off a record torn by a crash so new rows start on their own line
+                handle.truncate(end)
+                size = end
+        else:
+            opened = time.time()
+
+        self._file = handle
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns,
+                                      restval="", extrasaction="ignore")
+        if size == 0:
+            self._writer.writeheader()
+        # A resumed segment keeps its age, so it still rotates on schedule
+        self._segment_opened = opened
+        return True
+
+    @staticmethod
+    def _last_record_end(f, size: int, block_size: int = 65536) -> int:
+        """Offset just past the last complete record of a segment (0 if there is none)"""
+        position = size
+        tail = b""
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            tail = f.read(position - start) + tail[:len(RECORD_END) - 1]
+            found = tail.rfind(RECORD_END)
+            if found >= 0:
+                return start + found + len(RECORD_END)
+            position = start
+        return 0
+
+    def import_legacy(self, path: str) -> int:
+        """
+        Import a single-file CSV log of earlier versions as the first segment,
+        if the log has no segments yet (the legacy file is left in place)
+
+        Args:
+            path: Legacy CSV file
+
+        Returns:
+            Number of records imported
+        """
+        if not os.path.exists(path) or self.segments():
+            return 0
+        # One process imports; the others find its segment afterwards
+        claim = try_lock(os.path.join(self.log_dir, f"{self.prefix}.import.lock"))
+        if claim is None:
+            return 0
+        try:
+            if self.segments():
+                return 0
+            with open(path, newline="", encoding="utf-8") as f:
+                records = list(csv.DictReader(f))
+            with self._io_lock:
+                self._rotate_if_needed()
+                self._writer.writerows(records)
+                self._sync()
+                self.records_written += len(records)
+            return len(records)
+        finally:
+            unlock(claim)
+
+    def segments(self) -> List[str]:
+        """Segment file paths, oldest first"""
+        return sorted(glob.glob(os.path.join(self.log_dir, f"{self.prefix}-*.csv")))
+
+    def iter_records(self, include_pending: bool = False) -> Iterator[Dict[str, str]]:
+        """
+        Iterate over all committed records, oldest first
+
+        Args:
+            include_pending: Also yield records still buffered in memory
+        """
+        for path in self.segments():
+            with open(path, newline="", encoding="utf-8") as f:
+                yield from csv.DictReader(f)
+        if include_pending:
+            with self._cond:
+                pending = list(self._buffer)
+            yield from pending
+
+    def stats(self) -> Dict[str, object]:
+        """Writer statistics"""
+        return {
+            "records_written": self.records_written,
+            "commits": self.commits,
+            "pending": self.pending(),
+            "segments": len(self.segments()),
+            "current_segment": self._segment_index,
+            "fsync": self.fsync,
+        }
@@ -0,0 +1,172 @@
+import threading
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from typing import Dict, List, Optional, Tuple
+
+
+class SimilarityIndex:
+    """
+    Inverted index over sparse TF-IDF vectors for top-k cosine similarity.
+
+    The bulk of the tickets is stored column-major (CSC), so the column of a
+    feature is its posting list: a query only touches the postings of its
+    non-zero features instead of scanning every ticket. Tickets added
+    afterwards go to a small row-major delta that is scored directly and
+    merged into the postings once it reaches merge_threshold rows.
+    """
+
+    def __init__(self, fingerprint: Optional[str] = None, merge_threshold: int = 1000):
+        """
+        Initialize the index
+
+        Args:
+            fingerprint: Fingerprint of the model whose vectors are indexed
+                (vectors of another model live in a different feature space)
+            merge_threshold: Delta rows that trigger a merge into the postings
+        """
+        self.fingerprint = fingerprint
+        self.merge_threshold = merge_threshold
+
+        self._records: List[dict] = []
+        # Ticket ID -> position of its latest record
+        self._positions: Dict[str, int] = {}
+        # Merged tickets: rows (CSR) for lookups by ticket, postings (CSC) for queries
+        self._rows: Optional[sp.csr_matrix] = None
+        self._postings: Optional[sp.csc_matrix] = None
+        # Tickets added since the last merge
+        self._delta: List[sp.csr_matrix] = []
+        self._delta_rows: Optional[sp.csr_matrix] = None
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.queries = 0
+        self.merges = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, records: List[dict], vectors) -> int:
+        """
+        Index tickets
+
+        Args:
+            records: Ticket records (ticket_id, text, category, priority, ...)
+            vectors: Sparse matrix with one TF-IDF row per record
+
+        Returns:
+            Number of tickets indexed
+        """
+        if not records:
+            return 0
+        vectors = normalize(sp.csr_matrix(vectors, dtype=np.float32))
+        with self._lock:
+            start = len(self._records)
+            self._records.extend(records)
+            for offset, record in enumerate(records):
+                self._positions[str(record.get("ticket_id"))] = start + offset
+            self._delta.append(vectors)
+            self._delta_rows = None
+            if sum(matrix.shape[0] for matrix in self._delta) >= self.merge_threshold:
+                self._merge()
+        return len(records)
+
+    def _merge(self) -> None:
+        """Fold the delta into the postings (called with the lock held)"""
+        parts = ([self._rows] if self._rows is not None else []) + self._delta
+        rows = sp.vstack(parts, format="csr")
+        # Build the new arrays first; readers keep using the old ones until the swap
+        self._postings = rows.tocsc()
+        self._rows = rows
+        self._delta = []
+        self._delta_rows = None
+        self.merges += 1
+
+    def _snapshot(self) -> tuple:
+        with self._lock:
+            if self._delta_rows is None and self._delta:
+                self._delta_rows = sp.vstack(self._delta, format="csr")
+            return self._records, self._rows, self._postings, self._delta_rows
+
+    def _scores(self, vector, rows, postings, delta_rows) -> np.ndarray:
+        """Cosine similarity of a query vector to every indexed ticket"""
+        query = normalize(sp.csr_matrix(vector, dtype=np.float32))
+        columns, weights = query.indices, query.data
+        scores = []
+
+        if postings is not None:
+            # Accumulate over the posting lists of the query's features only
+            selected = postings[:, columns]
+            lengths = np.diff(selected.indptr)
+            scores.append(np.bincount(
+                selected.indices,
+                weights=selected.data * np.repeat(weights, lengths),
+                minlength=rows.shape[0]
+            ))
+        if delta_rows is not None:
+            scores.append((delta_rows @ query.T).toarray().ravel())
+
+        return np.concatenate(scores) if scores else np.zeros(0)
+
+    def vector(self, ticket_id: str):
+        """Indexed vector of a ticket, or None if it isn't indexed"""
+        records, rows, _, delta_rows = self._snapshot()
+        position = self._positions.get(str(ticket_id))
+        if position is None:
+            return None
+        merged = rows.shape[0] if rows is not None else 0
+        if position < merged:
+            return rows[position]
+        if delta_rows is None or position - merged >= delta_rows.shape[0]:
+            # Added after the snapshot was taken
+            return None
+        return delta_rows[position - merged]
+
+    def search(self, vector, k: int = 5, exclude: Optional[str] = None,
+               min_score: float = 0.0) -> List[Tuple[dict, float]]:
+        """
+        Most similar tickets to a vector
+
+        Args:
+            vector: Sparse TF-IDF row in the indexed feature space
+            k: Number of results
+            exclude: Ticket ID to leave out (the query ticket itself)
+            min_score: Minimum cosine similarity of a result
+
+        Returns:
+            (record, cosine similarity) pairs, most similar first
+        """
+        records, rows, postings, delta_rows = self._snapshot()
+        with self._lock:
+            self.queries += 1
+        scores = self._scores(vector, rows, postings, delta_rows)
+        if exclude is not None:
+            position = self._positions.get(str(exclude))
+            if position is not None and position < len(scores):
+                scores[position] = -1.0
+        if not len(scores) or k <= 0:
+            return []
+
+        # Partial sort: only the top k are ordered
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (records[i], float(scores[i]))
+            for i in top
+            if scores[i] > min_score
+        ]
+
+    def stats(self) -> Dict[str, object]:
+        """Index size and query counters"""
+        with self._lock:
+            merged = self._rows.shape[0] if self._rows is not None else 0
+            return {
+                "tickets": len(self._records),
+                "merged": merged,
+                "delta": len(self._records) - merged,
+                "postings": int(self._postings.nnz) if self._postings is not None else 0,
+                "merges": self.merges,
+                "queries": self.queries,
+                "model_fingerprint": self.fingerprint,
+            }
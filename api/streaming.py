@@ -0,0 +1,70 @@
+import json
+from typing import AsyncIterator, Tuple
+
+from starlette.responses import StreamingResponse
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response for endpoints that keep reading the request body
+    while they write the response.
+
+    The stock StreamingResponse listens on receive() for a disconnect while
+    streaming, which would steal the request body chunks the body iterator is
+    still consuming. This response only streams.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes],
+                      max_line_bytes: int = 1024 * 1024) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Parse newline-delimited JSON from a chunked byte stream
+
+    Only the current partial line is buffered, so memory does not grow with
+    the number of records.
+
+    Args:
+        chunks: Async iterator of raw body chunks
+        max_line_bytes: Longest accepted line
+
+    Yields:
+        (line number, parsed value) pairs; the value is a ValueError for lines
+        that are not valid JSON or are too long
+    """
+    buffer = b""
+    line_number = 0
+    skipping = False
+
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            if skipping:
+                # End of an oversized line that was already reported
+                skipping = False
+            elif line.strip():
+                yield line_number, _parse_line(line)
+
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield line_number + 1, ValueError(f"Line longer than {max_line_bytes} bytes")
+            skipping = True
+            buffer = b""
+
+    if buffer.strip() and not skipping:
+        yield line_number + 1, _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> object:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
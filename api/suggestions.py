@@ -0,0 +1,209 @@
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+
+# Largest number of new phrases inserted one by one; more are appended and
+# the key list sorted once
+INSORT_MAX_KEYS = 64
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and collapse whitespace, the form phrases are indexed under"""
+    return " ".join(str(text).lower().split())
+
+
+class PrefixIndex:
+    """
+    Autocomplete index over phrases, ranked by how often they were seen.
+
+    Normalized phrases are kept in a sorted list, so the phrases starting with
+    a prefix form one contiguous range found with two binary searches. Short
+    prefixes match too many phrases to rank on every query, so their top
+    results are kept up to date as phrases are inserted (counts only grow, so
+    a phrase can only move up). Results for longer prefixes are cached per
+    prefix; inserting a phrase only invalidates the cached prefixes of that
+    phrase.
+    """
+
+    def __init__(self, max_phrase_length: int = 120, cache_size: int = 10000,
+                 max_results: int = 10, ranked_prefix_length: int = 3):
+        """
+        Initialize the index
+
+        Args:
+            max_phrase_length: Longer phrases are not indexed (they make poor suggestions)
+            cache_size: Number of prefixes whose results are cached
+            max_results: Largest number of suggestions returned (and cached) per prefix
+            ranked_prefix_length: Prefixes up to this length keep their top results
+                up to date instead of being ranked on demand
+        """
+        self.max_phrase_length = max_phrase_length
+        self.cache_size = cache_size
+        self.max_results = max_results
+        self.ranked_prefix_length = ranked_prefix_length
+
+        self._keys: List[str] = []
+        # Normalized phrase -> [display text, count]
+        self._phrases: Dict[str, list] = {}
+        # Short prefix -> keys of its best phrases, best first
+        self._ranked: Dict[str, List[str]] = {}
+        self._cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _normalize_phrase(self, phrase) -> tuple:
+        """(display text, index key) of a phrase, or None if it can't be indexed"""
+        if not isinstance(phrase, str):
+            return None
+        display = " ".join(phrase.split())
+        key = display.lower()
+        if not key or len(key) > self.max_phrase_length:
+            return None
+        return display, key
+
+    def _rank(self, key: str) -> tuple:
+        """Sort key of a phrase: most frequent first, then alphabetical"""
+        display, count = self._phrases[key]
+        return -count, display
+
+    def _add(self, display: str, key: str, count: int) -> bool:
+        """
+        Count a phrase and update the rankings it appears in (called with the lock held)
+
+        Returns:
+            True if the phrase is new (its key still has to go into the sorted list)
+        """
+        entry = self._phrases.get(key)
+        if entry is None:
+            self._phrases[key] = [display, count]
+        else:
+            entry[1] += count
+
+        # Only this phrase's count changed, so it is the only one that can enter
+        # or move up in the top results of its short prefixes
+        rank = self._rank(key)
+        for end in range(min(len(key), self.ranked_prefix_length) + 1):
+            top = self._ranked.setdefault(key[:end], [])
+            if key in top:
+                top.sort(key=self._rank)
+            elif len(top) < self.max_results:
+                top.append(key)
+                top.sort(key=self._rank)
+            elif rank < self._rank(top[-1]):
+                top[-1] = key
+                top.sort(key=self._rank)
+
+        # Cached results changed only for the longer prefixes of this phrase
+        if self._cache:
+            for end in range(self.ranked_prefix_length + 1, len(key) + 1):
+                self._cache.pop(key[:end], None)
+        return entry is None
+
+    def insert(self, phrase: str, count: int = 1) -> bool:
+        """
+        Add a phrase, or count another occurrence of it
+
+        Returns:
+            True if the phrase was indexed
+        """
+        normalized = self._normalize_phrase(phrase)
+        if normalized is None:
+            return False
+        display, key = normalized
+
+        with self._lock:
+            if self._add(display, key, count):
+                bisect.insort(self._keys, key)
+        return True
+
+    def insert_many(self, phrases: Iterable[str], count: int = 1) -> int:
+        """
+        Add many phrases at once (one sort instead of one insertion per phrase
+        when there are many new ones)
+
+        Returns:
+            Number of phrases indexed
+        """
+        indexed = 0
+        with self._lock:
+            new_keys = []
+            for phrase in phrases:
+                normalized = self._normalize_phrase(phrase)
+                if normalized is None:
+                    continue
+                display, key = normalized
+                if self._add(display, key, count):
+                    new_keys.append(key)
+                indexed += 1
+
+            if len(new_keys) <= INSORT_MAX_KEYS:
+                for key in new_keys:
+                    bisect.insort(self._keys, key)
+            else:
+                self._keys.extend(new_keys)
+                self._keys.sort()
+        return indexed
+
+    def search(self, prefix: str, limit: int = 5) -> List[str]:
+        """
+        Most frequent phrases starting with a prefix
+
+        Args:
+            prefix: Typed text (case and extra whitespace are ignored)
+            limit: Maximum number of suggestions
+
+        Returns:
+            Suggestions, most frequent first (none for a blank prefix)
+        """
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+        limit = min(limit, self.max_results)
+
+        with self._lock:
+            ranked = self._ranked.get(prefix) if len(prefix) <= self.ranked_prefix_length else None
+            if ranked is not None:
+                self.cache_hits += 1
+                return [self._phrases[key][0] for key in ranked[:limit]]
+
+            cached = self._cache.get(prefix)
+            if cached is not None:
+                self._cache.move_to_end(prefix)
+                self.cache_hits += 1
+                return cached[:limit]
+            self.cache_misses += 1
+
+            # All phrases starting with the prefix sort between these two bounds
+            # (the highest code point, so astral characters stay below it)
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_left(self._keys, prefix + chr(0x10FFFF), start)
+            best = heapq.nsmallest(
+                self.max_results,
+                (self._phrases[key] for key in self._keys[start:end]),
+                key=lambda entry: (-entry[1], entry[0])
+            )
+            results = [display for display, _ in best]
+
+            self._cache[prefix] = results
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return results[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        """Index size and result cache counters"""
+        return {
+            "phrases": len(self._keys),
+            "ranked_prefixes": len(self._ranked),
+            "cached_prefixes": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
@@ -0,0 +1,457 @@
+import os
+import glob
+import json
+import time
+import heapq
+import uuid
+import itertools
+import threading
+from typing import Dict, List, Optional
+
+from api.admission import PRIORITY_RANK
+from api.file_lock import try_lock, lock_holder, unlock
+
+# Rank of each account tier; higher tiers are served first among equal priorities
+TIER_RANK = {"free": 0, "basic": 0, "standard": 1, "premium": 2, "enterprise": 3}
+DEFAULT_TIER_RANK = TIER_RANK["standard"]
+
+# Queue states
+OPEN = "open"
+CLAIMED = "claimed"
+
+
+class QueueError(Exception):
+    """Raised for queue operations that conflict with a ticket's state or lease"""
+
+
+class TicketNotQueued(QueueError):
+    """Raised for operations on tickets that are not in the queue"""
+
+
+class QueueUnavailable(QueueError):
+    """Raised for operations on a persistent queue this process doesn't own"""
+
+
+class TicketQueue:
+    """
+    Live queue of open tickets, most urgent first.
+
+    Open tickets sit in a binary heap keyed by (priority rank, account tier,
+    age), so push, pop and claim are O(log n). Claiming a ticket leases it to
+    an agent; leases sit in a second heap by expiry and lapsed ones put the
+    ticket back in the queue. Heap entries are invalidated lazily (a ticket's
+    sequence number changes whenever it is requeued), so claiming a ticket by
+    ID does not need a heap search.
+
+    Every change is appended to a JSONL write-ahead log. snapshot() writes the
+    full state and starts a new log segment; recovery loads the latest
+    snapshot and replays the segments written after it. Log operations set
+    state rather than change it, so replaying one twice is harmless.
+
+    A persistent queue has a single owner process: recover() takes an
+    exclusive lock on the directory, and until it succeeds every operation
+    raises QueueUnavailable. Several API worker processes would otherwise each
+    keep their own heap and interleave writes to the same log and snapshot.
+    """
+
+    def __init__(self, directory: Optional[str] = None, lease_seconds: float = 300,
+                 fsync: bool = False):
+        """
+        Initialize the queue
+
+        Args:
+            directory: Directory of the write-ahead log and snapshots (None keeps
+                the queue in memory only)
+            lease_seconds: Default lease length of a claimed ticket
+            fsync: Sync the log to disk after every operation
+        """
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.fsync = fsync
+
+        # ticket_id -> ticket dict (fields, state, seq, lease)
+        self._tickets: Dict[str, dict] = {}
+        # (-priority rank, -tier rank, created, seq, ticket_id) of open tickets
+        self._heap: List[tuple] = []
+        # (expires, lease_id, ticket_id) of claimed tickets
+        self._leases: List[tuple] = []
+        self._sequence = itertools.count()
+        self._open = 0
+        self._lock = threading.Lock()
+
+        self._wal = None
+        self._generation = 0
+        # Lock file held while this process owns the directory
+        self._owner_lock = None
+
+        # Statistics
+        self.pushed = 0
+        self.claimed = 0
+        self.completed = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    @property
+    def owner(self) -> bool:
+        """Whether this process may change the queue (in-memory queues always may)"""
+        return self.directory is None or self._owner_lock is not None
+
+    def _check_owner(self) -> None:
+        if not self.owner:
+            raise QueueUnavailable(f"Queue in {self.directory} is not owned by this process")
+
+    # Write-ahead log
+
+    def _wal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"wal-{generation:06d}.jsonl")
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, "snapshot.jsonl")
+
+    def _lock_path(self) -> str:
+        return os.path.join(self.directory, "owner.lock")
+
+    def _open_wal(self, generation: int) -> None:
+        if self._wal is not None:
+            self._wal.close()
+        self._generation = generation
+        self._wal = open(self._wal_path(generation), "a", encoding="utf-8")
+
+    def _log(self, record: dict) -> None:
+        """Append an operation to the write-ahead log (called with the lock held)"""
+        if self._wal is None:
+            return
+        self._wal.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+
+    # State changes shared by live operations and log replay
+
+    def _enqueue(self, ticket: dict) -> None:
+        ticket["state"] = OPEN
+        ticket["lease_id"] = None
+        ticket["agent_id"] = None
+        ticket["lease_expires"] = None
+        ticket["seq"] = next(self._sequence)
+        self._open += 1
+        heapq.heappush(self._heap, (
+            -PRIORITY_RANK.get(ticket.get("priority"), PRIORITY_RANK["medium"]),
+            -TIER_RANK.get(str(ticket.get("account_tier") or "").lower(), DEFAULT_TIER_RANK),
+            ticket["created"],
+            ticket["seq"],
+            ticket["ticket_id"]
+        ))
+
+    def _apply(self, record: dict) -> None:
+        op = record["op"]
+        ticket = self._tickets.get(record["ticket_id"])
+        if op == "push":
+            if ticket is not None:
+                self._discard(ticket)
+            ticket = dict(record["ticket"])
+            self._tickets[ticket["ticket_id"]] = ticket
+            self._enqueue(ticket)
+        elif ticket is None:
+            return
+        elif op == "claim":
+            self._lease(ticket, record["agent_id"], record["lease_id"], record["lease_expires"])
+        elif op == "release":
+            if ticket["state"] == CLAIMED:
+                self._enqueue(ticket)
+        elif op == "complete":
+            self._discard(ticket)
+            del self._tickets[ticket["ticket_id"]]
+
+    def _discard(self, ticket: dict) -> None:
+        """Take a ticket out of the open count; its heap entry goes stale"""
+        if ticket["state"] == OPEN:
+            self._open -= 1
+        ticket["seq"] = None
+
+    def _lease(self, ticket: dict, agent_id: str, lease_id: str, expires: float) -> None:
+        self._discard(ticket)
+        ticket["state"] = CLAIMED
+        ticket["agent_id"] = agent_id
+        ticket["lease_id"] = lease_id
+        ticket["lease_expires"] = expires
+        heapq.heappush(self._leases, (expires, lease_id, ticket["ticket_id"]))
+
+    def _expire_leases(self, now: float) -> None:
+        """Requeue tickets whose lease has lapsed (called with the lock held)"""
+        while self._leases and self._leases[0][0] <= now:
+            _, lease_id, ticket_id = heapq.heappop(self._leases)
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None or ticket["state"] != CLAIMED or ticket["lease_id"] != lease_id:
+                # Completed, released or claimed again since
+                continue
+            self._log({"op": "release", "ticket_id": ticket_id, "reason": "expired"})
+            self._enqueue(ticket)
+            self.expired += 1
+
+    def _top(self) -> Optional[dict]:
+        """Most urgent open ticket, dropping stale heap entries (called with the lock held)"""
+        while self._heap:
+            *_, seq, ticket_id = self._heap[0]
+            ticket = self._tickets.get(ticket_id)
+            if ticket is not None and ticket["state"] == OPEN and ticket["seq"] == seq:
+                return ticket
+            heapq.heappop(self._heap)
+        return None
+
+    def _compact(self) -> None:
+        """Rebuild the heap when stale entries outnumber open tickets"""
+        if len(self._heap) > 2 * self._open + 1024:
+            self._heap = [
+                entry for entry in self._heap
+                if (ticket := self._tickets.get(entry[4])) is not None
+                and ticket["state"] == OPEN and ticket["seq"] == entry[3]
+            ]
+            heapq.heapify(self._heap)
+
+    @staticmethod
+    def view(ticket: dict) -> dict:
+        """Public fields of a ticket"""
+        return {key: value for key, value in ticket.items() if key != "seq"}
+
+    # Queue operations
+
+    def push(self, ticket: dict) -> None:
+        """
+        Add an open ticket
+
+        Args:
+            ticket: Ticket fields; needs ticket_id, and priority and account_tier
+                for ordering. created defaults to now.
+        """
+        self._check_owner()
+        ticket = dict(ticket)
+        ticket.setdefault("created", time.time())
+        with self._lock:
+            record = {"op": "push", "ticket_id": ticket["ticket_id"], "ticket": ticket}
+            self._log(record)
+            self._apply(record)
+            self.pushed += 1
+
+    def push_many(self, tickets: List[dict]) -> None:
+        """Add several open tickets"""
+        self._check_owner()
+        for ticket in tickets:
+            self.push(ticket)
+
+    def peek(self) -> Optional[dict]:
+        """Most urgent open ticket, without claiming it"""
+        self._check_owner()
+        with self._lock:
+            self._expire_leases(time.time())
+            ticket = self._top()
+            return self.view(ticket) if ticket is not None else None
+
+    def claim(self, agent_id: str, ticket_id: Optional[str] = None,
+              lease_seconds: Optional[float] = None) -> Optional[dict]:
+        """
+        Lease a ticket to an agent
+
+        Args:
+            agent_id: Agent taking the ticket
+            ticket_id: Ticket to claim, or None for the most urgent open ticket
+            lease_seconds: Lease length (default: the queue's lease_seconds)
+
+        Returns:
+            The claimed ticket with its lease_id and lease_expires, or None if
+            the queue is empty
+
+        Raises:
+            TicketNotQueued: If the requested ticket is not in the queue
+            QueueError: If the requested ticket is already claimed
+            QueueUnavailable: If another process owns the queue
+        """
+        self._check_owner()
+        now = time.time()
+        with self._lock:
+            self._expire_leases(now)
+            if ticket_id is None:
+                ticket = self._top()
+                if ticket is None:
+                    return None
+            else:
+                ticket = self._tickets.get(ticket_id)
+                if ticket is None:
+                    raise TicketNotQueued(f"Ticket {ticket_id} is not in the queue")
+                if ticket["state"] != OPEN:
+                    raise QueueError(f"Ticket {ticket_id} is already claimed by {ticket['agent_id']}")
+
+            record = {
+                "op": "claim",
+                "ticket_id": ticket["ticket_id"],
+                "agent_id": agent_id,
+                "lease_id": uuid.uuid4().hex[:12],
+                "lease_expires": now + (lease_seconds or self.lease_seconds),
+            }
+            self._log(record)
+            self._apply(record)
+            self.claimed += 1
+            self._compact()
+            return self.view(ticket)
+
+    def _check_lease(self, ticket_id: str, lease_id: str) -> dict:
+        ticket = self._tickets.get(ticket_id)
+        if ticket is None:
+            raise TicketNotQueued(f"Ticket {ticket_id} is not in the queue")
+        if ticket["state"] != CLAIMED or ticket["lease_id"] != lease_id:
+            raise QueueError(f"Lease {lease_id} on ticket {ticket_id} is no longer held")
+        return ticket
+
+    def complete(self, ticket_id: str, lease_id: str) -> dict:
+        """
+        Remove a claimed ticket from the queue
+
+        Raises:
+            TicketNotQueued: If the ticket is not in the queue
+            QueueError: If the lease was lost
+            QueueUnavailable: If another process owns the queue
+        """
+        self._check_owner()
+        with self._lock:
+            self._expire_leases(time.time())
+            ticket = self._check_lease(ticket_id, lease_id)
+            record = {"op": "complete", "ticket_id": ticket_id}
+            self._log(record)
+            self._apply(record)
+            self.completed += 1
+            return self.view(ticket)
+
+    def release(self, ticket_id: str, lease_id: str) -> dict:
+        """
+        Give a claimed ticket back to the queue
+
+        Raises:
+            TicketNotQueued: If the ticket is not in the queue
+            QueueError: If the lease was lost
+            QueueUnavailable: If another process owns the queue
+        """
+        self._check_owner()
+        with self._lock:
+            self._expire_leases(time.time())
+            ticket = self._check_lease(ticket_id, lease_id)
+            record = {"op": "release", "ticket_id": ticket_id}
+            self._log(record)
+            self._apply(record)
+            return self.view(ticket)
+
+    # Persistence
+
+    def recover(self) -> int:
+        """
+        Take ownership of the queue directory, load the latest snapshot and
+        replay the write-ahead log after it, then start a new log segment
+
+        Returns:
+            Number of tickets in the queue
+
+        Raises:
+            QueueUnavailable: If another process owns the queue directory
+        """
+        if self.directory is None:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        if self._owner_lock is None:
+            self._owner_lock = try_lock(self._lock_path())
+            if self._owner_lock is None:
+                raise QueueUnavailable(
+                    f"Queue in {self.directory} is owned by process {lock_holder(self._lock_path())}"
+                )
+        with self._lock:
+            generation = 0
+            path = self._snapshot_path()
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    header = json.loads(f.readline())
+                    generation = header["generation"]
+                    for line in f:
+                        ticket = json.loads(line)
+                        state = ticket.pop("state")
+                        self._apply({"op": "push", "ticket_id": ticket["ticket_id"], "ticket": ticket})
+                        if state == CLAIMED:
+                            self._apply({
+                                "op": "claim", "ticket_id": ticket["ticket_id"],
+                                "agent_id": ticket["agent_id"], "lease_id": ticket["lease_id"],
+                                "lease_expires": ticket["lease_expires"],
+                            })
+
+            # Segments written since the snapshot, oldest first
+            latest = generation
+            for wal_path in sorted(glob.glob(os.path.join(self.directory, "wal-*.jsonl"))):
+                segment = int(os.path.basename(wal_path)[4:10])
+                latest = max(latest, segment)
+                if segment < generation:
+                    continue
+                with open(wal_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # Torn final line from a crash
+                            break
+                        self._apply(record)
+
+            self._open_wal(latest + 1)
+            self._expire_leases(time.time())
+            return len(self._tickets)
+
+    def snapshot(self) -> bool:
+        """
+        Write the full queue state and drop the log segments it covers
+
+        Returns:
+            True if a snapshot was written
+        """
+        if self.directory is None or self._wal is None:
+            return False
+        with self._lock:
+            # Later operations go to a new segment; they are replayed on top of the snapshot
+            generation = self._generation + 1
+            self._open_wal(generation)
+            tickets = [dict(ticket) for ticket in self._tickets.values()]
+
+        path = self._snapshot_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"generation": generation, "tickets": len(tickets)}) + "\n")
+            for ticket in tickets:
+                ticket.pop("seq", None)
+                f.write(json.dumps(ticket, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        for wal_path in glob.glob(os.path.join(self.directory, "wal-*.jsonl")):
+            if int(os.path.basename(wal_path)[4:10]) < generation:
+                os.remove(wal_path)
+        return True
+
+    def close(self) -> None:
+        """Close the write-ahead log and give up ownership of the directory"""
+        with self._lock:
+            if self._wal is not None:
+                self._wal.close()
+                self._wal = None
+            unlock(self._owner_lock)
+            self._owner_lock = None
+
+    def stats(self) -> Dict[str, object]:
+        """Queue depth and operation counters"""
+        with self._lock:
+            return {
+                "owner": self.owner,
+                "open": self._open,
+                "claimed": len(self._tickets) - self._open,
+                "heap_entries": len(self._heap),
+                "pushed": self.pushed,
+                "claimed_total": self.claimed,
+                "completed": self.completed,
+                "expired_leases": self.expired,
+                "wal_segment": self._generation,
+            }
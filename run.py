@@ -27,12 +27,16 @@ def main():
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
     # Setup command - preprocess data and train models
-    setup_parser = subparsers.add_parser("setup", help="Preprocess data and train models")
+    setup_parser = subparsers.add_parser("setup", help="Fetch NLTK data, preprocess data and train models")
+    setup_parser.add_argument("--workers", "-w", type=int, default=None,
+                              help="Worker processes for preprocessing (default: one per CPU core)")
     
     # API command - run the API server
     api_parser = subparsers.add_parser("api", help="Run the API server")
     api_parser.add_argument("--host", default="0.0.0.0", help="Host to bind the server to")
     api_parser.add_argument("--port", "-p", type=int, default=8000, help="Port to bind the server to")
+    api_parser.add_argument("--workers", "-w", type=int, default=1,
+                            help="Number of API worker processes (models are memory-mapped and shared)")
     
     # Frontend command - run the frontend server
     frontend_parser = subparsers.add_parser("frontend", help="Run the frontend server")
@@ -61,13 +65,28 @@ def main():
     # Handle commands
     if args.command == "setup":
         print("Setting up the system...")
-        run_command(f"python {root_dir}/scripts/preprocess.py")
+        run_command(f"python {root_dir}/scripts/download_nltk_data.py")
+        command = f"python {root_dir}/scripts/preprocess.py"
+        if args.workers:
+            command += f" --workers {args.workers}"
+        run_command(command)
         run_command(f"python {root_dir}/scripts/train_models.py")
         print("\nSetup completed!")
         
     elif args.command == "api":
         print(f"Starting API server on {args.host}:{args.port}...")
-        run_command(f"python -m uvicorn api.main:app --host {args.host} --port {args.port}", cwd=root_dir)
+        command = f"python -m uvicorn api.main:app --host {args.host} --port {args.port}"
+        if args.workers > 1:
+            print(f"Using {args.workers} workers with memory-mapped models")
+            command += f" --workers {args.workers}"
+            # Workers map the same model files instead of each holding a copy,
+            # and split the cores between their inference thread pools
+            os.environ.setdefault("MODEL_MMAP", "1")
+            os.environ.setdefault("INFERENCE_THREADS", str(max(1, (os.cpu_count() or 1) // args.workers)))
+            # The live queue lives in one process; workers can't share it
+            if os.environ.setdefault("LIVE_QUEUE", "0") == "0":
+                print("Live ticket queue disabled (it needs a single worker)")
+        run_command(command, cwd=root_dir)
         
     elif args.command == "frontend":
         print(f"Starting frontend server on port {args.port}...")
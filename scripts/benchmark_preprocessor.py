@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path to import utils
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.data_loader import DataLoader, detect_text_column
+from utils.preprocessor import TextPreprocessor
+
+# Inputs exercising the corner cases of the NLTK tokenizer
+EDGE_CASES = [
+    "I cannot log in, and I'm gonna lose my work!!!",
+    "Wanna know why error 0x80070005 keeps popping up? Gimme a fix, lemme know. Gotta go",
+    "E-mail sync fails: user@example.com -> 404 (not found)",
+    "Version 2.3.1 broke the __init__ hook; can't_continue",
+    "Multiple   spaces\tand\nnewlines ... and dashes -- here.",
+    "\"Quoted\" text, 'single quotes' and «guillemets» — with “smart” quotes",
+    "It's the users' files that weren't synced; they'd said they'll retry",
+    "Le système ne me permet pas de me connecter avec mon mot de passe habituel.",
+    "我无法更改我的个人资料照片，每次尝试都会收到错误信息",
+    "CANNOT CONNECT. Cannot connect! cannot.",
+    "12345 !!! ???",
+    "",
+]
+
+def load_corpus(data_dir):
+    """
+    Ticket texts from the datasets in the data directory plus the edge cases
+
+    Args:
+        data_dir: Directory containing the datasets
+
+    Returns:
+        List of texts
+    """
+    texts = list(EDGE_CASES)
+    for name, df in DataLoader(data_dir).load_all_datasets().items():
+        text_column = detect_text_column(df.columns)
+        if text_column:
+            texts.extend(df[text_column].dropna().astype(str).tolist())
+    return texts
+
+def time_passes(preprocess, texts, repeat):
+    """Seconds taken by `repeat` passes of preprocess over the texts"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            preprocess(text)
+    return time.perf_counter() - start
+
+def main():
+    """
+    Check the fast preprocessor against the NLTK chain on a golden corpus and
+    compare their throughput
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the text preprocessor")
+    parser.add_argument("--data-dir", "-d", help="Directory containing the datasets (default: data/)")
+    parser.add_argument("--repeat", "-r", type=int, default=20, help="Passes over the corpus per implementation")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or os.path.join(Path(__file__).resolve().parent.parent, "data")
+    texts = load_corpus(data_dir)
+    print(f"Corpus: {len(texts)} texts")
+
+    # Golden check: both implementations must produce the same tokens
+    reference = TextPreprocessor()
+    fast = TextPreprocessor()
+    mismatches = [
+        (text, expected, actual)
+        for text in texts
+        if (expected := reference.preprocess_nltk(text)) != (actual := fast.preprocess(text))
+    ]
+    if mismatches:
+        print(f"{len(mismatches)} text(s) preprocessed differently:")
+        for text, expected, actual in mismatches[:10]:
+            print(f"  text:     {text!r}\n  nltk:     {expected!r}\n  fast:     {actual!r}")
+        return 1
+    print("Golden check passed: identical output on every text")
+
+    # Throughput, each implementation starting from a fresh preprocessor
+    tokens = sum(len(fast.tokenize(text)) for text in texts) * args.repeat
+    results = {}
+    for name, preprocessor, preprocess in (
+        ("nltk", reference, "preprocess_nltk"),
+        ("fast", TextPreprocessor(), "preprocess"),
+    ):
+        seconds = time_passes(getattr(preprocessor, preprocess), texts, args.repeat)
+        results[name] = seconds
+        print(f"{name}: {tokens / seconds:,.0f} tokens/sec "
+              f"({len(texts) * args.repeat / seconds:,.0f} texts/sec)")
+
+    print(f"Speedup: {results['nltk'] / results['fast']:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,10 +9,30 @@ import pandas as pd
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from utils.model import TicketClassifier
+from utils.data_loader import detect_text_column
 from utils.preprocessor import TextPreprocessor, MultilingualPreprocessor
+from utils.language_detector import LanguageDetector, AUTO_LANGUAGE
 
-def process_single_ticket(text, language="en", model_dir=None):
-    """Process a single ticket and print predictions"""
+DATA_DIR = os.path.join(Path(__file__).resolve().parent.parent, "data")
+
+# Language detector, trained on first use and reused for every ticket
+_language_detector = None
+
+def get_language_detector():
+    """Language detector trained on the datasets, built once per process"""
+    global _language_detector
+    if _language_detector is None:
+        _language_detector = LanguageDetector.from_datasets(DATA_DIR)
+    return _language_detector
+
+def process_single_ticket(text, language=AUTO_LANGUAGE, model_dir=None, detector=None):
+    """Process a single ticket and print predictions (detector: trained LanguageDetector to reuse)"""
+    # Detect the language if it wasn't given
+    if language == AUTO_LANGUAGE:
+        detector = detector or get_language_detector()
+        language = detector.detect(text)
+        print(f"Detected language: {language}")
+    
     # Initialize preprocessor and model
     preprocessor = TextPreprocessor() if language == "en" else MultilingualPreprocessor()
     
@@ -39,12 +59,13 @@ def process_single_ticket(text, language="en", model_dir=None):
     print("\nPrediction Results:")
     print("-" * 50)
     print(f"Text: {text}")
+    print(f"Language: {language}")
     print(f"Category: {predictions.get('category', ['unknown'])[0]}")
     print(f"Priority: {predictions.get('priority', ['medium'])[0]}")
     print("-" * 50)
 
-def process_file(file_path, output_path=None, model_dir=None):
-    """Process tickets from a CSV or JSON file"""
+def process_file(file_path, output_path=None, model_dir=None, detector=None):
+    """Process tickets from a CSV or JSON file (detector: trained LanguageDetector to reuse)"""
     # Determine file type
     if file_path.endswith('.csv'):
         # Load CSV
@@ -57,18 +78,18 @@ def process_file(file_path, output_path=None, model_dir=None):
         return
     
     # Check if we have text field
-    text_field = None
-    for field in ['text', 'description', 'subject']:
-        if field in df.columns:
-            text_field = field
-            break
+    text_field = detect_text_column(df.columns)
     
     if text_field is None:
         print(f"No text field found in the file. Available columns: {', '.join(df.columns)}")
         return
     
-    # Initialize language 
+    # Use the language column where it's filled in, detect the language otherwise
     has_language = 'language' in df.columns
+    languages = df['language'].tolist() if has_language else [AUTO_LANGUAGE] * len(df)
+    if any(not isinstance(language, str) or language == AUTO_LANGUAGE for language in languages):
+        detector = detector or get_language_detector()
+        languages = detector.resolve(df[text_field].tolist(), languages)
     
     # Initialize model
     if model_dir is None:
@@ -92,9 +113,9 @@ def process_file(file_path, output_path=None, model_dir=None):
     df['predicted_category'] = 'unknown'
     df['predicted_priority'] = 'medium'
     
-    for i, row in df.iterrows():
+    for position, (i, row) in enumerate(df.iterrows()):
         text = row[text_field]
-        language = row['language'] if has_language else 'en'
+        language = languages[position]
         
         # Preprocess text
         if language == 'en':
@@ -110,8 +131,8 @@ def process_file(file_path, output_path=None, model_dir=None):
         df.at[i, 'predicted_priority'] = predictions.get('priority', ['medium'])[0]
         
         # Print progress
-        if i % 10 == 0:
-            print(f"Processed {i+1}/{len(df)} tickets")
+        if position % 10 == 0:
+            print(f"Processed {position+1}/{len(df)} tickets")
     
     # Save results
     if output_path is None:
@@ -149,7 +170,8 @@ def main():
     # Predict command
     predict_parser = subparsers.add_parser("predict", help="Predict category and priority for a single ticket")
     predict_parser.add_argument("text", help="Ticket text to classify")
-    predict_parser.add_argument("--language", "-l", default="en", help="Language of the ticket (default: en)")
+    predict_parser.add_argument("--language", "-l", default=AUTO_LANGUAGE,
+                                help="Language of the ticket (default: detected from the text)")
     predict_parser.add_argument("--model-dir", "-m", help="Directory containing trained models")
     
     # Process file command
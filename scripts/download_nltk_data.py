@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import utils
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.preprocessor import NLTK_DATA_DIR, download_nltk_resources
+
+def main():
+    """
+    Download the NLTK resources used by the preprocessors into the project's
+    nltk_data directory, so the API and scripts start without network access
+    """
+    print(f"Fetching NLTK resources into {NLTK_DATA_DIR}...")
+    missing = download_nltk_resources()
+    
+    if missing:
+        print(f"Could not download: {', '.join(missing)}")
+        return 1
+    
+    print("NLTK resources are available")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
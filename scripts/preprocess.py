@@ -1,26 +1,45 @@
 import os
 import sys
+import time
+import argparse
 import pandas as pd
 from pathlib import Path
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from utils.data_loader import DataLoader
-from utils.preprocessor import TextPreprocessor, MultilingualPreprocessor
+from utils.data_loader import DataLoader, detect_text_column
+from utils.preprocessor import TextPreprocessor, MultilingualPreprocessor, DEFAULT_CHUNK_SIZE
+from utils.preprocess_cache import PreprocessCache
+
+# File the preprocessed texts of earlier runs are kept in, inside the data directory
+CACHE_FILE = "preprocess_cache.sqlite"
 
 def main():
     """
     Preprocess all datasets in the data directory
     """
+    parser = argparse.ArgumentParser(description="Preprocess the datasets in the data directory")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per CPU core)")
+    parser.add_argument("--chunk-size", "-c", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows per chunk handed to a worker (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--cache", help=f"Preprocessing cache file (default: data/{CACHE_FILE})")
+    parser.add_argument("--no-cache", action="store_true", help="Preprocess every row again")
+    args = parser.parse_args()
+    
     print("Starting data preprocessing...")
+    print(f"Using {args.workers} worker(s), {args.chunk_size} rows per chunk")
     
     # Initialize data loader
     data_dir = os.path.join(Path(__file__).resolve().parent.parent, "data")
     loader = DataLoader(data_dir)
     
-    # Load datasets
-    datasets = loader.load_all_datasets()
+    # Load datasets, leaving out the output of earlier runs
+    datasets = {
+        name: df for name, df in loader.load_all_datasets().items()
+        if not name.startswith("processed_") and name != "combined_dataset.csv"
+    }
     
     if not datasets:
         print("No datasets found in the data directory")
@@ -32,6 +51,12 @@ def main():
     text_preprocessor = TextPreprocessor()
     multilingual_preprocessor = MultilingualPreprocessor()
     
+    # Rows preprocessed by an earlier run are read back from the cache
+    cache = None
+    if not args.no_cache:
+        cache = PreprocessCache(args.cache or os.path.join(data_dir, CACHE_FILE))
+        print(f"Using preprocessing cache {cache.path} ({len(cache)} entries)")
+    
     # Process each dataset
     processed_datasets = {}
     
@@ -51,11 +76,7 @@ def main():
         print(f"Columns: {', '.join(df.columns)}")
         
         # Determine text column
-        text_column = None
-        for col in ['text', 'description', 'subject']:
-            if col in df.columns:
-                text_column = col
-                break
+        text_column = detect_text_column(df.columns)
         
         if not text_column:
             print(f"No text column found in dataset {name}, skipping")
@@ -64,14 +85,26 @@ def main():
         print(f"Using '{text_column}' as text column")
         
         # Preprocess text data
+        start = time.perf_counter()
+        hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
         if has_language:
             print("Using multilingual preprocessor")
             processed_df = multilingual_preprocessor.preprocess_df(
-                df, text_column=text_column, language_column='language'
+                df, text_column=text_column, language_column='language',
+                workers=args.workers, chunk_size=args.chunk_size, cache=cache
             )
         else:
             print("Using English preprocessor")
-            processed_df = text_preprocessor.preprocess_df(df, text_column)
+            processed_df = text_preprocessor.preprocess_df(
+                df, text_column, workers=args.workers, chunk_size=args.chunk_size, cache=cache
+            )
+        elapsed = time.perf_counter() - start
+        print(f"Preprocessed {len(df)} rows in {elapsed:.2f}s "
+              f"({len(df) / elapsed if elapsed > 0 else 0.0:,.0f} rows/sec)")
+        if cache is not None:
+            hits, misses = cache.hits - hits, cache.misses - misses
+            print(f"Cache: {hits} hits, {misses} misses "
+                  f"({hits / (hits + misses) if hits + misses else 0.0:.1%} hit rate)")
         
         # Save processed dataset
         processed_name = f"processed_{name}"
@@ -103,6 +136,13 @@ def main():
         except Exception as e:
             print(f"Error combining datasets: {e}")
     
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\nPreprocessing cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate), {stats['writes']} entries added, "
+              f"{len(cache)} in total")
+        cache.close()
+    
     print("\nPreprocessing completed successfully")
 
 if __name__ == "__main__":
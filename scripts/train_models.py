@@ -9,14 +9,14 @@ from sklearn.model_selection import train_test_split
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from utils.model import TicketClassifier
-from utils.transformer_model import TransformerTicketClassifier
 
-def main(use_transformer=False):
+def main(use_transformer=False, shared_features=False):
     """
     Train classification models on the processed data
     
     Args:
         use_transformer: Whether to use transformer models instead of traditional ML
+        shared_features: Whether both traditional models share one TF-IDF vectorizer
     """
     print("Starting model training...")
     
@@ -98,10 +98,13 @@ def main(use_transformer=False):
     # Initialize classifier
     if use_transformer:
         print("Using transformer-based models")
+        from utils.transformer_model import TransformerTicketClassifier
         classifier = TransformerTicketClassifier(model_dir)
     else:
         print("Using traditional ML models")
-        classifier = TicketClassifier(model_dir)
+        if shared_features:
+            print("Sharing one TF-IDF vocabulary between the category and priority models")
+        classifier = TicketClassifier(model_dir, shared_features=shared_features)
     
     # Train models
     if has_category:
@@ -153,4 +156,5 @@ def main(use_transformer=False):
 if __name__ == "__main__":
     # Check if we should use transformer models
     use_transformer = "--transformer" in sys.argv
-    main(use_transformer) 
\ No newline at end of file
+    shared_features = "--shared-features" in sys.argv
+    main(use_transformer, shared_features) 
\ No newline at end of file
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from api.admission import AdmissionController, Overloaded, urgency_score
+
+
+def test_urgency_score_matches_whole_words():
+    assert urgency_score("Production outage!") == 3
+    assert urgency_score("The export keeps crashing") == 2
+    assert urgency_score("Download the report") == 1
+    assert urgency_score("系统紧急故障") == 3
+
+
+def test_waiters_are_admitted_most_urgent_first():
+    async def run():
+        controller = AdmissionController({"predict": 1}, latency_budget_ms=1000)
+        order = []
+        await controller.acquire("predict")
+
+        async def request(name, score):
+            async with controller.admit("predict", score):
+                order.append(name)
+
+        tasks = [asyncio.ensure_future(request(name, score))
+                 for name, score in [("low", 0), ("critical", 3), ("medium", 1)]]
+        await asyncio.sleep(0.01)
+        controller.release("predict")
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["critical", "medium", "low"]
+
+
+def test_full_queue_sheds_the_request():
+    async def run():
+        controller = AdmissionController({"predict": 1}, max_queue=1, latency_budget_ms=1000)
+        await controller.acquire("predict")
+        waiter = asyncio.ensure_future(controller.acquire("predict", 1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire("predict", 1)
+        assert shed.value.reason == "queue_full"
+        waiter.cancel()
+        return controller.stats()["predict"]["shed"]
+
+    assert asyncio.run(run()) == {"queue_full": 1}
+
+
+def test_urgent_request_preempts_a_lower_waiter():
+    async def run():
+        controller = AdmissionController({"predict": 1}, max_queue=1, latency_budget_ms=1000)
+        await controller.acquire("predict")
+        low = asyncio.ensure_future(controller.acquire("predict", 0))
+        await asyncio.sleep(0.01)
+        urgent = asyncio.ensure_future(controller.acquire("predict", 3))
+        await asyncio.sleep(0.01)
+        controller.release("predict")
+        await urgent
+        with pytest.raises(Overloaded) as shed:
+            await low
+        return shed.value.reason
+
+    assert asyncio.run(run()) == "preempted"
+
+
+def test_request_waiting_past_the_budget_is_shed():
+    async def run():
+        controller = AdmissionController({"predict": 1}, latency_budget_ms=20)
+        await controller.acquire("predict")
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire("predict")
+        return shed.value, controller.queue_depth("predict")
+
+    shed, depth = asyncio.run(run())
+    assert shed.reason == "timeout"
+    assert shed.retry_after >= 1
+    assert depth == 0
+
+
+def test_estimated_wait_over_the_budget_is_shed_at_once():
+    async def run():
+        controller = AdmissionController({"predict": 1}, latency_budget_ms=100)
+        # A request that held its slot for a second
+        await controller.acquire("predict")
+        controller.release("predict", service_time=1.0)
+        await controller.acquire("predict")
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire("predict")
+        return shed.value.reason
+
+    assert asyncio.run(run()) == "latency_budget"
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from api.batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, texts, languages, processed_texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise ValueError("model error")
+        return [{"text": text, "language": language, "processed": processed}
+                for text, language, processed in zip(texts, languages, processed_texts)]
+
+
+async def submit_all(batcher, texts):
+    await batcher.start()
+    try:
+        return await asyncio.gather(*(batcher.submit(text, "en") for text in texts))
+    finally:
+        await batcher.stop()
+
+
+def test_concurrent_requests_share_a_batch():
+    predict = Recorder()
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=50)
+    results = asyncio.run(submit_all(batcher, [f"t{i}" for i in range(5)]))
+
+    assert [result["text"] for result in results] == [f"t{i}" for i in range(5)]
+    assert predict.calls == [[f"t{i}" for i in range(5)]]
+    stats = batcher.stats()
+    assert stats["total_batches"] == 1
+    assert stats["total_requests"] == 5
+
+
+def test_batches_are_capped_at_max_batch_size():
+    predict = Recorder()
+    batcher = MicroBatcher(predict, max_batch_size=2, max_wait_ms=50)
+    asyncio.run(submit_all(batcher, [f"t{i}" for i in range(5)]))
+
+    assert [len(call) for call in predict.calls] == [2, 2, 1]
+    assert batcher.max_batch_seen == 2
+
+
+def test_batch_error_reaches_every_request():
+    batcher = MicroBatcher(Recorder(fail=True), max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(t) for t in ["a", "b"]), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
+
+
+def test_preprocessed_text_is_passed_through():
+    batcher = MicroBatcher(Recorder(), max_wait_ms=1)
+
+    async def run():
+        await batcher.start()
+        try:
+            return await batcher.submit("Raw text", "fr", processed_text="raw text")
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == {"text": "Raw text", "language": "fr", "processed": "raw text"}
+
+
+def test_unstarted_batcher_predicts_directly():
+    predict = Recorder()
+    result = asyncio.run(MicroBatcher(predict).submit("t"))
+    assert result["text"] == "t"
+    assert predict.calls == [["t"]]
+
+
+def test_stop_fails_queued_requests():
+    async def run():
+        batcher = MicroBatcher(Recorder(), max_wait_ms=1000)
+        await batcher.start()
+        pending = asyncio.ensure_future(batcher.submit("t"))
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        return pending
+
+    pending = asyncio.run(run())
+    with pytest.raises(RuntimeError):
+        pending.result()
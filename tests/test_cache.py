@@ -0,0 +1,54 @@
+import time
+
+from api.cache import PredictionCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_entries_expire():
+    cache = PredictionCache(ttl_s=0.01)
+    cache.put("a", 1)
+    assert cache.peek("a") == 1
+    time.sleep(0.02)
+
+    assert cache.peek("a") is None
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_peek_leaves_order_and_counters_alone():
+    cache = PredictionCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.peek("a") == 1
+    cache.put("c", 3)
+
+    assert cache.peek("a") is None
+    assert cache.hits == cache.misses == 0
+
+
+def test_zero_size_disables_the_cache():
+    cache = PredictionCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert not cache.enabled
+
+
+def test_keys_with_a_new_model_fingerprint_miss():
+    # Predictions are keyed by model fingerprint, so a reload invalidates them
+    cache = PredictionCache()
+    cache.put(("raw", "printer jammed", "en", "model-a"), {"priority": "low"})
+    assert cache.get(("raw", "printer jammed", "en", "model-b")) is None
+    assert cache.get(("raw", "printer jammed", "en", "model-a")) == {"priority": "low"}
@@ -0,0 +1,83 @@
+import numpy as np
+
+from api.dedup import DuplicateIndex, shingles
+
+BASE = ("printer on the third floor keeps jamming whenever someone prints a long report "
+        "from the finance shared drive and nobody can clear it")
+PREDICTION = {"category": "hardware", "priority": "medium"}
+
+
+def jaccard(a, b, size=3):
+    a, b = set(shingles(a, size)), set(shingles(b, size))
+    return len(a & b) / len(a | b)
+
+
+def test_short_texts_still_get_a_shingle():
+    assert len(shingles("vpn down")) == 1
+    assert shingles("!!!") == []
+
+
+def test_signature_similarity_estimates_jaccard():
+    index = DuplicateIndex(num_perm=256, bands=32)
+    other = BASE.replace("report", "spreadsheet").replace("finance", "sales")
+    estimate = np.mean(index.signature(BASE) == index.signature(other))
+    assert abs(estimate - jaccard(BASE, other)) < 0.1
+
+
+def test_near_duplicate_above_the_threshold_joins_the_cluster():
+    index = DuplicateIndex(threshold=0.8)
+    index.add("T1", BASE, PREDICTION, fingerprint="model-a")
+    near = BASE.replace("clear it", "clear it today")
+    assert jaccard(BASE, near) >= 0.85
+
+    match = index.query(near)
+    assert match["duplicate_of"] == "T1"
+    assert match["similarity"] >= 0.8
+    assert match["prediction"] == PREDICTION
+    assert match["fingerprint"] == "model-a"
+
+    index.add("T2", near, PREDICTION, duplicate_of=match["duplicate_of"])
+    assert index.cluster_size("T1") == 2
+    assert index.largest_clusters() == [{"duplicate_of": "T1", "tickets": 2}]
+
+
+def test_similar_ticket_below_the_threshold_is_not_a_duplicate():
+    index = DuplicateIndex(threshold=0.8)
+    index.add("T1", BASE, PREDICTION)
+    words = BASE.split()
+    # Every fourth word changed, so most shingles differ
+    partial = " ".join(word if i % 4 else "x" + word for i, word in enumerate(words))
+    assert jaccard(BASE, partial) < 0.5
+
+    assert index.query(partial) is None
+    assert index.query("cannot reset my password from the login page") is None
+
+
+def test_strict_threshold_rejects_a_near_duplicate():
+    index = DuplicateIndex(threshold=0.99)
+    index.add("T1", BASE, PREDICTION)
+    assert index.query(BASE.replace("clear it", "clear it today")) is None
+    assert index.query(BASE)["similarity"] == 1.0
+
+
+def test_oldest_tickets_are_dropped_when_full():
+    index = DuplicateIndex(max_entries=2)
+    index.add("T1", BASE, PREDICTION)
+    index.add("T2", "cannot reset my password from the login page", PREDICTION)
+    index.add("T3", "vpn disconnects every few minutes on the office wifi", PREDICTION)
+
+    assert len(index) == 2
+    assert index.query(BASE) is None
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "dedup.npz")
+    index = DuplicateIndex()
+    index.add("T1", BASE, PREDICTION, fingerprint="model-a")
+    assert index.save(path)
+    assert not index.save(path)
+
+    restored = DuplicateIndex()
+    assert restored.load(path) == 1
+    assert restored.query(BASE)["duplicate_of"] == "T1"
+    assert DuplicateIndex(num_perm=32, bands=8).load(path) == 0
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.language_detector import LanguageDetector, script_language
+
+SAMPLES = {
+    "en": ["The app crashes on startup", "I cannot reset my password"],
+    "fr": ["Je ne peux pas me connecter", "Où est ma facture ?"],
+    "de": ["Das Programm stürzt ab", "Ich kann mich nicht anmelden"],
+    "es": ["El sistema no funciona", "No puedo iniciar sesión", "¿Dónde está mi factura?"],
+    "it": ["Il programma si blocca", "Non riesco ad accedere"],
+    "pt": ["O sistema não funciona", "Não consigo entrar na conta", "Esqueci minha senha"],
+    "nl": ["Ik kan niet inloggen", "Het scherm blijft zwart"],
+    "sv": ["Jag kan inte logga in", "Skärmen förblir svart"],
+    "da": ["Jeg kan ikke logge ind", "Jeg har glemt min adgangskode"],
+    "no": ["Programmet krasjer hele tiden", "Skjermen forblir svart"],
+    "fi": ["En voi kirjautua sisään", "Näyttö pysyy mustana"],
+}
+
+
+@pytest.fixture(scope="module")
+def detector(tmp_path_factory):
+    # No datasets: the profiles come from the seed words and sentences alone
+    return LanguageDetector.from_datasets(str(tmp_path_factory.mktemp("no-datasets")))
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_short_tickets_are_detected(detector, language):
+    assert detector.detect_batch(SAMPLES[language]) == [language] * len(SAMPLES[language])
+
+
+def test_detect_matches_detect_batch(detector):
+    texts = [text for samples in SAMPLES.values() for text in samples]
+    assert [detector.detect(text) for text in texts] == detector.detect_batch(texts)
+
+
+def test_scripts_identify_their_language(detector):
+    assert script_language("打印机无法连接") == "zh"
+    assert detector.detect_batch(["ログインできません", "로그인이 안 됩니다", "Не могу войти в систему"]) == ["ja", "ko", "ru"]
+
+
+def test_short_or_empty_text_gets_the_default(detector):
+    assert detector.detect("PDF export") == "en"
+    assert detector.detect("PDF export", default="fr") == "fr"
+    assert detector.detect_batch(["", None, "1234"], default="de") == ["de", "de", "de"]
+
+
+def test_resolve_keeps_given_languages_and_defaults_to_the_batch_language(detector):
+    texts = ["Le programme plante", "VPN", "Das Programm stürzt ab"]
+    assert detector.resolve(texts, ["fr", "auto", None]) == ["fr", "fr", "de"]
+    assert detector.resolve(texts, ["fr", "auto", "auto"], default="en") == ["fr", "en", "de"]
+    assert detector.resolve(["VPN"], ["auto"]) == ["en"]
+
+
+def test_untrained_detector_only_uses_scripts():
+    detector = LanguageDetector()
+    assert detector.detect_batch(["Das Programm stürzt ab", "打印机无法连接"]) == ["en", "zh"]
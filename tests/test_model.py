@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import utils.model
+from utils.model import TicketClassifier
+
+TEXTS = pd.Series([
+    "printer jammed paper tray", "printer offline again", "login password reset",
+    "password expired login", "vpn connection drops", "vpn slow connection",
+    "invoice missing payment", "payment failed card",
+])
+
+
+def test_priority_features_are_the_heaviest_terms(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.model, "PRIORITY_MAX_FEATURES", 5)
+    model = TicketClassifier(str(tmp_path), shared_features=True)
+    model.fit_shared_vectorizer(TEXTS)
+
+    features = model.vectorizer.transform(TEXTS)
+    weight = np.asarray(features.sum(axis=0)).ravel()
+    assert len(model.priority_features) == 5
+    assert weight[model.priority_features].min() >= np.delete(weight, model.priority_features).max()
+
+
+def test_priority_rows_are_unit_length(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.model, "PRIORITY_MAX_FEATURES", 5)
+    model = TicketClassifier(str(tmp_path), shared_features=True)
+    model.fit_shared_vectorizer(TEXTS)
+
+    _, priority_input = model._model_inputs(["printer password vpn payment"])
+    assert np.isclose(np.sqrt(priority_input.multiply(priority_input).sum()), 1.0)
+
+
+def test_fingerprint_changes_with_the_saved_models(tmp_path):
+    model = TicketClassifier(str(tmp_path))
+    model.create_dummy_models()
+    model.save_models()
+    first = model.fingerprint
+
+    model.train_category_model(TEXTS, pd.Series(["bug", "bug", "query", "query"] * 2))
+    model.save_models()
+    assert model.fingerprint != first
+
+    reloaded = TicketClassifier(str(tmp_path))
+    assert reloaded.load_models()
+    assert reloaded.fingerprint == model.fingerprint
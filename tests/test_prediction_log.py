@@ -0,0 +1,132 @@
+import os
+import time
+
+from api.prediction_log import SegmentedLogWriter
+
+COLUMNS = ["ticket_id", "category", "priority"]
+
+
+def make_writer(log_dir, columns=COLUMNS, **kwargs):
+    return SegmentedLogWriter(str(log_dir), columns, prefix="predictions", fsync="never",
+                              flush_interval_ms=10000, **kwargs)
+
+
+def record(i):
+    return {"ticket_id": f"T{i}", "category": "bug", "priority": "high"}
+
+
+def read_lines(path):
+    with open(path, "rb") as f:
+        return f.read().split(b"\r\n")
+
+
+def test_records_are_written_in_order(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.append_many([record(i) for i in range(5)])
+    writer.flush()
+    assert [r["ticket_id"] for r in writer.iter_records()] == [f"T{i}" for i in range(5)]
+    writer.close()
+
+
+def test_restart_resumes_the_newest_segment(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.append(record(1))
+    writer.close()
+
+    writer = make_writer(tmp_path)
+    writer.append(record(2))
+    writer.close()
+
+    segments = writer.segments()
+    assert len(segments) == 1
+    lines = read_lines(segments[0])
+    assert lines.count(b"ticket_id,category,priority") == 1
+    assert [r["ticket_id"] for r in writer.iter_records()] == ["T1", "T2"]
+
+
+def test_torn_last_record_is_cut_off_on_resume(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.append(record(1))
+    writer.close()
+    with open(writer.segments()[0], "ab") as f:
+        f.write(b"T2,bu")
+
+    writer = make_writer(tmp_path)
+    writer.append(record(3))
+    writer.close()
+
+    assert [r["ticket_id"] for r in writer.iter_records()] == ["T1", "T3"]
+
+
+def test_resumed_segment_keeps_its_age(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.append(record(1))
+    writer.close()
+    path = writer.segments()[0]
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    writer = make_writer(tmp_path, max_segment_age_s=60)
+    writer.append(record(2))
+    writer.close()
+
+    assert len(writer.segments()) == 2
+
+
+def test_segment_with_other_columns_is_not_resumed(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.append(record(1))
+    writer.close()
+
+    writer = make_writer(tmp_path, columns=COLUMNS + ["account_tier"])
+    writer.append(dict(record(2), account_tier="premium"))
+    writer.close()
+
+    segments = writer.segments()
+    assert len(segments) == 2
+    assert read_lines(segments[1])[0] == b"ticket_id,category,priority,account_tier"
+
+
+def test_concurrent_writers_never_share_a_segment(tmp_path):
+    first = make_writer(tmp_path)
+    second = make_writer(tmp_path)
+    first.append(record(1))
+    first.flush()
+    second.append(record(2))
+    second.flush()
+    first.close()
+    second.close()
+
+    segments = first.segments()
+    assert len(segments) == 2
+    for path in segments:
+        assert read_lines(path).count(b"ticket_id,category,priority") == 1
+
+
+def test_rotates_when_a_segment_is_full(tmp_path):
+    writer = make_writer(tmp_path, max_segment_bytes=100)
+    for i in range(10):
+        writer.append(record(i))
+        writer.flush()
+    writer.close()
+
+    assert len(writer.segments()) > 1
+    assert [r["ticket_id"] for r in writer.iter_records()] == [f"T{i}" for i in range(10)]
+
+
+def test_legacy_log_is_imported_once(tmp_path):
+    legacy = tmp_path / "predictions.csv"
+    legacy.write_text("ticket_id,category,priority\nT1,bug,low\nT2,query,medium\n", encoding="utf-8")
+    log_dir = tmp_path / "predictions"
+
+    writer = make_writer(log_dir)
+    assert writer.import_legacy(str(legacy)) == 2
+    writer.append(record(3))
+    writer.close()
+
+    writer = make_writer(log_dir)
+    assert writer.import_legacy(str(legacy)) == 0
+    writer.close()
+
+    assert [r["ticket_id"] for r in writer.iter_records()] == ["T1", "T2", "T3"]
+    assert legacy.exists()
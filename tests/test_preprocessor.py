@@ -0,0 +1,64 @@
+import nltk
+import pytest
+from nltk.tokenize import NLTKWordTokenizer
+
+from utils.preprocessor import (
+    NLTK_RESOURCES, STRIP_PATTERN, CJKPreprocessor, TextPreprocessor,
+    pipeline_language, replay_worker_timings
+)
+
+SAMPLES = [
+    "I cannot log in since the update!!",
+    "Gonna need help: error #404 on page 3...",
+    "The app won't start; I wanna cancel my subscription.",
+    "Printer_01 jammed, can't print PDFs (again)",
+    "Résumé upload fails — café menu not loading",
+    "gimme  a\tbreak\nplease, lemme know",
+    "",
+    "1234 !!! ???",
+]
+
+
+def nltk_data_installed():
+    for path in NLTK_RESOURCES.values():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            return False
+    return True
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_tokenize_matches_the_nltk_chain(text):
+    # Tokenizing needs no NLTK data, so skip building the stopword and lemma tables
+    preprocessor = TextPreprocessor.__new__(TextPreprocessor)
+    cleaned = STRIP_PATTERN.sub("", text.lower())
+    assert preprocessor.tokenize(text) == NLTKWordTokenizer().tokenize(cleaned)
+
+
+@pytest.mark.skipif(not nltk_data_installed(), reason="NLTK data not installed")
+@pytest.mark.parametrize("text", SAMPLES)
+def test_preprocess_matches_preprocess_nltk(text):
+    preprocessor = TextPreprocessor()
+    assert preprocessor.preprocess(text) == preprocessor.preprocess_nltk(text)
+
+
+def test_pipeline_language():
+    assert pipeline_language("zh-CN") == "zh"
+    assert pipeline_language("PT_br") == "pt"
+    assert pipeline_language("xx") == "en"
+    assert pipeline_language(None) == "en"
+
+
+def test_cjk_text_is_split_into_bigrams():
+    assert CJKPreprocessor().preprocess("系统崩溃 VPN") == "系统 统崩 崩溃 vpn"
+    assert CJKPreprocessor().preprocess("好") == "好"
+
+
+def test_worker_timings_are_replayed_in_chunk_order():
+    chunks = [(["a", "b"], [("en", 2, 0.1)]), (["c"], [("fr", 1, 0.2)])]
+    seen = []
+    processed = list(replay_worker_timings(chunks, lambda *timing: seen.append(timing)))
+    assert processed == [["a", "b"], ["c"]]
+    assert seen == [("en", 2, 0.1), ("fr", 1, 0.2)]
+    assert list(replay_worker_timings(chunks, None)) == [["a", "b"], ["c"]]
@@ -0,0 +1,34 @@
+from api.suggestions import PrefixIndex
+
+
+def make_index():
+    index = PrefixIndex()
+    index.insert_many([
+        "Reset my password", "Reset my password", "Reset two-factor authentication",
+        "Refund request", "VPN not connecting",
+    ])
+    return index
+
+
+def test_suggestions_are_ranked_by_frequency():
+    index = make_index()
+    assert index.search("re") == ["Reset my password", "Refund request", "Reset two-factor authentication"]
+    assert index.search("RESET   T") == ["Reset two-factor authentication"]
+    assert index.search("reset", limit=1) == ["Reset my password"]
+
+
+def test_blank_query_has_no_suggestions():
+    index = make_index()
+    assert index.search("") == []
+    assert index.search("   ") == []
+
+
+def test_prefix_range_covers_characters_outside_the_bmp():
+    index = PrefixIndex()
+    index.insert_many(["Deploy \U0001F680 failed", "Deploy stuck"])
+    assert sorted(index.search("deploy ")) == ["Deploy stuck", "Deploy \U0001F680 failed"]
+    assert index.search("deploy \U0001F680") == ["Deploy \U0001F680 failed"]
+
+
+def test_no_match():
+    assert make_index().search("printer") == []
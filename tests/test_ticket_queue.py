@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from api.ticket_queue import QueueError, QueueUnavailable, TicketNotQueued, TicketQueue
+
+
+def ticket(ticket_id, priority="medium", account_tier="standard", created=None):
+    return {
+        "ticket_id": ticket_id,
+        "priority": priority,
+        "account_tier": account_tier,
+        "created": created if created is not None else time.time(),
+    }
+
+
+def open_queue(directory, **kwargs):
+    queue = TicketQueue(str(directory), **kwargs)
+    queue.recover()
+    return queue
+
+
+def test_claims_by_priority_then_tier_then_age():
+    queue = TicketQueue()
+    queue.push_many([
+        ticket("low", priority="low", created=1),
+        ticket("old", created=2),
+        ticket("new", created=3),
+        ticket("enterprise", account_tier="enterprise", created=4),
+        ticket("critical", priority="critical", created=5),
+    ])
+    claimed = [queue.claim("agent")["ticket_id"] for _ in range(5)]
+    assert claimed == ["critical", "enterprise", "old", "new", "low"]
+    assert queue.claim("agent") is None
+
+
+def test_claim_by_id():
+    queue = TicketQueue()
+    queue.push(ticket("T1"))
+    assert queue.claim("agent", ticket_id="T1")["agent_id"] == "agent"
+    with pytest.raises(QueueError):
+        queue.claim("other", ticket_id="T1")
+    with pytest.raises(TicketNotQueued):
+        queue.claim("agent", ticket_id="missing")
+
+
+def test_lapsed_lease_requeues_the_ticket():
+    queue = TicketQueue()
+    queue.push(ticket("T1"))
+    lease = queue.claim("agent", lease_seconds=0.01)
+    time.sleep(0.02)
+
+    assert queue.peek()["ticket_id"] == "T1"
+    with pytest.raises(QueueError):
+        queue.complete("T1", lease["lease_id"])
+    assert queue.stats()["expired_leases"] == 1
+
+
+def test_release_and_complete():
+    queue = TicketQueue()
+    queue.push(ticket("T1"))
+    lease = queue.claim("agent")
+    queue.release("T1", lease["lease_id"])
+    lease = queue.claim("agent")
+    queue.complete("T1", lease["lease_id"])
+    assert len(queue) == 0
+
+
+def test_write_ahead_log_is_replayed(tmp_path):
+    queue = open_queue(tmp_path)
+    queue.push_many([ticket("T1", created=1), ticket("T2", created=2), ticket("T3", created=3)])
+    lease = queue.claim("agent")
+    queue.complete(lease["ticket_id"], lease["lease_id"])
+    claimed = queue.claim("agent")
+    queue.close()
+
+    queue = open_queue(tmp_path)
+    assert len(queue) == 2
+    assert queue.peek()["ticket_id"] == "T3"
+    # The lease survives the restart
+    queue.complete(claimed["ticket_id"], claimed["lease_id"])
+    queue.close()
+
+
+def test_snapshot_then_log_is_replayed(tmp_path):
+    queue = open_queue(tmp_path)
+    queue.push_many([ticket("T1", created=1), ticket("T2", created=2)])
+    assert queue.snapshot()
+    queue.push(ticket("T3", priority="high", created=3))
+    queue.close()
+
+    queue = open_queue(tmp_path)
+    assert len(queue) == 3
+    assert queue.claim("agent")["ticket_id"] == "T3"
+    queue.close()
+    assert len(list(tmp_path.glob("wal-*.jsonl"))) == 2
+
+
+def test_torn_log_line_is_ignored(tmp_path):
+    queue = open_queue(tmp_path)
+    queue.push(ticket("T1"))
+    queue.close()
+    wal = sorted(tmp_path.glob("wal-*.jsonl"))[-1]
+    with open(wal, "a", encoding="utf-8") as f:
+        f.write('{"op":"push","ticket_id":"T2","tic')
+
+    queue = open_queue(tmp_path)
+    assert len(queue) == 1
+    queue.close()
+
+
+def test_directory_has_a_single_owner(tmp_path):
+    owner = open_queue(tmp_path)
+    other = TicketQueue(str(tmp_path))
+    with pytest.raises(QueueUnavailable):
+        other.recover()
+    with pytest.raises(QueueUnavailable):
+        other.push(ticket("T1"))
+    assert not other.owner
+
+    owner.close()
+    other.recover()
+    assert other.owner
+    other.close()
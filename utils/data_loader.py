@@ -1,7 +1,26 @@
 import os
 import json
 import pandas as pd
-from typing import Dict, List, Union, Optional
+from typing import Dict, Iterable, List, Union, Optional
+
+# Columns that may hold the ticket text, in order of preference
+TEXT_COLUMNS = ['text', 'description', 'subject']
+
+def detect_text_column(columns: Iterable[str]) -> Optional[str]:
+    """
+    Pick the column holding the ticket text
+    
+    Args:
+        columns: Available column names
+        
+    Returns:
+        The first of TEXT_COLUMNS present, or None
+    """
+    columns = set(columns)
+    for column in TEXT_COLUMNS:
+        if column in columns:
+            return column
+    return None
 
 class DataLoader:
     def __init__(self, data_dir: str):
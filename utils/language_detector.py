@@ -0,0 +1,493 @@
+import re
+import time
+import numpy as np
+import scipy.sparse as sp
+from collections import Counter
+from nltk.corpus import stopwords
+from typing import Dict, Iterable, List, Optional
+
+from utils.data_loader import DataLoader, detect_text_column
+from utils.preprocessor import LANGUAGE_PIPELINES
+
+# Language assumed when a text gives nothing to go on
+DEFAULT_LANGUAGE = "en"
+
+# Language value asking for the language to be detected
+AUTO_LANGUAGE = "auto"
+
+# Characters of a text looked at; the language is clear well before that
+MAX_CHARS = 300
+
+# Longest character n-gram counted
+MAX_NGRAM = 3
+
+# Runs of letters (no digits or underscores)
+LETTERS = re.compile(r"[^\W\d_]+")
+
+# Fewest letters an alphabetic text needs to be scored; shorter ones ("VPN
+# issue", "PDF export") are mostly product names and get the default language
+MIN_LETTERS = 10
+
+# Lead in log-likelihood per n-gram the best language needs over the
+# runner-up; closer calls get the default language
+MIN_MARGIN_PER_NGRAM = 0.03
+
+# Scripts that identify a language on their own: (language, characters,
+# share of the text's letters they must make up). Japanese mixes kana
+# with Han characters, so it is checked before Chinese and counts both.
+HAN = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+SCRIPTS = [
+    ("ja", re.compile("[\u3040-\u30ff]"), re.compile(f"[\u3040-\u30ff{HAN}]"), 0.3),
+    ("ko", re.compile("[\uac00-\ud7af\u1100-\u11ff]"), re.compile("[\uac00-\ud7af\u1100-\u11ff]"), 0.3),
+    ("zh", re.compile(f"[{HAN}]"), re.compile(f"[{HAN}]"), 0.3),
+    ("ru", re.compile("[\u0400-\u04ff]"), re.compile("[\u0400-\u04ff]"), 0.5),
+]
+SCRIPT_LANGUAGES = {language for language, _, _, _ in SCRIPTS}
+
+# Frequent words of each alphabetic language, so every supported language has
+# a profile even when the datasets hold few (or no) tickets in it. The lists
+# cover the same ground in every language (function words, then support
+# vocabulary) so no profile is much thinner than the others.
+SEED_WORDS = {
+    "en": (
+        "the and to of a in is it you that for not my on with this can have be are was please "
+        "help account login password error when every time since update file does working "
+        "after from will but system program crashes doesn't work cannot sign screen page app "
+        "email payment order issue problem again still need how why"
+    ),
+    "fr": (
+        "le la les de des du et est un une pas je ne que pour dans sur avec mon mes vous il "
+        "nous compte mot passe erreur connexion chaque fois quand depuis mise jour fichier "
+        "fonctionne après plus mais cette être système programme plante page commande "
+        "paiement facture écran problème encore besoin comment pourquoi ai au aux"
+    ),
+    "de": (
+        "der die das und ist nicht ich ein eine zu mit sich auf den dem für mein meine sie "
+        "wir kann konto passwort fehler anmelden jedes mal wenn seit aktualisierung datei "
+        "funktioniert nach aber wird noch programm stürzt ab system seite bitte hilfe kein "
+        "keine geht immer wieder problem bestellung zahlung rechnung bildschirm wie warum "
+        "habe hat sind"
+    ),
+    "es": (
+        "el la los las de y que en un una no es por con para mi mis se lo puedo cuenta "
+        "contraseña error ayuda acceder desde cada vez cuando actualización archivo funciona "
+        "después pero está este esta sistema programa página pedido pago factura pantalla "
+        "problema otra todavía necesito cómo por qué tengo hay al del sesión iniciar"
+    ),
+    "it": (
+        "il la le di che e non un una per con mi mio sono è del della gli ho posso account "
+        "accedere errore aiuto dopo ogni volta quando da aggiornamento file funziona ma "
+        "questo questa si sistema programma si blocca pagina ordine pagamento fattura schermo "
+        "problema ancora bisogno come perché al alla nel"
+    ),
+    "pt": (
+        "o a os as de e que não um uma para com meu minha em do da é no na conta senha erro "
+        "ajuda acessar consigo cada vez quando desde atualização arquivo funciona depois mas "
+        "está este sistema programa travando página pedido pagamento fatura tela problema "
+        "ainda preciso como por que tenho ao dos"
+    ),
+    "nl": (
+        "de het een en van ik niet is dat op te met voor mijn zijn er kan account wachtwoord "
+        "fout inloggen hulp elke keer als sinds update bestand werkt na maar wordt systeem "
+        "programma crasht pagina bestelling betaling factuur scherm probleem nog steeds nodig "
+        "hoe waarom heb geen"
+    ),
+    "sv": (
+        "och att det som en är på inte jag för med har av till kan min mitt konto lösenord "
+        "fel logga in hjälp varje gång när sedan uppdateringen filen fungerar efter men blir "
+        "systemet programmet kraschar sidan beställning betalning faktura skärmen problem "
+        "fortfarande behöver hur varför"
+    ),
+    "da": (
+        "og at det en er på ikke jeg for med har af til kan min mit konto adgangskode fejl "
+        "logge ind hjælp hver gang når siden opdateringen filen virker efter men bliver "
+        "systemet programmet går ned bestilling betaling faktura skærmen problem stadig brug "
+        "for hvordan hvorfor"
+    ),
+    "no": (
+        "og at det en er på ikke jeg for med har av til kan min mitt konto passord feil logge "
+        "inn hjelp hver gang når siden oppdateringen filen fungerer etter men blir systemet "
+        "programmet krasjer bestilling betaling faktura skjermen problem fortsatt trenger "
+        "hvordan hvorfor"
+    ),
+    "fi": (
+        "ja on ei se että en voi minun tili salasana virhe kirjautua sisään apua kanssa mutta "
+        "tämä kun ole joka kerta päivityksen jälkeen tiedosto toimi järjestelmä ohjelma "
+        "kaatuu sivu tilaus maksu lasku näyttö ongelma edelleen tarvitsen miten miksi minä "
+        "olen"
+    ),
+}
+
+# The same short support requests in each language; they add the word order
+# and inflections a bag of words lacks
+SEED_SENTENCES = {
+    "en": (
+        "I can't log in to my account. The page keeps loading forever. We were charged twice "
+        "this month. Could you please send me the invoice? The mobile app freezes when I open "
+        "settings. Nothing happens when I click the button. The system is not responding and "
+        "the server has been down since yesterday. The invoice was never sent and the order "
+        "is still open."
+    ),
+    "fr": (
+        "Je n'arrive pas à ouvrir mon compte. La page se charge sans fin. Nous avons été "
+        "facturés deux fois ce mois-ci. Pourriez-vous m'envoyer la facture ? L'application "
+        "mobile se bloque quand j'ouvre les paramètres. Rien ne se passe quand je clique sur "
+        "le bouton. Le système ne répond pas et le serveur est en panne depuis hier. La "
+        "facture n'a jamais été envoyée et la commande est toujours ouverte."
+    ),
+    "de": (
+        "Ich komme nicht in mein Konto. Die Seite lädt ewig. Wir wurden diesen Monat zweimal "
+        "belastet. Könnten Sie mir bitte die Rechnung schicken? Die mobile App friert ein, "
+        "wenn ich die Einstellungen öffne. Es passiert nichts, wenn ich auf den Knopf klicke. "
+        "Das System reagiert nicht und der Server ist seit gestern ausgefallen. Die Rechnung "
+        "wurde nie verschickt und die Bestellung ist noch offen."
+    ),
+    "es": (
+        "No consigo entrar en mi cuenta. La página se queda cargando para siempre. Nos han "
+        "cobrado dos veces este mes. ¿Podrían enviarme la factura, por favor? La aplicación "
+        "móvil se congela cuando abro la configuración. No pasa nada cuando hago clic en el "
+        "botón. El sistema no responde y el servidor no funciona desde ayer. La factura nunca "
+        "se envió y el pedido sigue abierto."
+    ),
+    "it": (
+        "Non riesco a entrare nel mio account. La pagina continua a caricare all'infinito. Ci "
+        "hanno addebitato due volte questo mese. Potreste inviarmi la fattura, per favore? "
+        "L'app mobile si blocca quando apro le impostazioni. Non succede niente quando clicco "
+        "sul pulsante. Il sistema non risponde e il server non funziona da ieri. La fattura "
+        "non è mai stata inviata e l'ordine è ancora aperto."
+    ),
+    "pt": (
+        "Não consigo entrar na minha conta. A página fica carregando para sempre. Fomos "
+        "cobrados duas vezes este mês. Vocês podem me enviar a fatura, por favor? O "
+        "aplicativo trava quando abro as configurações. Nada acontece quando clico no botão. "
+        "O sistema não responde e o servidor está fora do ar desde ontem. A fatura nunca foi "
+        "enviada e o pedido continua aberto."
+    ),
+    "nl": (
+        "Ik kom niet in mijn account. De pagina blijft eindeloos laden. We zijn deze maand "
+        "twee keer belast. Kunt u mij alstublieft de factuur sturen? De mobiele app loopt "
+        "vast als ik de instellingen open. Er gebeurt niets als ik op de knop klik. Het "
+        "systeem reageert niet en de server ligt sinds gisteren plat. De factuur is nooit "
+        "verstuurd en de bestelling staat nog open."
+    ),
+    "sv": (
+        "Jag kommer inte in på mitt konto. Sidan laddar i all oändlighet. Vi har debiterats "
+        "två gånger den här månaden. Kan ni skicka fakturan till mig? Mobilappen fryser när "
+        "jag öppnar inställningarna. Ingenting händer när jag klickar på knappen. Systemet "
+        "svarar inte och servern har legat nere sedan igår. Fakturan skickades aldrig och "
+        "beställningen är fortfarande öppen."
+    ),
+    "da": (
+        "Jeg kan ikke komme ind på min konto. Siden bliver ved med at indlæse. Vi er blevet "
+        "opkrævet to gange i denne måned. Kan I sende mig fakturaen? Mobilappen fryser, når "
+        "jeg åbner indstillingerne. Der sker ikke noget, når jeg klikker på knappen. Systemet "
+        "svarer ikke, og serveren har været nede siden i går. Fakturaen blev aldrig sendt, og "
+        "bestillingen er stadig åben."
+    ),
+    "no": (
+        "Jeg kommer ikke inn på kontoen min. Siden fortsetter å laste i det uendelige. Vi har "
+        "blitt belastet to ganger denne måneden. Kan dere sende meg fakturaen? Mobilappen "
+        "fryser når jeg åpner innstillingene. Ingenting skjer når jeg klikker på knappen. "
+        "Systemet svarer ikke, og serveren har vært nede siden i går. Fakturaen ble aldri "
+        "sendt, og bestillingen er fortsatt åpen."
+    ),
+    "fi": (
+        "En pääse tililleni. Sivu latautuu loputtomasti. Meiltä veloitettiin kahdesti tässä "
+        "kuussa. Voisitteko lähettää minulle laskun? Mobiilisovellus jumittuu, kun avaan "
+        "asetukset. Mitään ei tapahdu, kun napsautan painiketta. Järjestelmä ei vastaa ja "
+        "palvelin on ollut alhaalla eilisestä lähtien. Laskua ei koskaan lähetetty ja tilaus "
+        "on yhä auki."
+    ),
+}
+
+
+def char_ngrams(text: str, max_chars: Optional[int] = MAX_CHARS) -> List[str]:
+    """
+    Character 1- to MAX_NGRAM-grams of the lowercased words of a text, with word boundaries
+
+    Args:
+        text: Text to split
+        max_chars: Characters of the text looked at (None for all of them)
+
+    Returns:
+        The n-grams, in order
+    """
+    grams = []
+    for word in LETTERS.findall(text[:max_chars].lower()):
+        padded = f" {word} "
+        for size in range(1, MAX_NGRAM + 1):
+            grams.extend(padded[i:i + size] for i in range(len(padded) - size + 1))
+    # A lone space carries no information
+    return [gram for gram in grams if gram != " "]
+
+
+def letter_count(text: str) -> int:
+    """Letters in the part of a text the detector looks at"""
+    return sum(len(run) for run in LETTERS.findall(text[:MAX_CHARS]))
+
+
+def script_language(text: str) -> Optional[str]:
+    """Language given away by the script of a text (CJK, Cyrillic), if any"""
+    sample = text[:MAX_CHARS]
+    letters = letter_count(sample)
+    if not letters:
+        return None
+    for language, marker, characters, share in SCRIPTS:
+        if marker.search(sample) and len(characters.findall(sample)) >= share * letters:
+            return language
+    return None
+
+
+class LanguageDetector:
+    """
+    Offline language identification from character n-gram profiles.
+
+    Texts written in a script that belongs to one language (kana, Hangul,
+    Han, Cyrillic) are identified by their characters. Other texts are
+    scored by a multinomial naive Bayes model over character 1- to 3-grams
+    (with a uniform prior, so a corpus that is mostly English doesn't drown
+    out the other languages): each language's profile holds the smoothed log-probability of every
+    n-gram, so scoring a batch is a single sparse-dense product of the
+    batch's n-gram counts and the profile matrix.
+
+    A text gets the default language instead of its best-scoring one when it
+    is too short to tell, or when the best language isn't ahead of the
+    runner-up by a margin that grows with the number of n-grams scored.
+    """
+
+    def __init__(self, alpha: float = 0.5, max_features: int = 20000,
+                 default_language: str = DEFAULT_LANGUAGE, min_letters: int = MIN_LETTERS,
+                 min_margin: float = MIN_MARGIN_PER_NGRAM):
+        """
+        Initialize the detector
+
+        Args:
+            alpha: Additive smoothing of the n-gram counts
+            max_features: Largest number of n-grams kept (most frequent first)
+            default_language: Language returned for texts that can't be told
+            min_letters: Fewest letters a text needs to be scored
+            min_margin: Log-likelihood lead per n-gram the best language needs
+                over the runner-up
+        """
+        self.alpha = alpha
+        self.max_features = max_features
+        self.default_language = default_language
+        self.min_letters = min_letters
+        self.min_margin = min_margin
+
+        self.languages: List[str] = []
+        self._vocabulary: Dict[str, int] = {}
+        # n-grams x languages log-probabilities
+        self._profiles: Optional[np.ndarray] = None
+
+    @property
+    def trained(self) -> bool:
+        return bool(self.languages)
+
+    def fit(self, texts: Iterable[str], languages: Iterable[str]) -> "LanguageDetector":
+        """
+        Build the n-gram profiles
+
+        Args:
+            texts: Training texts
+            languages: Language (ISO code) of each text
+
+        Returns:
+            The detector
+        """
+        counts: Dict[str, Counter] = {}
+        for text, language in zip(texts, languages):
+            if isinstance(text, str):
+                # Region subtags don't change the language ('zh-CN' -> 'zh')
+                language = str(language).strip().lower().replace("_", "-").split("-")[0]
+                # Languages with a script of their own are identified by it
+                # Training texts are counted whole; a seed list is far longer
+                # than the part of a ticket that gets scored
+                if language not in SCRIPT_LANGUAGES:
+                    counts.setdefault(language, Counter()).update(char_ngrams(text, max_chars=None))
+
+        self.languages = sorted(counts)
+        totals = Counter()
+        for grams in counts.values():
+            totals.update(grams)
+        self._vocabulary = {
+            gram: i for i, (gram, _) in enumerate(totals.most_common(self.max_features))
+        }
+
+        matrix = np.zeros((len(self._vocabulary), len(self.languages)), dtype=np.float64)
+        for column, language in enumerate(self.languages):
+            for gram, count in counts[language].items():
+                row = self._vocabulary.get(gram)
+                if row is not None:
+                    matrix[row, column] = count
+        matrix += self.alpha
+        self._profiles = (np.log(matrix) - np.log(matrix.sum(axis=0))).astype(np.float32)
+        return self
+
+    def _indices(self, text: str) -> List[int]:
+        """Profile rows of a text's n-grams (none if the text is too short to score)"""
+        if letter_count(text) < self.min_letters:
+            return []
+        vocabulary = self._vocabulary
+        return [i for i in map(vocabulary.get, char_ngrams(text)) if i is not None]
+
+    def _choose(self, scores: np.ndarray, ngrams: np.ndarray, default: str) -> List[str]:
+        """
+        Best language of each row of scores, or the default language where it
+        doesn't lead the runner-up by min_margin per n-gram
+        """
+        best = np.argmax(scores, axis=1)
+        if scores.shape[1] < 2:
+            return [self.languages[i] for i in best]
+        top_two = np.partition(scores, -2, axis=1)[:, -2:]
+        confident = top_two[:, 1] - top_two[:, 0] >= self.min_margin * ngrams
+        return [
+            self.languages[i] if sure else default
+            for i, sure in zip(best, confident)
+        ]
+
+    def detect(self, text: str, default: Optional[str] = None) -> str:
+        """
+        Language of a text
+
+        Args:
+            text: Ticket text
+            default: Language returned if it can't be told (the detector's
+                default language if None)
+
+        Returns:
+            ISO language code
+        """
+        default = default or self.default_language
+        if not isinstance(text, str):
+            return default
+        language = script_language(text)
+        if language is not None:
+            return language
+        if not self.trained:
+            return default
+        indices = self._indices(text)
+        if not indices:
+            return default
+        scores = self._profiles[indices].sum(axis=0, keepdims=True)
+        return self._choose(scores, np.array([len(indices)]), default)[0]
+
+    def detect_batch(self, texts: List[str], default: Optional[str] = None) -> List[str]:
+        """
+        Languages of many texts, scored together
+
+        Args:
+            texts: Ticket texts
+            default: Language of the texts that can't be told (the detector's
+                default language if None)
+
+        Returns:
+            One ISO language code per text
+        """
+        default = default or self.default_language
+        results = [default] * len(texts)
+        rows, columns = [], []
+        for position, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            language = script_language(text)
+            if language is not None:
+                results[position] = language
+            elif self.trained:
+                indices = self._indices(text)
+                rows.extend([position] * len(indices))
+                columns.extend(indices)
+
+        if rows:
+            # n-gram counts of the whole batch times the profiles
+            counts = sp.csr_matrix(
+                (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+                shape=(len(texts), len(self._vocabulary))
+            )
+            scored = np.unique(rows)
+            scores = np.asarray(counts @ self._profiles)[scored]
+            ngrams = np.bincount(rows, minlength=len(texts))[scored]
+            for position, language in zip(scored, self._choose(scores, ngrams, default)):
+                results[position] = language
+        return results
+
+    def resolve(self, texts: List[str], languages: List[Optional[str]],
+                default: Optional[str] = None) -> List[str]:
+        """
+        Languages with every missing or 'auto' entry detected from its text
+
+        Args:
+            texts: Ticket texts
+            languages: Given language of each text (None, '' or 'auto' if unknown)
+            default: Language of the texts that can't be told. If None, the
+                language most of the given entries have, so a short ticket in
+                a French batch stays French; the detector's default language
+                if no entry has one.
+
+        Returns:
+            One ISO language code per text
+        """
+        pending = [
+            i for i, language in enumerate(languages)
+            if not isinstance(language, str) or language in ("", AUTO_LANGUAGE)
+        ]
+        if not pending:
+            return list(languages)
+        if default is None:
+            given = Counter(
+                language for language in languages
+                if isinstance(language, str) and language not in ("", AUTO_LANGUAGE)
+            )
+            default = given.most_common(1)[0][0] if given else self.default_language
+        languages = list(languages)
+        for i, language in zip(pending, self.detect_batch([texts[i] for i in pending], default)):
+            languages[i] = language
+        return languages
+
+    @classmethod
+    def from_datasets(cls, data_dir: str, max_texts_per_language: int = 1000,
+                      **kwargs) -> "LanguageDetector":
+        """
+        Train a detector on the datasets in a directory that have a language
+        column, the seed words and sentences and the NLTK stopword lists of the supported
+        languages where those are installed
+
+        Args:
+            data_dir: Directory containing the datasets
+            max_texts_per_language: Training texts taken per language
+            **kwargs: Passed to the constructor
+
+        Returns:
+            Trained detector
+        """
+        start = time.perf_counter()
+        texts, languages = [], []
+        taken = Counter()
+        for df in DataLoader(data_dir).load_all_datasets().values():
+            text_column = detect_text_column(df.columns)
+            if not text_column or "language" not in df.columns:
+                continue
+            for text, language in zip(df[text_column], df["language"]):
+                if isinstance(text, str) and isinstance(language, str) \
+                        and taken[language] < max_texts_per_language:
+                    texts.append(text)
+                    languages.append(language)
+                    taken[language] += 1
+
+        for seeds in (SEED_WORDS, SEED_SENTENCES):
+            for language, text in seeds.items():
+                texts.append(text)
+                languages.append(language)
+        # Stopwords are the most frequent words of a language, a good profile seed
+        try:
+            for language, (name, kind) in LANGUAGE_PIPELINES.items():
+                if name is not None:
+                    texts.append(" ".join(stopwords.words(name)))
+                    languages.append(language)
+        except (LookupError, OSError):
+            pass
+
+        detector = cls(**kwargs).fit(texts, languages)
+        print(f"Language detector trained on {len(texts)} texts in {len(detector.languages)} languages "
+              f"in {time.perf_counter() - start:.2f}s")
+        return detector
@@ -1,4 +1,6 @@
 import os
+import time
+import hashlib
 import numpy as np
 import pandas as pd
 import joblib
@@ -8,27 +10,128 @@ from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.multiclass import OneVsRestClassifier
 from sklearn.svm import LinearSVC
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, accuracy_score, f1_score
-from sklearn.preprocessing import LabelEncoder
+from sklearn.preprocessing import LabelEncoder, normalize
+
+# Feature budgets of the two heads
+CATEGORY_MAX_FEATURES = 10000
+PRIORITY_MAX_FEATURES = 5000
+
+# Most cross-validation folds used to calibrate the category head
+CALIBRATION_FOLDS = 3
+
+
+def category_classifier(y_encoded: np.ndarray):
+    """
+    Classifier of the category head: a LinearSVC whose margins are calibrated
+    into probabilities (sigmoid fit on held-out folds), so confidences can be
+    compared against a threshold. Falls back to an uncalibrated one-vs-rest
+    LinearSVC when a category has fewer than two tickets to split into folds.
+    """
+    smallest = int(np.bincount(y_encoded).min())
+    if smallest < 2:
+        return OneVsRestClassifier(LinearSVC(C=1.0))
+    return CalibratedClassifierCV(
+        LinearSVC(C=1.0), method='sigmoid', cv=min(CALIBRATION_FOLDS, smallest)
+    )
 
 class TicketClassifier:
-    def __init__(self, model_dir: str):
+    def __init__(self, model_dir: str, shared_features: bool = False):
         """
         Initialize the ticket classifier
         
         Args:
             model_dir: Directory to save/load models
+            shared_features: Train both heads on one shared TF-IDF vocabulary so each
+                text is vectorized once (the priority head uses a subset of its columns)
         """
         self.model_dir = model_dir
+        self.shared_features = shared_features
         self.category_model = None
         self.priority_model = None
         self.category_encoder = LabelEncoder()
         self.priority_encoder = LabelEncoder()
         
+        # Shared-feature mode: one vectorizer plus the columns the priority head uses
+        self.vectorizer = None
+        self.priority_features = None
+        
+        # Identifies the loaded artifacts (changes whenever models are saved or reloaded)
+        self.fingerprint = None
+        
         # Create model directory if it doesn't exist
         os.makedirs(model_dir, exist_ok=True)
     
+    def artifact_paths(self) -> List[str]:
+        """Paths of the model artifacts this classifier saves and loads"""
+        return [
+            os.path.join(self.model_dir, name)
+            for name in ['category_model.pkl', 'category_encoder.pkl',
+                         'priority_model.pkl', 'priority_encoder.pkl',
+                         'feature_extractor.pkl']
+        ]
+    
+    def compute_fingerprint(self) -> str:
+        """
+        Compute a short hash of the model artifacts on disk
+        
+        Returns:
+            Hex digest identifying the current artifacts
+        """
+        digest = hashlib.sha1()
+        for path in self.artifact_paths():
+            if os.path.exists(path):
+                digest.update(os.path.basename(path).encode())
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+        return digest.hexdigest()[:12]
+    
+    def fit_shared_vectorizer(self, X_train: pd.Series) -> None:
+        """
+        Fit the shared TF-IDF vectorizer and pick the priority head's feature subset
+        
+        Args:
+            X_train: Training text data
+        """
+        self.vectorizer = TfidfVectorizer(max_features=CATEGORY_MAX_FEATURES, ngram_range=(1, 2))
+        features = self.vectorizer.fit_transform(X_train)
+        
+        # Priority head keeps the terms with the most TF-IDF weight over the corpus
+        term_weight = np.asarray(features.sum(axis=0)).ravel()
+        top = np.argsort(-term_weight, kind='stable')[:PRIORITY_MAX_FEATURES]
+        self.priority_features = np.sort(top)
+    
+    def _model_inputs(self, texts) -> Tuple:
+        """
+        Inputs for the category and priority heads
+        
+        In shared-feature mode the texts are vectorized once and each head gets
+        its own columns; otherwise each pipeline vectorizes the raw texts itself.
+        """
+        if not self.shared_features:
+            return texts, texts
+        
+        features = self.vectorizer.transform(texts)
+        # A column subset of unit-length rows is shorter; scale it back to unit length
+        return features, normalize(features[:, self.priority_features])
+    
+    def vectorize(self, texts: List[str]):
+        """
+        TF-IDF vectors used by the category head
+        
+        Args:
+            texts: Preprocessed texts
+            
+        Returns:
+            Sparse matrix with one L2-normalized row per text
+        """
+        if self.shared_features:
+            return self.vectorizer.transform(texts)
+        return self.category_model.named_steps['vectorizer'].transform(texts)
+    
     def train_category_model(self, X_train: pd.Series, y_train: pd.Series) -> None:
         """
         Train the category classification model
@@ -40,10 +143,18 @@ class TicketClassifier:
         # Encode category labels
         y_encoded = self.category_encoder.fit_transform(y_train)
         
+        if self.shared_features:
+            # Train on the shared feature space
+            if self.vectorizer is None:
+                self.fit_shared_vectorizer(X_train)
+            self.category_model = category_classifier(y_encoded)
+            self.category_model.fit(self._model_inputs(X_train)[0], y_encoded)
+            return
+        
         # Create and train the pipeline
         self.category_model = Pipeline([
-            ('vectorizer', TfidfVectorizer(max_features=10000, ngram_range=(1, 2))),
-            ('classifier', OneVsRestClassifier(LinearSVC(C=1.0)))
+            ('vectorizer', TfidfVectorizer(max_features=CATEGORY_MAX_FEATURES, ngram_range=(1, 2))),
+            ('classifier', category_classifier(y_encoded))
         ])
         
         self.category_model.fit(X_train, y_encoded)
@@ -59,9 +170,17 @@ class TicketClassifier:
         # Encode priority labels
         y_encoded = self.priority_encoder.fit_transform(y_train)
         
+        if self.shared_features:
+            # Train on the priority subset of the shared feature space
+            if self.vectorizer is None:
+                self.fit_shared_vectorizer(X_train)
+            self.priority_model = LogisticRegression(max_iter=1000)
+            self.priority_model.fit(self._model_inputs(X_train)[1], y_encoded)
+            return
+        
         # Create and train the pipeline
         self.priority_model = Pipeline([
-            ('vectorizer', TfidfVectorizer(max_features=5000, ngram_range=(1, 2))),
+            ('vectorizer', TfidfVectorizer(max_features=PRIORITY_MAX_FEATURES, ngram_range=(1, 2))),
             ('classifier', LogisticRegression(max_iter=1000))
         ])
         
@@ -85,10 +204,13 @@ class TicketClassifier:
             'priority': {}
         }
         
+        # Vectorize once (shared-feature mode) or hand texts to each pipeline
+        category_input, priority_input = self._model_inputs(X_test)
+        
         # Evaluate category model
         if self.category_model:
             y_cat_encoded = self.category_encoder.transform(y_category_test)
-            y_cat_pred = self.category_model.predict(X_test)
+            y_cat_pred = self.category_model.predict(category_input)
             
             results['category']['accuracy'] = accuracy_score(y_cat_encoded, y_cat_pred)
             results['category']['f1_weighted'] = f1_score(y_cat_encoded, y_cat_pred, average='weighted')
@@ -101,7 +223,7 @@ class TicketClassifier:
         # Evaluate priority model
         if self.priority_model:
             y_pri_encoded = self.priority_encoder.transform(y_priority_test)
-            y_pri_pred = self.priority_model.predict(X_test)
+            y_pri_pred = self.priority_model.predict(priority_input)
             
             results['priority']['accuracy'] = accuracy_score(y_pri_encoded, y_pri_pred)
             results['priority']['f1_weighted'] = f1_score(y_pri_encoded, y_pri_pred, average='weighted')
@@ -113,12 +235,54 @@ class TicketClassifier:
         
         return results
     
-    def predict(self, texts: List[str]) -> Dict[str, List[str]]:
+    @staticmethod
+    def _predict_with_confidence(model, X) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predict encoded labels together with a confidence in [0, 1] and a margin
+        
+        Uses predict_proba where the model has it (logistic regression, the
+        calibrated category head). For uncalibrated margin-based models
+        (LinearSVC) the decision scores are turned into a softmax distribution.
+        The margin is how far the best label is ahead of the runner-up, in
+        probability where the model is calibrated and in decision score
+        otherwise; unlike the softmax it separates clear from ambiguous tickets.
+        Labels are the argmax, as in the models' own predict.
+        
+        Returns:
+            Tuple of (encoded labels, confidence of each label, margin of each label)
+        """
+        if hasattr(model, 'predict_proba'):
+            probabilities = model.predict_proba(X)
+            scores = probabilities
+        else:
+            scores = np.asarray(model.decision_function(X), dtype=float)
+            if scores.ndim == 1:
+                # Binary models return the margin of the positive class only
+                scores = np.column_stack([-scores, scores])
+            probabilities = np.exp(scores - scores.max(axis=1, keepdims=True))
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+        
+        best = probabilities.argmax(axis=1)
+        rows = np.arange(len(best))
+        if scores.shape[1] > 1:
+            top_two = np.partition(scores, -2, axis=1)[:, -2:]
+            margin = top_two[:, 1] - top_two[:, 0]
+        else:
+            margin = np.ones(len(best))
+        return np.asarray(model.classes_)[best], probabilities[rows, best], margin
+    
+    def predict(self, texts: List[str], timings: Optional[Dict[str, float]] = None,
+                return_confidence: bool = False) -> Dict[str, List]:
         """
         Predict category and priority for texts
         
         Args:
             texts: List of ticket texts to classify
+            timings: Optional dictionary that receives the seconds spent in each
+                stage ('vectorize' in shared-feature mode, 'category', 'priority')
+            return_confidence: Also return 'category_confidence' and
+                'priority_confidence' lists with the confidence of each label, and
+                'category_margin' and 'priority_margin' lists with its lead over the runner-up
             
         Returns:
             Dictionary with predictions
@@ -128,17 +292,31 @@ class TicketClassifier:
             'priority': []
         }
         
-        # Make category predictions
-        if self.category_model:
-            category_preds = self.category_model.predict(texts)
-            category_labels = self.category_encoder.inverse_transform(category_preds)
-            results['category'] = category_labels.tolist()
+        # Vectorize once (shared-feature mode) or hand texts to each pipeline
+        start = time.perf_counter()
+        category_input, priority_input = self._model_inputs(texts)
+        if timings is not None and self.shared_features:
+            timings['vectorize'] = time.perf_counter() - start
         
-        # Make priority predictions
-        if self.priority_model:
-            priority_preds = self.priority_model.predict(texts)
-            priority_labels = self.priority_encoder.inverse_transform(priority_preds)
-            results['priority'] = priority_labels.tolist()
+        heads = [
+            ('category', self.category_model, self.category_encoder, category_input),
+            ('priority', self.priority_model, self.priority_encoder, priority_input),
+        ]
+        for head, model, encoder, inputs in heads:
+            if not model:
+                continue
+            
+            # Make predictions for this head
+            start = time.perf_counter()
+            if return_confidence:
+                preds, confidence, margin = self._predict_with_confidence(model, inputs)
+                results[f'{head}_confidence'] = confidence.tolist()
+                results[f'{head}_margin'] = margin.tolist()
+            else:
+                preds = model.predict(inputs)
+            results[head] = encoder.inverse_transform(preds).tolist()
+            if timings is not None:
+                timings[head] = time.perf_counter() - start
         
         return results
     
@@ -151,19 +329,52 @@ class TicketClassifier:
         if self.priority_model:
             joblib.dump(self.priority_model, os.path.join(self.model_dir, 'priority_model.pkl'))
             joblib.dump(self.priority_encoder, os.path.join(self.model_dir, 'priority_encoder.pkl'))
+        
+        # Shared vectorizer used by both heads
+        extractor_path = os.path.join(self.model_dir, 'feature_extractor.pkl')
+        if self.shared_features:
+            joblib.dump(
+                {'vectorizer': self.vectorizer, 'priority_features': self.priority_features},
+                extractor_path
+            )
+        elif os.path.exists(extractor_path):
+            # Drop a stale extractor left by an earlier shared-feature training run
+            os.remove(extractor_path)
+        
+        self.fingerprint = self.compute_fingerprint()
     
-    def load_models(self) -> bool:
+    def load_models(self, mmap_mode: Optional[str] = None) -> bool:
         """
         Load trained models from disk
         
+        Args:
+            mmap_mode: Memory-map the numpy arrays inside the pickles instead of
+                copying them (e.g. 'r'). Processes mapping the same files share
+                those pages through the OS page cache.
+        
         Returns:
             True if both models were loaded successfully, False otherwise
         """
         try:
-            self.category_model = joblib.load(os.path.join(self.model_dir, 'category_model.pkl'))
-            self.category_encoder = joblib.load(os.path.join(self.model_dir, 'category_encoder.pkl'))
-            self.priority_model = joblib.load(os.path.join(self.model_dir, 'priority_model.pkl'))
-            self.priority_encoder = joblib.load(os.path.join(self.model_dir, 'priority_encoder.pkl'))
+            def load(name):
+                return joblib.load(os.path.join(self.model_dir, name), mmap_mode=mmap_mode)
+            
+            self.category_model = load('category_model.pkl')
+            self.category_encoder = load('category_encoder.pkl')
+            self.priority_model = load('priority_model.pkl')
+            self.priority_encoder = load('priority_encoder.pkl')
+            
+            # Bare classifiers (instead of pipelines) mean the models share one vectorizer
+            self.shared_features = not isinstance(self.category_model, Pipeline)
+            if self.shared_features:
+                extractor = load('feature_extractor.pkl')
+                self.vectorizer = extractor['vectorizer']
+                self.priority_features = extractor['priority_features']
+            else:
+                self.vectorizer = None
+                self.priority_features = None
+            
+            self.fingerprint = self.compute_fingerprint()
             return True
         except Exception as e:
             print(f"Error loading models: {e}")
@@ -176,6 +387,11 @@ class TicketClassifier:
         """
         print("Creating dummy models for testing...")
         
+        # Dummy models use separate pipelines
+        self.shared_features = False
+        self.vectorizer = None
+        self.priority_features = None
+        
         # Set up basic categories and priorities
         categories = ['bug', 'feature', 'query', 'general']
         priorities = ['low', 'medium', 'high', 'critical']
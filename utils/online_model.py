@@ -0,0 +1,166 @@
+import copy
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+# Size of the hashed feature space shared by both heads
+ONLINE_N_FEATURES = 2 ** 18
+
+
+class OnlineTicketModel:
+    """
+    Incrementally trained correction model for category and priority.
+
+    Texts are hashed (no vocabulary to fit), so new examples can be learned
+    with partial_fit at any time. Examples are queued and applied in
+    mini-batches by update(); each update trains a copy of the heads and swaps
+    it in, so predictions never see a half-updated model.
+    """
+
+    def __init__(self, categories: Sequence[str], priorities: Sequence[str],
+                 min_examples: int = 20, confidence_threshold: float = 0.7):
+        """
+        Initialize the online model
+
+        Args:
+            categories: Category labels the model may predict (those of the base classifier)
+            priorities: Priority labels the model may predict
+            min_examples: Examples a head must have learned before its predictions are used
+            confidence_threshold: Minimum probability for a prediction to be returned
+        """
+        self.categories = list(categories)
+        self.priorities = list(priorities)
+        self.min_examples = min_examples
+        self.confidence_threshold = confidence_threshold
+
+        self.vectorizer = HashingVectorizer(
+            n_features=ONLINE_N_FEATURES,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm='l2'
+        )
+
+        # Heads and the number of examples each has learned
+        self._heads: Dict[str, Optional[SGDClassifier]] = {'category': None, 'priority': None}
+        self._examples = {'category': 0, 'priority': 0}
+
+        # Queued (processed text, category, priority) examples
+        self._pending: List[Tuple[str, Optional[str], Optional[str]]] = []
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+        # Incremented on every update, so cached predictions can be invalidated
+        self.version = 0
+
+    def matches(self, categories: Sequence[str], priorities: Sequence[str]) -> bool:
+        """Check whether the model was built for these label sets"""
+        return list(categories) == self.categories and list(priorities) == self.priorities
+
+    def add(self, processed_text: str, category: Optional[str] = None,
+            priority: Optional[str] = None) -> bool:
+        """
+        Queue a labelled example for the next update
+
+        Args:
+            processed_text: Preprocessed ticket text
+            category: Correct category, or None if unknown
+            priority: Correct priority, or None if unknown
+
+        Returns:
+            True if the example was queued (labels outside the known sets are dropped)
+        """
+        if category not in self.categories:
+            category = None
+        if priority not in self.priorities:
+            priority = None
+        if not processed_text or (category is None and priority is None):
+            return False
+
+        with self._lock:
+            self._pending.append((processed_text, category, priority))
+        return True
+
+    def pending(self) -> int:
+        """Number of queued examples"""
+        with self._lock:
+            return len(self._pending)
+
+    def update(self) -> int:
+        """
+        Apply all queued examples as one mini-batch
+
+        Returns:
+            Number of examples applied
+        """
+        with self._update_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            X = self.vectorizer.transform([text for text, _, _ in batch])
+            heads = dict(self._heads)
+            examples = dict(self._examples)
+
+            for head, column, classes in (('category', 1, self.categories),
+                                          ('priority', 2, self.priorities)):
+                rows = [i for i, example in enumerate(batch) if example[column] is not None]
+                if not rows:
+                    continue
+
+                # Train a copy so concurrent predictions keep using the current head
+                model = copy.deepcopy(heads[head]) if heads[head] is not None else SGDClassifier(
+                    loss='log_loss', alpha=1e-4, random_state=42
+                )
+                model.partial_fit(X[rows], [batch[i][column] for i in rows], classes=classes)
+                heads[head] = model
+                examples[head] += len(rows)
+
+            self._heads = heads
+            self._examples = examples
+            self.version += 1
+            return len(batch)
+
+    def predict(self, processed_texts: List[str]) -> Dict[str, List[Optional[str]]]:
+        """
+        Predict labels where the online model is trained and confident
+
+        Args:
+            processed_texts: Preprocessed ticket texts
+
+        Returns:
+            Dictionary with a 'category' and a 'priority' list; entries are None
+            where the base model's prediction should be kept
+        """
+        results = {head: [None] * len(processed_texts) for head in self._heads}
+        heads, examples = self._heads, self._examples
+        if not processed_texts or not any(
+            heads[head] is not None and examples[head] >= self.min_examples for head in heads
+        ):
+            return results
+
+        X = self.vectorizer.transform(processed_texts)
+        for head, model in heads.items():
+            if model is None or examples[head] < self.min_examples:
+                continue
+            probabilities = model.predict_proba(X)
+            best = probabilities.argmax(axis=1)
+            confident = probabilities[np.arange(len(best)), best] >= self.confidence_threshold
+            results[head] = [
+                str(model.classes_[index]) if ok else None
+                for index, ok in zip(best, confident)
+            ]
+        return results
+
+    def stats(self) -> Dict[str, object]:
+        """Training counters"""
+        return {
+            "version": self.version,
+            "pending": self.pending(),
+            "category_examples": self._examples['category'],
+            "priority_examples": self._examples['priority'],
+            "min_examples": self.min_examples,
+            "confidence_threshold": self.confidence_threshold,
+        }
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+from utils.preprocessor import PREPROCESSOR_VERSION, pipeline_language
+
+# Keys looked up per query (SQLite limits the number of bound parameters)
+LOOKUP_BATCH_SIZE = 500
+
+# Looking up at least this fraction of the entries reads the whole table
+# instead, which is sequential and faster than that many index searches
+SCAN_FRACTION = 0.25
+
+
+class PreprocessCache:
+    """
+    Persistent cache of preprocessed texts, addressed by content.
+
+    Each entry is keyed by a 16-byte BLAKE2b digest of the preprocessor
+    version, the language pipeline and the raw text, and stored in a single
+    SQLite table without row ids, so a re-run over a corpus only has to
+    preprocess the texts it hasn't seen. Opening a cache written by another
+    preprocessor version empties it.
+    """
+
+    def __init__(self, path: str, version: str = PREPROCESSOR_VERSION):
+        """
+        Open (or create) the cache
+
+        Args:
+            path: SQLite database file
+            version: Preprocessor version the cached texts must come from
+        """
+        self.path = path
+        self.version = version
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, processed TEXT NOT NULL) WITHOUT ROWID"
+        )
+
+        # Entries of another preprocessor version can never be hit again
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != version:
+            if row is not None:
+                print(f"Preprocessor version changed ({row[0]} -> {version}), clearing {path}")
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        self._db.commit()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def key(self, text: str, language: str = "en") -> bytes:
+        """Digest addressing the preprocessed form of a text"""
+        content = f"{self.version}\0{pipeline_language(language)}\0{text}"
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, keys: List[Optional[bytes]]) -> List[Optional[str]]:
+        """
+        Look up many keys
+
+        Args:
+            keys: Cache keys (None entries are counted as misses)
+
+        Returns:
+            The cached text for each key, or None where it isn't cached
+        """
+        found = {}
+        # Sorted keys visit the B-tree pages in order
+        unique = sorted({key for key in keys if key is not None})
+        if unique and len(unique) >= SCAN_FRACTION * len(self):
+            wanted = set(unique)
+            found = {
+                key: processed
+                for key, processed in self._db.execute("SELECT key, processed FROM entries")
+                if key in wanted
+            }
+        else:
+            for start in range(0, len(unique), LOOKUP_BATCH_SIZE):
+                batch = unique[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._db.execute(
+                    f"SELECT key, processed FROM entries WHERE key IN ({placeholders})", batch
+                ))
+
+        results = [found.get(key) if key is not None else None for key in keys]
+        hits = sum(result is not None for result in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, entries: Iterable[Tuple[bytes, str]]) -> int:
+        """
+        Store preprocessed texts
+
+        Args:
+            entries: (key, processed text) pairs
+
+        Returns:
+            Number of entries written
+        """
+        # Inserting in key order walks the B-tree once instead of jumping between pages
+        entries = sorted(entries)
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?)", entries)
+        self.writes += len(entries)
+        return len(entries)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def stats(self) -> dict:
+        """Lookups and writes since the cache was opened"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "writes": self.writes,
+        }
@@ -1,24 +1,154 @@
+import os
 import re
+import time
+import threading
+import multiprocessing
 import nltk
 import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+from nltk.stem import WordNetLemmatizer, SnowballStemmer
+
+# NLTK data shipped with the project (populated by `python run.py setup`);
+# the NLTK_DATA environment variable can point somewhere else
+NLTK_DATA_DIR = os.environ.get(
+    "NLTK_DATA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nltk_data")
+)
+if NLTK_DATA_DIR not in nltk.data.path:
+    nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+# Required NLTK resources and where they live inside an nltk_data directory
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
+# NLTK 3.8.2+ tokenizes with the pickle-free punkt_tab tables
+if hasattr(nltk.tokenize, 'PunktTokenizer'):
+    NLTK_RESOURCES['punkt_tab'] = 'tokenizers/punkt_tab'
+
+_nltk_resources_checked = False
+
+# Characters removed before tokenizing: anything that is neither a word character
+# nor whitespace, and digits (removing a character never creates a new match, so
+# one pass does what the two re.sub calls of the NLTK chain did)
+STRIP_PATTERN = re.compile(r'[^\w\s]+|\d+')
+
+# Treebank contractions that word_tokenize still splits once punctuation is gone;
+# with no punctuation left these are its only rules besides splitting on whitespace
+TOKEN_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+# Largest number of distinct tokens whose lemma is memoized per preprocessor
+LEMMA_CACHE_SIZE = int(os.environ.get("LEMMA_CACHE_SIZE", "200000"))
+
+# Marks tokens not yet in the lemma table
+_UNSEEN = object()
+
+# Preprocessing pipeline per ISO language code: (NLTK language name, kind).
+# English is lemmatized, the other alphabetic languages are stemmed with
+# Snowball and CJK text, which has no spaces between words, is split into
+# character bigrams. Other codes fall back to the English pipeline.
+LANGUAGE_PIPELINES = {
+    'en': ('english', 'lemmatize'),
+    'da': ('danish', 'stem'),
+    'de': ('german', 'stem'),
+    'es': ('spanish', 'stem'),
+    'fi': ('finnish', 'stem'),
+    'fr': ('french', 'stem'),
+    'it': ('italian', 'stem'),
+    'nl': ('dutch', 'stem'),
+    'no': ('norwegian', 'stem'),
+    'pt': ('portuguese', 'stem'),
+    'ru': ('russian', 'stem'),
+    'sv': ('swedish', 'stem'),
+    'ja': (None, 'cjk'),
+    'ko': (None, 'cjk'),
+    'zh': (None, 'cjk'),
+}
+
+# Largest number of non-English pipelines kept loaded; the least recently used
+# one is dropped when another language shows up
+PIPELINE_CACHE_SIZE = int(os.environ.get("PIPELINE_CACHE_SIZE", "8"))
+
+# Runs of letters (no digits or underscores), so elided articles like l' split off
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+
+# Han, kana and Hangul characters
+CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+# Runs of CJK characters, or of other letters (e.g. product names in Latin script)
+CJK_PATTERN = re.compile(f'([{CJK_CHARS}]+)|[^\\W\\d_{CJK_CHARS}]+')
 
 # Download required NLTK resources
-def download_nltk_resources():
-    resources = ['punkt', 'stopwords', 'wordnet']
-    for resource in resources:
+def download_nltk_resources(download=True):
+    """
+    Make sure the NLTK resources are available, downloading missing ones
+    into NLTK_DATA_DIR. The check runs once per process.
+    
+    Args:
+        download: Whether to download missing resources (otherwise only report them)
+        
+    Returns:
+        List of resources that are still missing
+    """
+    global _nltk_resources_checked
+    if _nltk_resources_checked:
+        return []
+    
+    missing = []
+    for resource, path in NLTK_RESOURCES.items():
         try:
-            nltk.data.find(f'tokenizers/{resource}')
+            nltk.data.find(path)
         except LookupError:
-            nltk.download(resource)
+            if not (download and nltk.download(resource, download_dir=NLTK_DATA_DIR, quiet=True)):
+                missing.append(resource)
+    
+    if missing:
+        print(f"Warning: NLTK resources not available: {', '.join(missing)}")
+    _nltk_resources_checked = True
+    return missing
+
+# Rows per chunk when preprocessing a corpus in worker processes
+DEFAULT_CHUNK_SIZE = 10000
+
+# Version of the preprocessing output; bump it whenever a change alters the
+# processed text of some input, so cached results are recomputed
+PREPROCESSOR_VERSION = "3"
 
 class TextPreprocessor:
     def __init__(self, language='english'):
         download_nltk_resources()
         self.stop_words = set(stopwords.words(language))
         self.lemmatizer = WordNetLemmatizer()
+        
+        # Token -> lemma, or None for stopwords, so one lookup does both steps
+        self._lemmas = dict.fromkeys(self.stop_words)
+    
+    def _lemmatize(self, token):
+        """Lemmatize a token not in the lemma table yet, remembering the result"""
+        lemma = self.lemmatizer.lemmatize(token)
+        if len(self._lemmas) < LEMMA_CACHE_SIZE + len(self.stop_words):
+            self._lemmas[token] = lemma
+        return lemma
+    
+    def tokenize(self, text):
+        """
+        Lowercase, strip punctuation and digits, and split into tokens exactly
+        like the NLTK chain (lower, re.sub, word_tokenize) does
+        """
+        tokens = STRIP_PATTERN.sub('', text.lower()).split()
+        if TOKEN_SPLITS.keys().isdisjoint(tokens):
+            return tokens
+        return [part for token in tokens for part in TOKEN_SPLITS.get(token, (token,))]
     
     def preprocess(self, text):
         """
@@ -28,6 +158,28 @@ class TextPreprocessor:
         3. Tokenizing
         4. Removing stopwords
         5. Lemmatizing
+        
+        Produces the same output as preprocess_nltk without running Punkt and
+        the Treebank regexes, and looks stopwords and lemmas up in one table.
+        """
+        if not isinstance(text, str):
+            return ""
+        
+        lemmas = self._lemmas
+        cleaned_tokens = []
+        for token in self.tokenize(text):
+            lemma = lemmas.get(token, _UNSEEN)
+            if lemma is _UNSEEN:
+                lemma = self._lemmatize(token)
+            if lemma is not None:
+                cleaned_tokens.append(lemma)
+        
+        return " ".join(cleaned_tokens)
+    
+    def preprocess_nltk(self, text):
+        """
+        Reference implementation of preprocess using the NLTK tokenizer and
+        lemmatizer directly (slower; kept to check the fast path against)
         """
         if not isinstance(text, str):
             return ""
@@ -51,46 +203,380 @@ class TextPreprocessor:
         
         return " ".join(cleaned_tokens)
     
-    def preprocess_df(self, df, text_column):
-        """Apply preprocessing to a dataframe column"""
-        df_copy = df.copy()
-        df_copy['processed_text'] = df_copy[text_column].apply(self.preprocess)
+    def preprocess_batch(self, texts):
+        """Preprocess a list of texts in one pass"""
+        preprocess = self.preprocess
+        return [preprocess(text) for text in texts]
+    
+    def preprocess_df(self, df, text_column, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, cache=None):
+        """
+        Apply preprocessing to a dataframe column
+        
+        Args:
+            df: DataFrame to preprocess
+            text_column: Column holding the text
+            workers: Worker processes (1 preprocesses in this process)
+            chunk_size: Rows per chunk handed to a worker
+            cache: PreprocessCache to reuse earlier results from
+            
+        Returns:
+            DataFrame with a 'processed_text' column added (the input is not modified)
+        """
+        processed = preprocess_parallel(
+            df[text_column].tolist(), workers=workers, chunk_size=chunk_size, preprocessor=self,
+            cache=cache
+        )
+        # Shallow copy: the new frame shares the existing columns' data
+        df_copy = df.copy(deep=False)
+        df_copy['processed_text'] = processed
         return df_copy
 
+class StemmingPreprocessor(TextPreprocessor):
+    """
+    Preprocessor for alphabetic languages other than English: drops the
+    language's stopwords and reduces words to their Snowball stem (the
+    WordNet lemmatizer only knows English)
+    """
+    def __init__(self, language):
+        super().__init__(language)
+        self.stemmer = SnowballStemmer(language)
+    
+    def _lemmatize(self, token):
+        """Stem a token not in the lemma table yet, remembering the result"""
+        stem = self.stemmer.stem(token)
+        if len(self._lemmas) < LEMMA_CACHE_SIZE + len(self.stop_words):
+            self._lemmas[token] = stem
+        return stem
+    
+    def tokenize(self, text):
+        """Lowercase and split into runs of letters"""
+        return WORD_PATTERN.findall(text.lower())
+
+class CJKPreprocessor:
+    """
+    Preprocessor for Chinese, Japanese and Korean: CJK text is split into
+    overlapping character bigrams, other words are lowercased
+    """
+    def tokenize(self, text):
+        """Character bigrams of CJK runs (a lone character stays a unigram) and lowercased words"""
+        tokens = []
+        for match in CJK_PATTERN.finditer(text.lower()):
+            run = match.group(1)
+            if run is None:
+                tokens.append(match.group(0))
+            elif len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        return tokens
+    
+    def preprocess(self, text):
+        if not isinstance(text, str):
+            return ""
+        return " ".join(self.tokenize(text))
+    
+    def preprocess_batch(self, texts):
+        """Preprocess a list of texts in one pass"""
+        preprocess = self.preprocess
+        return [preprocess(text) for text in texts]
+
+def pipeline_language(language):
+    """
+    Registry key of the pipeline for a language code ('zh-CN' -> 'zh');
+    unknown or missing codes map to English
+    """
+    code = str(language or 'en').strip().lower().replace('_', '-').split('-')[0]
+    return code if code in LANGUAGE_PIPELINES else 'en'
+
+def build_pipeline(language):
+    """
+    Build the preprocessor for a registry key
+    
+    Args:
+        language: Key of LANGUAGE_PIPELINES
+        
+    Returns:
+        TextPreprocessor, StemmingPreprocessor or CJKPreprocessor
+    """
+    name, kind = LANGUAGE_PIPELINES[language]
+    if kind == 'cjk':
+        return CJKPreprocessor()
+    if kind == 'stem':
+        return StemmingPreprocessor(name)
+    return TextPreprocessor(name)
+
 class MultilingualPreprocessor:
-    def __init__(self):
-        # Initialize with English as default
-        self.english_preprocessor = TextPreprocessor('english')
+    def __init__(self, english_preprocessor=None, max_pipelines=PIPELINE_CACHE_SIZE,
+                 on_preprocess=None):
+        """
+        Route texts to a preprocessing pipeline per language
         
-        # Language detection will be used to route to the right preprocessor
-        # For simplicity, we're assuming language is provided in the data
+        Args:
+            english_preprocessor: TextPreprocessor used for English (built if not given)
+            max_pipelines: Largest number of other-language pipelines kept loaded
+            on_preprocess: Called as on_preprocess(language, texts, seconds) after
+                each preprocess/preprocess_batch call, e.g. to record latency
+        """
+        # English is always loaded; other pipelines are built on first use
+        self.english_preprocessor = english_preprocessor or TextPreprocessor('english')
+        self.max_pipelines = max(1, max_pipelines)
+        self.on_preprocess = on_preprocess
+        self._pipelines = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.builds = 0
+        self.evictions = 0
     
-    def preprocess(self, text, language='en'):
+    def pipeline(self, language):
         """
-        Preprocess text based on language
-        Currently simplistic - in production would use more language-specific tools
+        Preprocessor for a language, building it on first use
+        
+        Returns:
+            (registry key, preprocessor)
         """
-        # For now, use the English preprocessor for everything
-        # In a real system, we'd use language-specific tools or a multilingual model
-        return self.english_preprocessor.preprocess(text)
+        language = pipeline_language(language)
+        if language == 'en':
+            return language, self.english_preprocessor
+        
+        with self._lock:
+            preprocessor = self._pipelines.get(language)
+            if preprocessor is not None:
+                self._pipelines.move_to_end(language)
+                return language, preprocessor
+            
+            # Built under the lock so concurrent first requests load it once
+            preprocessor = build_pipeline(language)
+            self._pipelines[language] = preprocessor
+            self.builds += 1
+            while len(self._pipelines) > self.max_pipelines:
+                self._pipelines.popitem(last=False)
+                self.evictions += 1
+            return language, preprocessor
+    
+    def preprocess(self, text, language='en'):
+        """Preprocess text with the pipeline of its language"""
+        start = time.perf_counter()
+        language, preprocessor = self.pipeline(language)
+        processed = preprocessor.preprocess(text)
+        if self.on_preprocess is not None:
+            self.on_preprocess(language, 1, time.perf_counter() - start)
+        return processed
     
-    def preprocess_df(self, df, text_column, language_column=None):
+    def preprocess_batch(self, texts, language='en'):
+        """Preprocess a list of texts that share the same language"""
+        start = time.perf_counter()
+        language, preprocessor = self.pipeline(language)
+        processed = preprocessor.preprocess_batch(texts)
+        if self.on_preprocess is not None:
+            self.on_preprocess(language, len(texts), time.perf_counter() - start)
+        return processed
+    
+    def stats(self):
+        """Loaded pipelines and how often pipelines were built and evicted"""
+        with self._lock:
+            return {
+                "pipelines": ['en'] + list(self._pipelines),
+                "max_pipelines": self.max_pipelines,
+                "builds": self.builds,
+                "evictions": self.evictions,
+            }
+    
+    def preprocess_df(self, df, text_column, language_column=None, workers=1,
+                      chunk_size=DEFAULT_CHUNK_SIZE, cache=None):
         """
         Apply preprocessing to a dataframe with optional language column
         If language_column is provided, use language-specific preprocessing
-        """
-        df_copy = df.copy()
-        
-        if language_column and language_column in df_copy.columns:
-            # Apply language-specific preprocessing
-            df_copy['processed_text'] = df_copy.apply(
-                lambda row: self.preprocess(row[text_column], row[language_column]), 
-                axis=1
-            )
-        else:
-            # Apply default English preprocessing
-            df_copy['processed_text'] = df_copy[text_column].apply(
-                lambda text: self.preprocess(text)
-            )
+        
+        Args:
+            df: DataFrame to preprocess
+            text_column: Column holding the text
+            language_column: Column holding each row's language (ISO code)
+            workers: Worker processes (1 preprocesses in this process)
+            chunk_size: Rows per chunk handed to a worker
+            cache: PreprocessCache to reuse earlier results from
             
-        return df_copy 
\ No newline at end of file
+        Returns:
+            DataFrame with a 'processed_text' column added (the input is not modified)
+        """
+        languages = None
+        if language_column and language_column in df.columns:
+            languages = df[language_column].fillna('en').astype(str).tolist()
+        
+        processed = preprocess_parallel(
+            df[text_column].tolist(), languages, workers=workers, chunk_size=chunk_size,
+            preprocessor=self, cache=cache
+        )
+        # Shallow copy: the new frame shares the existing columns' data
+        df_copy = df.copy(deep=False)
+        df_copy['processed_text'] = processed
+        return df_copy
+
+def preprocess_by_language(texts, languages, multilingual_preprocessor):
+    """
+    Preprocess a batch of texts, one pass per language
+    
+    Args:
+        texts: Texts to preprocess
+        languages: Language (ISO code) of each text
+        multilingual_preprocessor: MultilingualPreprocessor routing each language
+            to its pipeline
+        
+    Returns:
+        Preprocessed texts in the original order
+    """
+    # Group positions by pipeline so each one sees its whole share at once
+    groups = {}
+    for i, language in enumerate(languages):
+        groups.setdefault(pipeline_language(language), []).append(i)
+    
+    processed_texts = [None] * len(texts)
+    for language, indices in groups.items():
+        group_texts = [texts[i] for i in indices]
+        processed = multilingual_preprocessor.preprocess_batch(group_texts, language)
+        for i, processed_text in zip(indices, processed):
+            processed_texts[i] = processed_text
+    
+    return processed_texts
+
+# Preprocessor owned by each worker process, built once by the pool initializer
+_worker_preprocessor = None
+
+# (language, texts, seconds) of each pipeline pass over the worker's current chunk
+_worker_timings = []
+
+def init_preprocess_worker():
+    """Build the English pipeline (stopword set, lemmatizer) once per worker process"""
+    global _worker_preprocessor
+    _worker_preprocessor = MultilingualPreprocessor(
+        on_preprocess=lambda language, texts, seconds: _worker_timings.append((language, texts, seconds))
+    )
+
+def preprocess_in_worker(texts, languages):
+    """
+    Preprocess a chunk of texts with the worker's preprocessor
+    
+    Returns:
+        (preprocessed texts, (language, texts, seconds) of each pipeline pass),
+        so the parent can report the timings its own callbacks would have seen
+    """
+    _worker_timings.clear()
+    processed = preprocess_by_language(texts, languages, _worker_preprocessor)
+    return processed, list(_worker_timings)
+
+def replay_worker_timings(chunk_results, on_preprocess):
+    """Chunks of preprocessed texts from workers, reporting each chunk's timings to on_preprocess"""
+    for processed, timings in chunk_results:
+        if on_preprocess is not None:
+            for language, texts, seconds in timings:
+                on_preprocess(language, texts, seconds)
+        yield processed
+
+def preprocess_parallel(texts, languages=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                        preprocessor=None, verbose=False, cache=None):
+    """
+    Preprocess a corpus in chunks on a pool of worker processes
+    
+    Args:
+        texts: Texts to preprocess
+        languages: Language (ISO code) of each text, or None for English
+        workers: Worker processes (None: one per CPU core; 1 preprocesses in this process)
+        chunk_size: Texts per chunk handed to a worker
+        preprocessor: TextPreprocessor or MultilingualPreprocessor used when
+            preprocessing in this process (built if not given)
+        verbose: Print progress and throughput
+        cache: PreprocessCache holding earlier results; only texts missing
+            from it are preprocessed, and their results are added to it
+        
+    Returns:
+        Preprocessed texts in the original order
+    """
+    if languages is None:
+        languages = ['en'] * len(texts)
+    if cache is not None:
+        return preprocess_with_cache(texts, languages, cache, workers=workers, chunk_size=chunk_size,
+                                     preprocessor=preprocessor, verbose=verbose)
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size)
+    start = time.perf_counter()
+    
+    chunks = [
+        (texts[i:i + chunk_size], languages[i:i + chunk_size])
+        for i in range(0, len(texts), chunk_size)
+    ]
+    
+    pool = None
+    if workers > 1 and len(chunks) > 1:
+        workers = min(workers, len(chunks))
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_preprocess_worker
+        )
+        # map() yields the chunk results in submission order; the workers'
+        # per-language timings go to this process's callback
+        results = replay_worker_timings(
+            pool.map(preprocess_in_worker, *zip(*chunks)),
+            getattr(preprocessor, 'on_preprocess', None)
+        )
+    else:
+        # Not worth starting processes
+        workers = 1
+        if not isinstance(preprocessor, MultilingualPreprocessor):
+            preprocessor = MultilingualPreprocessor(english_preprocessor=preprocessor)
+        results = (preprocess_by_language(chunk, chunk_languages, preprocessor)
+                   for chunk, chunk_languages in chunks)
+    
+    processed_texts = []
+    try:
+        for chunk in results:
+            processed_texts.extend(chunk)
+            if verbose:
+                elapsed = time.perf_counter() - start
+                print(f"  {len(processed_texts)}/{len(texts)} texts "
+                      f"({len(processed_texts) / elapsed:,.0f} texts/sec)")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    
+    if verbose:
+        elapsed = time.perf_counter() - start
+        rate = len(texts) / elapsed if elapsed > 0 else 0.0
+        print(f"Preprocessed {len(texts)} texts in {elapsed:.2f}s "
+              f"with {workers} worker(s): {rate:,.0f} texts/sec")
+    return processed_texts
+
+def preprocess_with_cache(texts, languages, cache, **kwargs):
+    """
+    Preprocess the texts missing from a cache and serve the others from it
+    
+    Args:
+        texts: Texts to preprocess
+        languages: Language (ISO code) of each text
+        cache: PreprocessCache
+        **kwargs: Passed to preprocess_parallel for the missing texts
+        
+    Returns:
+        Preprocessed texts in the original order
+    """
+    keys = [cache.key(text, language) if isinstance(text, str) else None
+            for text, language in zip(texts, languages)]
+    processed_texts = cache.get_many(keys)
+    missing = [i for i, processed in enumerate(processed_texts) if processed is None]
+    if kwargs.get('verbose'):
+        print(f"  {len(texts) - len(missing)}/{len(texts)} texts found in the preprocessing cache")
+    if not missing:
+        return processed_texts
+    
+    # Each distinct missing text is preprocessed once; texts that aren't
+    # strings have no key and are neither shared nor stored
+    first = {}
+    for i in missing:
+        first.setdefault(keys[i] if keys[i] is not None else i, i)
+    processed = dict(zip(first, preprocess_parallel(
+        [texts[i] for i in first.values()], [languages[i] for i in first.values()], **kwargs
+    )))
+    for i in missing:
+        processed_texts[i] = processed[keys[i] if keys[i] is not None else i]
+    cache.put_many((key, text) for key, text in processed.items() if isinstance(key, bytes))
+    return processed_texts
@@ -1,24 +1,22 @@
 import os
 import sys
-
-# Try to import torch and transformers, but make them optional
-try:
-    import torch
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
-    print("Warning: PyTorch/Transformers not available. Falling back to traditional models.")
+import importlib.util
 
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Union, Tuple, Optional
-from transformers import pipeline
-from transformers import Trainer, TrainingArguments
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, f1_score, classification_report
 import joblib
-from datasets import Dataset
+
+# torch, transformers and datasets are optional and slow to import, so only
+# check that they are installed here and import them where they are used
+TRANSFORMERS_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None
+    for module in ("torch", "transformers")
+)
+if not TRANSFORMERS_AVAILABLE:
+    print("Warning: PyTorch/Transformers not available. Falling back to traditional models.")
 
 class TransformerTicketClassifier:
     """
@@ -60,6 +58,8 @@ class TransformerTicketClassifier:
                 
             # Load tokenizers and models
             try:
+                from transformers import AutoTokenizer, AutoModelForSequenceClassification
+                
                 self.category_tokenizer = AutoTokenizer.from_pretrained(category_model_path)
                 self.category_model = AutoModelForSequenceClassification.from_pretrained(category_model_path)
                 
@@ -96,6 +96,8 @@ class TransformerTicketClassifier:
             }
             
         try:
+            import torch
+            
             # Ensure all texts are strings
             texts = [str(text) for text in texts]
             
@@ -156,7 +158,7 @@ class TransformerTicketClassifier:
         else:  # priority
             return self.priority_encoder.fit_transform(labels)
     
-    def prepare_dataset(self, texts: pd.Series, labels: np.ndarray) -> Dataset:
+    def prepare_dataset(self, texts: pd.Series, labels: np.ndarray) -> "Dataset":
         """
         Prepare a HuggingFace Dataset from text and labels
         
@@ -167,6 +169,8 @@ class TransformerTicketClassifier:
         Returns:
             HuggingFace Dataset
         """
+        from datasets import Dataset
+        
         # Create a dataset from pandas
         dataset_dict = {
             'text': texts.tolist(),
@@ -196,12 +200,13 @@ class TransformerTicketClassifier:
         # Encode labels
         if model_type == 'category':
             encoded_labels = self.encode_labels(labels, 'category')
-            num_labels = len(self.category_encoder.classes_)
+            classes = self.category_encoder.classes_
             model_path = os.path.join(self.model_dir, 'category_transformer')
         else:  # priority
             encoded_labels = self.encode_labels(labels, 'priority')
-            num_labels = len(self.priority_encoder.classes_)
+            classes = self.priority_encoder.classes_
             model_path = os.path.join(self.model_dir, 'priority_transformer')
+        num_labels = len(classes)
         
         # Prepare dataset
         dataset = self.prepare_dataset(texts, encoded_labels)
@@ -212,10 +217,16 @@ class TransformerTicketClassifier:
             batched=True
         )
         
+        from transformers import AutoModelForSequenceClassification, Trainer, TrainingArguments
+        
         # Load pretrained model
+        # The label names go into the model config, so a saved model maps its
+        # output ids back to categories/priorities without the encoders
         model = AutoModelForSequenceClassification.from_pretrained(
             self.model_name,
-            num_labels=num_labels
+            num_labels=num_labels,
+            id2label={i: str(label) for i, label in enumerate(classes)},
+            label2id={str(label): i for i, label in enumerate(classes)}
         )
         
         # Define training arguments (adjust as needed)
@@ -271,6 +282,8 @@ class TransformerTicketClassifier:
             
     def init_tokenizer(self):
         """Initialize tokenizer from pretrained model"""
+        from transformers import AutoTokenizer
+        
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
     
     def init_encoders(self):
@@ -312,12 +325,13 @@ class TransformerTicketClassifier:
         # Encode labels
         if model_type == 'category':
             encoded_labels = self.encode_labels(labels, 'category')
-            num_labels = len(self.category_encoder.classes_)
+            classes = self.category_encoder.classes_
             model_path = os.path.join(self.model_dir, 'category_transformer')
         else:  # priority
             encoded_labels = self.encode_labels(labels, 'priority')
-            num_labels = len(self.priority_encoder.classes_)
+            classes = self.priority_encoder.classes_
             model_path = os.path.join(self.model_dir, 'priority_transformer')
+        num_labels = len(classes)
         
         # Prepare dataset
         dataset = self.prepare_dataset(texts, encoded_labels)
@@ -328,10 +342,16 @@ class TransformerTicketClassifier:
             batched=True
         )
         
+        from transformers import AutoModelForSequenceClassification, Trainer, TrainingArguments
+        
         # Load pretrained model
+        # The label names go into the model config, so a saved model maps its
+        # output ids back to categories/priorities without the encoders
         model = AutoModelForSequenceClassification.from_pretrained(
             self.model_name,
-            num_labels=num_labels
+            num_labels=num_labels,
+            id2label={i: str(label) for i, label in enumerate(classes)},
+            label2id={str(label): i for i, label in enumerate(classes)}
         )
         
         # Define training arguments (adjust as needed)
@@ -379,6 +399,8 @@ class TransformerTicketClassifier:
             return {"error": "Models not loaded or transformers not available"}
         
         try:
+            import torch
+            
             # Ensure all texts are strings
             texts = [str(text) for text in texts]
             
@@ -388,27 +410,24 @@ class TransformerTicketClassifier:
                 "priority": []
             }
             
-            # Get predictions for each text
-            for text in texts:
-                # Category prediction
-                inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+            # One forward pass per head for the whole batch (load_models sets a
+            # tokenizer per head, init_model a shared one)
+            heads = [
+                ("category", self.category_model, self.category_tokenizer or getattr(self, "tokenizer", None)),
+                ("priority", self.priority_model, self.priority_tokenizer or getattr(self, "tokenizer", None)),
+            ]
+            for head, model, tokenizer in heads:
+                inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
                 with torch.no_grad():
-                    outputs = self.category_model(**inputs)
-                    category_scores = outputs.logits.softmax(dim=1)
-                    category_id = category_scores.argmax().item()
-                    category = self.category_model.config.id2label[category_id]
-                
-                # Priority prediction  
-                inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-                with torch.no_grad():
-                    outputs = self.priority_model(**inputs)
-                    priority_scores = outputs.logits.softmax(dim=1)
-                    priority_id = priority_scores.argmax().item()
-                    priority = self.priority_model.config.id2label[priority_id]
-                
-                # Add to results
-                results["category"].append(category)
-                results["priority"].append(priority)
+                    outputs = model(**inputs)
+                label_ids = outputs.logits.argmax(dim=1).tolist()
+                # Models trained before the label names were stored in their
+                # config only know them as 'LABEL_<id>', the encoders do
+                encoder = getattr(self, f"{head}_encoder", None)
+                if encoder is not None and hasattr(encoder, "classes_"):
+                    results[head] = encoder.inverse_transform(label_ids).tolist()
+                else:
+                    results[head] = [model.config.id2label[label_id] for label_id in label_ids]
                 
             return results
             